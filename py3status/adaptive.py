@@ -0,0 +1,55 @@
+# default upper limit of the interval in seconds
+MAX_INTERVAL = 300
+
+
+class AdaptiveInterval:
+    """
+    Refresh interval that adapts to how often a module's output changes.
+
+    Each time the module runs we are told if its output changed.  While the
+    output is stable the interval backs off towards maximum, as soon as it
+    changes the interval tightens towards minimum.
+
+    Unless a minimum is given it is the module's own interval, so that
+    modules are never run more often than their author intended.  The
+    module's interval is never cut down to the maximum.
+    """
+
+    def __init__(self, interval, minimum=None, maximum=MAX_INTERVAL,
+                 backoff=1.5, tighten=0.5):
+        if minimum is None:
+            minimum = interval
+        self.backoff = backoff
+        self.changes = 0
+        self.maximum = max(maximum, minimum, interval)
+        self.minimum = minimum
+        self.runs = 0
+        self.tighten = tighten
+        self.interval = self._clamp(interval)
+
+    def _clamp(self, interval):
+        return min(max(interval, self.minimum), self.maximum)
+
+    def update(self, changed):
+        """
+        Record a run of the module and return the new interval.
+        """
+        self.runs += 1
+        if changed:
+            self.changes += 1
+            self.interval = self._clamp(self.interval * self.tighten)
+        else:
+            self.interval = self._clamp(self.interval * self.backoff)
+        return self.interval
+
+    def report(self):
+        """
+        Return a dict describing the current state.
+        """
+        return {
+            'changes': self.changes,
+            'interval': self.interval,
+            'maximum': self.maximum,
+            'minimum': self.minimum,
+            'runs': self.runs,
+        }
@@ -0,0 +1,222 @@
+from subprocess import PIPE
+from threading import Lock, Thread
+
+from py3status.executor import Call
+
+try:
+    import asyncio
+except ImportError:
+    # python 2, modules cannot be async
+    asyncio = None
+
+
+class AsyncCall(Call):
+    """
+    A call run on the shared asyncio loop.  The call is complete when the
+    coroutine it returns has finished.
+    """
+
+    def __init__(self, pool, fn, args, callback=None):
+        Call.__init__(self, pool, fn, args)
+        self.callback = callback
+        self.cancelled = False
+        self.task = None
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            self._exception = e
+            self._finish()
+            return
+        if asyncio.iscoroutine(result):
+            self.task = self.pool.loop.create_task(result)
+        elif isinstance(result, asyncio.Future):
+            self.task = result
+        else:
+            self._result = result
+            self._finish()
+            return
+        self.task.add_done_callback(self._task_done)
+
+    def _task_done(self, task):
+        if task.cancelled():
+            self.cancelled = True
+            self._exception = asyncio.CancelledError()
+        elif task.exception() is not None:
+            self._exception = task.exception()
+        else:
+            self._result = task.result()
+        self._finish()
+
+    def _finish(self):
+        self.pool.call_finished(self)
+        if self.callback:
+            self.callback(self)
+
+    def cancel(self):
+        """
+        Cancel the call if it is still running.
+        """
+        # run() is queued on the loop before us so the task will be known
+        self.pool.loop.call_soon_threadsafe(self._cancel)
+
+    def _cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+
+class AsyncLoop:
+    """
+    A single asyncio event loop shared by all modules with `async def`
+    methods.
+
+    The loop runs in its own thread, started when first needed, so modules
+    that wait for events do not each need a thread of their own.  Calls are
+    submitted from other threads and return an AsyncCall which, like calls
+    to the ThreadPool, can be waited on with a deadline.  A call that misses
+    its deadline carries on running on the loop.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.stuck = 0
+        self.thread = None
+        self._lock = Lock()
+
+    def start(self):
+        """
+        Start the loop thread if it is not already running.
+        """
+        with self._lock:
+            if self.thread is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self.thread = Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def stuck_call(self, call):
+        """
+        Called when call has passed its deadline.  Returns False if the call
+        has finished after all.
+        """
+        with self._lock:
+            if call.done():
+                return False
+            if not call.timed_out:
+                call.timed_out = True
+                self.stuck += 1
+            return True
+
+    def call_finished(self, call):
+        with self._lock:
+            call._done.set()
+            if call.timed_out:
+                self.stuck -= 1
+
+    def submit(self, fn, *args, **kw):
+        """
+        Run fn(*args) on the loop and return an AsyncCall for its result.
+        callback, if given, is called on the loop with the AsyncCall once it
+        is complete.
+        """
+        call = self.make_call(fn, *args, **kw)
+        self.submit_call(call)
+        return call
+
+    def make_call(self, fn, *args, **kw):
+        """
+        Return an AsyncCall for fn(*args) that is not yet running, see
+        submit().
+        """
+        return AsyncCall(self, fn, args, kw.get('callback'))
+
+    def submit_call(self, call):
+        """
+        Run a call made by make_call() on the loop.
+        """
+        self.start()
+        self.loop.call_soon_threadsafe(call.run)
+
+    def then(self, awaitable, fn, errback=None):
+        """
+        Return a future for fn(result) once awaitable is done, or for
+        errback(exception) if it fails.  If these return an awaitable the
+        future waits for that too.  Cancelling the future cancels awaitable.
+
+        Code that python 2 must be able to parse cannot use `await` so this
+        is how steps are chained.  It must be called on the loop.
+        """
+        future = self.loop.create_future()
+        # what we are waiting for, awaitable then anything fn returns
+        waiting = [asyncio.ensure_future(awaitable, loop=self.loop)]
+
+        def settle(source, fn=fn, errback=errback):
+            if future.cancelled():
+                return
+            if source.cancelled():
+                future.cancel()
+                return
+            try:
+                exception = source.exception()
+                if exception is None:
+                    value = fn(source.result())
+                elif errback:
+                    value = errback(exception)
+                else:
+                    raise exception
+            except Exception as e:
+                future.set_exception(e)
+                return
+            if asyncio.iscoroutine(value) or isinstance(value, asyncio.Future):
+                waiting[0] = asyncio.ensure_future(value, loop=self.loop)
+                waiting[0].add_done_callback(
+                    lambda source: settle(source, lambda value: value, None)
+                )
+            else:
+                future.set_result(value)
+
+        def cancelled(future):
+            if future.cancelled():
+                waiting[0].cancel()
+
+        waiting[0].add_done_callback(settle)
+        future.add_done_callback(cancelled)
+        return future
+
+    def subprocess(self, command, shell=False):
+        """
+        Return an awaitable for an asyncio subprocess running command, a
+        sequence or when shell is True a string.  Its output is piped.
+        """
+        if shell:
+            return asyncio.create_subprocess_shell(
+                command, stdout=PIPE, stderr=PIPE
+            )
+        return asyncio.create_subprocess_exec(
+            *command, stdout=PIPE, stderr=PIPE
+        )
+
+    def run_in_executor(self, fn, *args):
+        """
+        Return an awaitable for fn(*args) run in a worker thread, for
+        blocking calls made from coroutines.
+        """
+        return self.loop.run_in_executor(None, fn, *args)
+
+    def open_connection(self, host=None, port=None, path=None):
+        """
+        Return an awaitable for a (reader, writer) pair connected to host and
+        port or to the unix socket at path.
+        """
+        if path:
+            return asyncio.open_unix_connection(path)
+        return asyncio.open_connection(host, port)
+
+    def sleep(self, seconds):
+        return asyncio.sleep(seconds)
@@ -99,9 +99,35 @@ class CommandRunner:
             # trigger the event
             self.py3_wrapper.events_thread.dispatch_event(event)
 
+    def rates(self, data):
+        """
+        report the effective refresh rates of the py3status module(s)
+        """
+        modules = data.get('module')
+        if modules:
+            module_names = self.find_modules(modules)
+        else:
+            module_names = self.py3_wrapper.output_modules.keys()
+        report = {}
+        for module_name in module_names:
+            module = self.py3_wrapper.output_modules[module_name]
+            if module['type'] != 'py3status':
+                continue
+            module = module['module']
+            info = {
+                'interval': module.refresh_interval,
+                'skipped_updates': module.skipped_update_count,
+                'updates': module.update_count,
+            }
+            if module.adaptive_refresh:
+                info['adaptive'] = module.adaptive_refresh.report()
+            report[module.module_nice_name] = info
+        return report
+
     def run_command(self, data):
         """
-        check the given command and send to the correct dispatcher
+        check the given command and send to the correct dispatcher.
+        Any response for the client is returned.
         """
         command = data.get('command')
         if self.debug:
@@ -112,6 +138,8 @@ class CommandRunner:
             self.py3_wrapper.refresh_modules()
         elif command == 'click':
             self.click(data)
+        elif command == 'rates':
+            return self.rates(data)
 
 
 class CommandServer(threading.Thread):
@@ -184,7 +212,10 @@ class CommandServer(threading.Thread):
                         data = json.loads(data.decode('utf-8'))
                         if self.debug:
                             self.py3_wrapper.log(u'received %s' % data)
-                        self.command_runner.run_command(data)
+                        response = self.command_runner.run_command(data)
+                        if response is not None:
+                            response = json.dumps(response)
+                            connection.sendall(response.encode('utf-8'))
                 finally:
                     # Clean up the connection
                     connection.close()
@@ -242,6 +273,12 @@ def command_parser():
     )
     click_parser.add_argument(nargs='+', dest='module', help='module(s)')
 
+    # Rates
+    rates_parser = subparsers.add_parser(
+        'rates', help='show refresh rates of module(s)'
+    )
+    rates_parser.add_argument(nargs='*', dest='module', help='module(s)')
+
     # add shortcut commands for named buttons
     for k in sorted(BUTTONS, key=BUTTONS.get):
         click_parser = subparsers.add_parser(
@@ -253,6 +290,42 @@ def command_parser():
     return parser
 
 
+def receive(sock):
+    """
+    Read a json response until the server closes the connection.
+    """
+    data = b''
+    while True:
+        chunk = sock.recv(MAX_SIZE)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data.decode('utf-8'))
+
+
+def show_rates(report):
+    """
+    print the refresh rates of modules.
+    """
+    for name in sorted(report):
+        info = report[name]
+        interval = info['interval']
+        if interval is None:
+            rate = 'not scheduled'
+        else:
+            rate = '{:.1f}s ({:.2f}/min)'.format(interval, 60.0 / interval)
+        line = '{}: {} updates {} skipped {}'.format(
+            name, rate, info['updates'], info['skipped_updates']
+        )
+        adaptive = info.get('adaptive')
+        if adaptive:
+            line += ' adaptive {:.0f}-{:.0f}s changed {}/{} runs'.format(
+                adaptive['minimum'], adaptive['maximum'],
+                adaptive['changes'], adaptive['runs']
+            )
+        print(line)
+
+
 def send_command():
     """
     Run a remote command.
@@ -319,6 +392,8 @@ def send_command():
             # Send data
             output('sending')
             sock.sendall(msg)
+            if options.command == 'rates':
+                show_rates(receive(sock))
 
         finally:
             output('closing socket')
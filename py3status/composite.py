@@ -1,3 +1,7 @@
+from py3status.segment import (
+    Segment, SegmentView, freeze, remove_key, update_item
+)
+
 # basestring does not exist in python3
 try:
     basestring
@@ -17,7 +21,7 @@ class Composite:
             content = []
         elif isinstance(content, Composite):
             content = content.get_content()[:]
-        elif isinstance(content, dict):
+        elif isinstance(content, (dict, Segment, SegmentView)):
             content = [content]
         elif isinstance(content, basestring):
             content = [{'full_text': content}]
@@ -51,9 +55,14 @@ class Composite:
 
     def copy(self):
         """
-        Return a shallow copy of the Composite
+        Return a shallow copy of the Composite.
+        Segments are immutable so they are shared rather than copied, views
+        of them are frozen.
         """
-        return Composite([x.copy() for x in self._content])
+        return Composite([
+            freeze(x) if isinstance(x, (Segment, SegmentView)) else x.copy()
+            for x in self._content
+        ])
 
     def append(self, item):
         """
@@ -63,7 +72,7 @@ class Composite:
             self._content += item.get_content()
         elif isinstance(item, list):
             self._content += item
-        elif isinstance(item, dict):
+        elif isinstance(item, (dict, Segment, SegmentView)):
             self._content.append(item)
         elif isinstance(item, basestring):
             self._content.append({'full_text': item})
@@ -86,9 +95,12 @@ class Composite:
         diff_last = None
         item_last = None
         for item in self._content:
+            # unchanged views can share their segment
+            if isinstance(item, SegmentView):
+                item = item.freeze()
             # remove any undefined colors
             if hasattr(item.get('color'), 'none_setting'):
-                del item['color']
+                item = remove_key(item, 'color')
             # ignore empty items
             if not item.get('full_text') and not item.get('separator'):
                 continue
@@ -97,7 +109,16 @@ class Composite:
             del diff['full_text']
 
             if diff == diff_last or (item['full_text'].strip() == '' and item_last):
-                item_last['full_text'] += item['full_text']
+                item_last = update_item(
+                    item_last,
+                    {'full_text': item_last['full_text'] + item['full_text']}
+                )
+                final_output[-1] = item_last
+            elif isinstance(item, Segment):
+                # Segments are immutable so can be used as they are
+                diff_last = diff
+                item_last = item
+                final_output.append(item_last)
             else:
                 diff_last = diff
                 item_last = item.copy()  # copy item as we may change it
@@ -135,11 +156,7 @@ class Composite:
         """
         item = Composite(item)
 
-        for part in item.get_content():
-            if soft:
-                for key, value in update_dict.items():
-                    if key not in part:
-                        part[key] = value
-            else:
-                part.update(update_dict)
+        content = item.get_content()
+        for index, part in enumerate(content):
+            content[index] = update_item(part, update_dict, soft=soft)
         return item
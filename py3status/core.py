@@ -12,18 +12,27 @@ from platform import python_version
 from pprint import pformat
 from signal import signal, SIGTERM, SIGUSR1, SIGTSTP, SIGCONT
 from subprocess import Popen
-from threading import Event
+from threading import Event, Thread
 from syslog import syslog, LOG_ERR, LOG_INFO, LOG_WARNING
 from traceback import extract_tb, format_tb, format_stack
 
 import py3status.docstrings as docstrings
 from py3status.command import CommandServer
+from py3status.dbus_pool import DBusPool
 from py3status.events import Events
+from py3status.glib_loop import GLibLoop
+from py3status.executor import ThreadPool
+from py3status.netlink import NetworkState
 from py3status.helpers import print_line, print_stderr
 from py3status.i3status import I3status
 from py3status.parse_config import process_config
+from py3status.power import PowerProfiles
+from py3status.scheduler import Scheduler
 from py3status.module import Module
-from py3status.profiling import profile
+from py3status.profiling import profile, StartupProfile
+from py3status.segment import Segment
+from py3status.sound import SoundPlayer
+from py3status.timer_queue import TimerQueue
 from py3status.version import version
 
 LOG_LEVELS = {'error': LOG_ERR, 'warning': LOG_WARNING, 'info': LOG_INFO, }
@@ -63,17 +72,29 @@ class Py3statusWrapper():
         """
         Useful variables we'll need.
         """
+        # event loop for modules with async methods, created when first used
+        self.async_loop = None
         self.config = {}
+        self.executor = None
+        self.glib_loop = GLibLoop()
+        self.dbus_pool = DBusPool(self.glib_loop)
         self.i3bar_running = True
         self.last_refresh_ts = time.time()
+        self.lazy_modules = []
         self.lock = Event()
         self.modules = {}
+        self.network = NetworkState(self.log)
         self.none_setting = NoneSetting()
         self.notified_messages = set()
         self.output_modules = {}
+        self.power = None
         self.py3_modules = []
+        self.scheduler = None
         self.py3_modules_initialized = False
         self.queue = deque()
+        self.sound_player = SoundPlayer()
+        self.startup_profile = StartupProfile()
+        self.timer_queue = TimerQueue()
 
     def get_config(self):
         """
@@ -149,6 +170,12 @@ class Py3statusWrapper():
                             dest="include_paths",
                             help="""include user-written modules from those
                             directories (default ~/.i3/py3status)""")
+        parser.add_argument('--lazy-import',
+                            action="store_true",
+                            default=False,
+                            dest="lazy_import",
+                            help="""show placeholders and import modules in
+                            the background for a faster first output""")
         parser.add_argument('-l',
                             '--log-file',
                             action="store",
@@ -156,6 +183,20 @@ class Py3statusWrapper():
                             type=str,
                             default=None,
                             help="path to py3status log file")
+        parser.add_argument('--parallel-hooks',
+                            action="store_true",
+                            default=False,
+                            dest="parallel_hooks",
+                            help="""run modules' post_config_hook() in
+                            parallel at startup""")
+        parser.add_argument('--module-threads',
+                            action="store",
+                            dest="module_threads",
+                            type=int,
+                            default=0,
+                            metavar="N",
+                            help="""run module methods in a pool of N threads,
+                            allowing method_timeout to be used (default 0, off)""")
         parser.add_argument('-n',
                             '--interval',
                             action="store",
@@ -167,6 +208,13 @@ class Py3statusWrapper():
                             '--standalone',
                             action="store_true",
                             help="standalone mode, do not use i3status")
+        parser.add_argument('--startup-report',
+                            action="store",
+                            dest="startup_report",
+                            type=str,
+                            default=None,
+                            help="""write a json report of startup timings
+                            to this file""")
         parser.add_argument('-t',
                             '--timeout',
                             action="store",
@@ -175,6 +223,14 @@ class Py3statusWrapper():
                             default=config['cache_timeout'],
                             help="""default injection cache timeout in seconds
                             (default 60 sec)""")
+        parser.add_argument('--timer-slack',
+                            action="store",
+                            dest="timer_slack",
+                            type=float,
+                            default=0,
+                            metavar="SECONDS",
+                            help="""run module refreshes due within this many
+                            seconds together as one batch (default 0, off)""")
         parser.add_argument('-v',
                             '--version',
                             action="store_true",
@@ -199,8 +255,13 @@ class Py3statusWrapper():
         if options.include_paths:
             config['include_paths'] = options.include_paths
         config['interval'] = int(options.interval)
+        config['lazy_import'] = options.lazy_import
         config['log_file'] = options.log_file
+        config['module_threads'] = options.module_threads
+        config['parallel_hooks'] = options.parallel_hooks
         config['standalone'] = options.standalone
+        config['startup_report'] = options.startup_report
+        config['timer_slack'] = options.timer_slack
         config['i3status_config_path'] = options.i3status_conf
 
         # all done
@@ -254,14 +315,22 @@ class Py3statusWrapper():
             'weather_yahoo': ('/etc/py3status.d/', 'weather_yahoo.py')
         }
         """
+        py3_config = self.config['py3_config']
         for module in modules_list:
             # ignore already provided modules (prevents double inclusion)
             if module in self.modules:
                 continue
+            # containers are always imported straight away as they need their
+            # contents to be available.
+            lazy = (self.config.get('lazy_import') and
+                    'items' not in py3_config.get(module, {}))
             try:
-                my_m = Module(module, user_modules, self)
+                my_m = Module(module, user_modules, self, lazy=lazy)
+                if lazy:
+                    self.lazy_modules.append(module)
+                    self.modules[module] = my_m
                 # only handle modules with available methods
-                if my_m.methods:
+                elif my_m.methods:
                     self.modules[module] = my_m
                 elif self.config['debug']:
                     self.log(
@@ -272,6 +341,59 @@ class Py3statusWrapper():
                 msg = 'Loading module "{}" failed ({}).'.format(module, err)
                 self.report_exception(msg, level='warning')
 
+    def load_lazy_modules(self):
+        """
+        Import any modules that were not loaded at startup.  This is done in
+        config order so the result is deterministic.  Each module is started
+        as soon as it has been loaded.
+        """
+        for name in self.lazy_modules:
+            if not self.lock.is_set():
+                return
+            module = self.modules[name]
+            module.load()
+            if module.methods:
+                module.prepare_module()
+                module.start_module()
+            else:
+                if self.config['debug']:
+                    self.log(
+                        'ignoring module "{}" (no methods found)'.format(name))
+                module.disable_module()
+        self.log_import_times(level='info')
+        self.dump_startup_report()
+
+    def dump_startup_report(self):
+        """
+        Write the startup timings report if requested.
+        """
+        path = self.config.get('startup_report')
+        if not path:
+            return
+        try:
+            self.startup_profile.dump(path)
+        except Exception:
+            self.report_exception('Startup report failed', notify_user=False)
+
+    def log_import_times(self, level=None):
+        """
+        Log the time taken to import each module, slowest first.
+        If level is None we only log when debugging.
+        """
+        if level is None:
+            if not self.config['debug']:
+                return
+            level = 'info'
+        times = [(module.import_time, name)
+                 for name, module in self.modules.items()
+                 if module.import_time is not None]
+        if not times:
+            return
+        report = ['module import times:']
+        for import_time, name in sorted(times, reverse=True):
+            report.append('{:8.3f}s {}'.format(import_time, name))
+        self.log('\n'.join(report), level)
+
     def setup(self):
         """
         Setup py3status and spawn i3status/events/modules threads.
@@ -324,9 +446,27 @@ class Py3statusWrapper():
             self.log(
                 'py3status started with config {}'.format(self.config))
 
+        timed = self.startup_profile.timed
+
         # read i3status.conf
         config_path = self.config['i3status_config_path']
-        self.config['py3_config'] = process_config(config_path, self)
+        with timed('config'):
+            self.config['py3_config'] = process_config(config_path, self)
+
+        # power profiles adjust scheduling for AC/battery
+        power_profiles = self.config['py3_config']['py3status'].get(
+            'power_profiles')
+        if power_profiles:
+            self.power = PowerProfiles(power_profiles)
+
+        # thread pool for running module methods
+        if self.config['module_threads'] > 0:
+            self.executor = ThreadPool(self.config['module_threads'])
+
+        # shared timer so that module refreshes can be coalesced
+        if self.config['timer_slack'] > 0:
+            self.scheduler = Scheduler(self.config['timer_slack'])
+            self.scheduler.start()
 
         # setup i3status thread
         self.i3status_thread = I3status(self)
@@ -334,36 +474,40 @@ class Py3statusWrapper():
         # If standalone or no i3status modules then use the mock i3status
         # else start i3status thread.
         i3s_modules = self.config['py3_config']['i3s_modules']
-        if self.config['standalone'] or not i3s_modules:
-            self.i3status_thread.mock()
-            i3s_mode = 'mocked'
-        else:
-            i3s_mode = 'started'
-            self.i3status_thread.start()
-            while not self.i3status_thread.ready:
-                if not self.i3status_thread.is_alive():
-                    # i3status is having a bad day, so tell the user what went
-                    # wrong and do the best we can with just py3status modules.
-                    err = self.i3status_thread.error
-                    self.notify_user(err)
-                    self.i3status_thread.mock()
-                    i3s_mode = 'mocked'
-                    break
-                time.sleep(0.1)
+        with timed('i3status'):
+            if self.config['standalone'] or not i3s_modules:
+                self.i3status_thread.mock()
+                i3s_mode = 'mocked'
+            else:
+                i3s_mode = 'started'
+                self.i3status_thread.start()
+                while not self.i3status_thread.ready:
+                    if not self.i3status_thread.is_alive():
+                        # i3status is having a bad day, so tell the user what
+                        # went wrong and do the best we can with just
+                        # py3status modules.
+                        err = self.i3status_thread.error
+                        self.notify_user(err)
+                        self.i3status_thread.mock()
+                        i3s_mode = 'mocked'
+                        break
+                    time.sleep(0.1)
         if self.config['debug']:
             self.log('i3status thread {} with config {}'.format(
                 i3s_mode, self.config['py3_config']))
 
         # setup input events thread
-        self.events_thread = Events(self)
-        self.events_thread.start()
+        with timed('events'):
+            self.events_thread = Events(self)
+            self.events_thread.start()
         if self.config['debug']:
             self.log('events thread started')
 
         # initialise the command server
-        self.commands_thread = CommandServer(self)
-        self.commands_thread.daemon = True
-        self.commands_thread.start()
+        with timed('commands'):
+            self.commands_thread = CommandServer(self)
+            self.commands_thread.daemon = True
+            self.commands_thread.start()
         if self.config['debug']:
             self.log('commands thread started')
 
@@ -459,6 +603,7 @@ class Py3statusWrapper():
             # run kill() method on all py3status modules
             for module in self.modules.values():
                 module.kill()
+            self.glib_loop.stop()
         except:
             pass
 
@@ -736,6 +881,7 @@ class Py3statusWrapper():
         Process the output for a module and return a json string representing it.
         Color processing occurs here.
         """
+        data = []
         for output in outputs:
             # Color: substitute the config defined color
             if 'color' not in output:
@@ -745,9 +891,15 @@ class Py3statusWrapper():
                 ).strip()
                 color = self.mappings_color.get(module_name)
                 if color:
-                    output['color'] = color
+                    # module output is shared so we never change it here
+                    output = dict(output, color=color)
+            # Segments cache their json so unchanged output is not redumped
+            if isinstance(output, Segment):
+                data.append(output.to_json())
+            else:
+                data.append(dumps(output))
         # Create the json string output.
-        return ','.join([dumps(x) for x in outputs])
+        return ','.join(data)
 
     def i3bar_stop(self, signum, frame):
         self.i3bar_running = False
@@ -796,8 +948,17 @@ class Py3statusWrapper():
 
         # Some modules need to be prepared before they can run
         # eg run their post_config_hook
-        for module in self.modules.values():
-            module.prepare_module()
+        if self.config.get('parallel_hooks'):
+            threads = []
+            for module in self.modules.values():
+                thread = Thread(target=module.prepare_module)
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+        else:
+            for module in self.modules.values():
+                module.prepare_module()
 
         # modules can now receive updates
         self.py3_modules_initialized = True
@@ -806,6 +967,15 @@ class Py3statusWrapper():
         for module in self.modules.values():
             module.start_module()
 
+        # import any modules we have not loaded yet in the background
+        if self.lazy_modules:
+            loader = Thread(target=self.load_lazy_modules)
+            loader.daemon = True
+            loader.start()
+        else:
+            self.log_import_times()
+        first_output = True
+
         # this will be our output set to the correct length for the number of
         # items in the bar
         output = [None] * len(py3_config['order'])
@@ -827,7 +997,11 @@ class Py3statusWrapper():
             # sleep a bit to avoid killing the CPU
             # by doing this at the begining rather than the end
             # of the loop we ensure a smoother first render of the i3bar
-            time.sleep(0.1)
+            if self.power:
+                self.power.wakeup()
+                time.sleep(self.power.loop_interval())
+            else:
+                time.sleep(0.1)
 
             while not self.i3bar_running:
                 time.sleep(0.1)
@@ -857,8 +1031,10 @@ class Py3statusWrapper():
                 if interval == 0 or sec % interval == 0:
                     i3status_thread.update_times()
 
-            # check if an update is needed
-            if self.queue:
+            # check if an update is needed, if a batch of modules is being
+            # refreshed we wait so their output is sent as a single line
+            if self.queue and not (self.scheduler and
+                                   self.scheduler.batch_running):
                 while (len(self.queue)):
                     module_name = self.queue.popleft()
                     module = self.output_modules[module_name]
@@ -872,6 +1048,11 @@ class Py3statusWrapper():
                 # dump the line to stdout
                 print_line(',[{}]'.format(out))
 
+                if first_output:
+                    first_output = False
+                    self.startup_profile.output_started()
+                    self.dump_startup_report()
+
     def handle_cli_command(self, config):
         """Handle a command from the CLI.
         """
@@ -0,0 +1,209 @@
+from threading import RLock
+
+from py3status.subscription import Subscription as BaseSubscription
+
+DBUS_NAME = 'org.freedesktop.DBus'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+
+class Subscription(BaseSubscription):
+    """
+    A callback receiving a DBus signal.  Any number of these can share a
+    single subscription on the bus.
+    """
+
+    def __init__(self, pool, key, callback):
+        BaseSubscription.__init__(self, callback)
+        self.pool = pool
+        self.key = key
+
+    def _disconnect(self):
+        self.pool._unsubscribe(self)
+
+    unsubscribe = BaseSubscription.disconnect
+
+
+class DBusPool:
+    """
+    The DBus connections shared by all modules.
+
+    There is one session bus and one system bus connection.  Proxy objects
+    are cached and modules listening for the same signal share a single
+    match rule on the bus, the signal is then passed on to each of them.
+    Property snapshots are fetched with one GetAll call and then kept up to
+    date from PropertiesChanged signals rather than being read again.
+
+    pydbus is imported the first time a bus is needed.  Signals are
+    delivered by the shared GLib main loop, which is started when the
+    first signal is subscribed to.
+    """
+
+    def __init__(self, glib_loop):
+        self.glib_loop = glib_loop
+        self._buses = {}
+        self._lock = RLock()
+        self._properties = {}
+        self._proxies = {}
+        self._signals = {}
+
+    def bus(self, system=False):
+        """
+        Return the shared pydbus session or system bus.
+        """
+        with self._lock:
+            if system not in self._buses:
+                import pydbus
+                if system:
+                    self._buses[system] = pydbus.SystemBus()
+                else:
+                    self._buses[system] = pydbus.SessionBus()
+            return self._buses[system]
+
+    def get(self, bus_name, object_path=None, system=False):
+        """
+        Return a proxy for the object, created only the first time it is
+        asked for.
+        """
+        key = (system, bus_name, object_path)
+        with self._lock:
+            proxy = self._proxies.get(key)
+        if proxy is None:
+            # introspection is a blocking call so is made without the lock
+            proxy = self.bus(system).get(bus_name, object_path)
+            with self._lock:
+                proxy = self._proxies.setdefault(key, proxy)
+        return proxy
+
+    def subscribe(self, callback, sender=None, iface=None, signal=None,
+                  object_path=None, arg0=None, system=False, first=False):
+        """
+        Call callback(sender, object_path, iface, signal, params) whenever a
+        matching signal is received.  Returns a Subscription.
+
+        If first is True the callback is called before those of the other
+        subscriptions, so that property snapshots are up to date before
+        modules are told of a change.
+        """
+        key = (system, sender, iface, signal, object_path, arg0)
+        subscription = Subscription(self, key, callback)
+        with self._lock:
+            entry = self._signals.get(key)
+            if entry is None:
+                entry = {'callbacks': [], 'id': None}
+                self._signals[key] = entry
+                entry['id'] = self.bus(system).con.signal_subscribe(
+                    sender, iface, signal, object_path, arg0, 0,
+                    self._dispatcher(key),
+                )
+            if first:
+                entry['callbacks'].insert(0, subscription)
+            else:
+                entry['callbacks'].append(subscription)
+        self.glib_loop.start()
+        return subscription
+
+    def _dispatcher(self, key):
+        def dispatch(connection, sender, object_path, iface, signal, params):
+            with self._lock:
+                entry = self._signals.get(key)
+                if entry is None:
+                    return
+                subscriptions = list(entry['callbacks'])
+            params = params.unpack()
+            for subscription in subscriptions:
+                subscription.callback(
+                    sender, object_path, iface, signal, params
+                )
+        return dispatch
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            entry = self._signals.get(subscription.key)
+            if entry is None or subscription not in entry['callbacks']:
+                return
+            entry['callbacks'].remove(subscription)
+            if not entry['callbacks']:
+                del self._signals[subscription.key]
+                system = subscription.key[0]
+                self.bus(system).con.signal_unsubscribe(entry['id'])
+
+    def properties(self, bus_name, object_path, interface, system=False):
+        """
+        Return a dict of all the properties of interface.  They are fetched
+        once and then updated from PropertiesChanged signals.  If the owner
+        of bus_name changes they are fetched again.
+        """
+        key = (system, bus_name, object_path, interface)
+        with self._lock:
+            entry = self._properties.get(key)
+            if entry is None:
+                entry = {'generation': 0, 'values': None}
+                self._properties[key] = entry
+                # subscribe before fetching so that no change is missed
+                entry['subscriptions'] = [
+                    self.subscribe(
+                        self._properties_changed(key),
+                        sender=bus_name,
+                        iface=PROPERTIES_INTERFACE,
+                        signal='PropertiesChanged',
+                        object_path=object_path,
+                        arg0=interface,
+                        system=system,
+                        first=True,
+                    ),
+                    self.subscribe(
+                        self._owner_changed(key),
+                        sender=DBUS_NAME,
+                        iface=DBUS_NAME,
+                        signal='NameOwnerChanged',
+                        arg0=bus_name,
+                        system=system,
+                        first=True,
+                    ),
+                ]
+            values = entry['values']
+            generation = entry['generation']
+        if values is None:
+            proxy = self.get(bus_name, object_path, system)
+            values = proxy[PROPERTIES_INTERFACE].GetAll(interface)
+            with self._lock:
+                # if they changed while we were fetching them the next call
+                # fetches them again.
+                if entry['generation'] == generation:
+                    entry['values'] = values
+        return dict(values)
+
+    def _properties_changed(self, key):
+        def update(sender, object_path, iface, signal, params):
+            interface, changed, invalidated = params
+            with self._lock:
+                entry = self._properties.get(key)
+                if entry is None:
+                    return
+                if entry['values'] is None or invalidated:
+                    entry['generation'] += 1
+                    entry['values'] = None
+                else:
+                    entry['values'].update(changed)
+        return update
+
+    def _owner_changed(self, key):
+        def forget(sender, object_path, iface, signal, params):
+            with self._lock:
+                entry = self._properties.get(key)
+                if entry is not None:
+                    entry['generation'] += 1
+                    entry['values'] = None
+        return forget
+
+    def forget_properties(self, bus_name, object_path, interface,
+                          system=False):
+        """
+        Stop keeping the properties of interface up to date.
+        """
+        key = (system, bus_name, object_path, interface)
+        with self._lock:
+            entry = self._properties.pop(key, None)
+        if entry is not None:
+            for subscription in entry['subscriptions']:
+                subscription.disconnect()
@@ -0,0 +1,112 @@
+from threading import Event, Lock, Thread
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+
+class CallTimeout(Exception):
+    """
+    The call did not complete within its deadline.
+    """
+
+
+class Call:
+    """
+    A function call submitted to a ThreadPool.
+    """
+
+    def __init__(self, pool, fn, args):
+        self.args = args
+        self.fn = fn
+        self.pool = pool
+        self.timed_out = False
+        self._done = Event()
+        self._exception = None
+        self._result = None
+
+    def run(self):
+        try:
+            self._result = self.fn(*self.args)
+        except Exception as e:
+            self._exception = e
+        finally:
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the call to complete and return its result, any exception
+        it raised is reraised.  CallTimeout is raised if it has not completed
+        within timeout seconds, the call keeps running and its result can be
+        collected later.
+        """
+        self._done.wait(timeout)
+        if not self._done.is_set() and self.pool.stuck_call(self):
+            raise CallTimeout()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class ThreadPool:
+    """
+    Bounded pool of threads that module methods are run in.
+
+    A call that does not finish within its deadline keeps its thread, the
+    pool starts a replacement so that the others are not starved.  When the
+    stuck call eventually finishes its thread exits, so the pool returns to
+    its size.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.busy = 0
+        self.stuck = 0
+        self._lock = Lock()
+        self._queue = Queue()
+        for i in range(size):
+            self._start_worker()
+
+    def _start_worker(self):
+        thread = Thread(target=self._worker)
+        thread.daemon = True
+        thread.start()
+
+    def _worker(self):
+        while True:
+            call = self._queue.get()
+            with self._lock:
+                self.busy += 1
+            call.run()
+            with self._lock:
+                self.busy -= 1
+                if call.timed_out:
+                    # our replacement has taken over
+                    self.stuck -= 1
+                    return
+
+    def stuck_call(self, call):
+        """
+        Called when call has passed its deadline.  The thread running it is
+        replaced.  Returns False if the call has finished after all.
+        """
+        with self._lock:
+            if call.done():
+                return False
+            if not call.timed_out:
+                call.timed_out = True
+                self.stuck += 1
+                self._start_worker()
+            return True
+
+    def submit(self, fn, *args):
+        """
+        Run fn(*args) in the pool and return a Call for its result.
+        """
+        call = Call(self, fn, args)
+        self._queue.put(call)
+        return call
@@ -3,6 +3,7 @@ import re
 import sys
 
 from py3status.composite import Composite
+from py3status.segment import update_item
 
 try:
     from urllib.parse import parse_qsl
@@ -514,7 +515,9 @@ class Block:
             elif text:
                 if (not first and
                         (text.strip() == '' or out[-1].get('color') == color)):
-                    out[-1]['full_text'] += text
+                    out[-1] = update_item(
+                        out[-1], {'full_text': out[-1]['full_text'] + text}
+                    )
                 else:
                     part = {'full_text': text}
                     if color:
@@ -523,7 +526,9 @@ class Block:
                 text = u''
             if isinstance(item, Composite):
                 if color:
-                    item.composite_update(item, {'color': color}, soft=True)
+                    item = Composite.composite_update(
+                        item, {'color': color}, soft=True
+                    )
                 out.extend(item.get_content())
             elif isinstance(item, Block):
                 # if this is a block then likely it is soft.
@@ -552,14 +557,19 @@ class Block:
         min_length = self.commands.min_length
 
         if max_length or min_length:
-            for item in out:
+            for index, item in enumerate(out):
                 if max_length is not None:
-                    item['full_text'] = item['full_text'][:max_length]
+                    item = update_item(
+                        item, {'full_text': item['full_text'][:max_length]}
+                    )
+                    out[index] = item
                     max_length -= len(item['full_text'])
                 if min_length:
                     min_length -= len(item['full_text'])
             if min_length > 0:
-                out[0]['full_text'] = u' ' * min_length + out[0]['full_text']
+                out[0] = update_item(
+                    out[0], {'full_text': u' ' * min_length + out[0]['full_text']}
+                )
                 min_length = 0
 
         return valid, out
@@ -0,0 +1,45 @@
+from threading import Lock, Thread
+
+
+class GLibLoop:
+    """
+    A single GLib main loop shared by all modules that listen for DBus
+    signals.
+
+    pydbus delivers signals from the default GLib main context, so one loop
+    running that context in its own thread serves every module.  Modules
+    should not run a main loop of their own.  The loop is started the first
+    time a module asks for it so that GLib is only imported if needed.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self._lock = Lock()
+
+    def start(self):
+        """
+        Start the main loop if it is not already running.
+        """
+        with self._lock:
+            if self.thread is not None:
+                return
+            from gi.repository import GLib
+            self.loop = GLib.MainLoop()
+            self.thread = Thread(target=self.loop.run)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self, timeout=1):
+        """
+        Stop the main loop if it is running.  It can be started again.
+        """
+        with self._lock:
+            if self.thread is None:
+                return
+            from gi.repository import GLib
+            # quitting from the loop works even if it has not started yet
+            GLib.idle_add(self.loop.quit)
+            self.thread.join(timeout)
+            self.loop = None
+            self.thread = None
@@ -6,12 +6,27 @@ from threading import Thread, Timer
 from collections import OrderedDict
 from time import time
 
+from py3status.adaptive import AdaptiveInterval, MAX_INTERVAL
 from py3status.composite import Composite
+from py3status.executor import CallTimeout
 from py3status.py3 import Py3, PY3_CACHE_FOREVER, ModuleErrorException
 from py3status.profiling import profile
+from py3status.sandbox import SandboxProxy
+from py3status.segment import Segment, freeze, remove_key, update_item
+from py3status.subscription import Subscriptions
 from py3status.formatter import Formatter
 
 
+def is_coroutine_function(fn):
+    """
+    Return True if fn is an `async def` function or method.  inspect is used
+    rather than asyncio which is only imported once a module needs it.
+    """
+    # python 2 has no coroutines
+    check = getattr(inspect, 'iscoroutinefunction', None)
+    return check is not None and check(fn)
+
+
 class Module(Thread):
     """
     This class represents a user module (imported file).
@@ -22,24 +37,32 @@ class Module(Thread):
     PARAMS_NEW = 'new'
     PARAMS_LEGACY = 'legacy'
 
-    def __init__(self, module, user_modules, py3_wrapper):
+    def __init__(self, module, user_modules, py3_wrapper, lazy=False):
         """
         We need quite some stuff to occupy ourselves don't we ?
+
+        If lazy is True the module is not imported until load() is called,
+        until then a placeholder is shown in the bar.
         """
         Thread.__init__(self)
 
+        self.adaptive_refresh = None
         self.allow_config_clicks = True
         self.allow_urgent = None
+        self.async_tasks = set()
         self.cache_time = None
         self.click_events = False
         self.config = py3_wrapper.config
         self.disabled = False
         self.error_messages = None
         self.error_hide = False
+        self.fingerprints = None
         self.has_post_config_hook = False
         self.has_kill = False
         self.i3status_thread = py3_wrapper.i3status_thread
+        self.import_time = None
         self.last_output = []
+        self.loaded = False
         self.lock = py3_wrapper.lock
         self.methods = OrderedDict()
         self.module_class = None
@@ -47,12 +70,19 @@ class Module(Thread):
         self.module_inst = ''.join(module.split(' ')[1:])
         self.module_name = module.split(' ')[0]
         self.new_update = False
+        self.method_timeout = None
         self.nagged = False
+        self.pending_calls = {}
         self.prevent_refresh = False
+        self.refresh_interval = None
+        self.skipped_update_count = 0
         self.sleeping = False
+        self.subscriptions = Subscriptions()
         self.terminated = False
         self.timer = None
+        self.update_count = 0
         self.urgent = False
+        self.user_modules = user_modules
 
         # create a nice name for the module that matches what the module is
         # called in the user config
@@ -67,30 +97,10 @@ class Module(Thread):
         #
         self.set_module_options(module)
 
-        try:
-            self.load_methods(module, user_modules)
-        except Exception as e:
-            # Import failed notify user in module error output
-            self.disabled = True
-            self.methods['error'] = {}
-            self.error_index = 0
-            self.error_messages = [
-                self.module_nice_name,
-                u'{}: Import Error, {}'.format(self.module_nice_name, str(e)),
-            ]
-            self.error_output(self.error_messages[0])
-            # log the error
-            msg = 'Module `{}` could not be loaded'.format(
-                self.module_full_name
-            )
-            if isinstance(e, SyntaxError):
-                # provide full traceback
-                self._py3_wrapper.report_exception(msg, notify_user=False)
-            else:
-                # module import error we can just report the module that cannot
-                # be imported
-                self._py3_wrapper.log(msg)
-                self._py3_wrapper.log(str(e))
+        if lazy:
+            self.placeholder_output()
+        else:
+            self.load()
 
     def __repr__(self):
         return '<Module {}>'.format(self.module_full_name)
@@ -123,6 +133,52 @@ class Module(Thread):
         class_inst = py_mod.Py3status()
         return class_inst
 
+    def load(self):
+        """
+        Import the module and find its methods.
+        """
+        start = time()
+        try:
+            with self._py3_wrapper.startup_profile.timed(
+                    'import', self.module_full_name):
+                self.load_methods(self.module_full_name, self.user_modules)
+        except Exception as e:
+            # Import failed notify user in module error output
+            self.disabled = True
+            self.methods['error'] = {}
+            self.error_index = 0
+            self.error_messages = [
+                self.module_nice_name,
+                u'{}: Import Error, {}'.format(self.module_nice_name, str(e)),
+            ]
+            self.error_output(self.error_messages[0])
+            # log the error
+            msg = 'Module `{}` could not be loaded'.format(
+                self.module_full_name
+            )
+            if isinstance(e, SyntaxError):
+                # provide full traceback
+                self._py3_wrapper.report_exception(msg, notify_user=False)
+            else:
+                # module import error we can just report the module that cannot
+                # be imported
+                self._py3_wrapper.log(msg)
+                self._py3_wrapper.log(str(e))
+        finally:
+            self.import_time = time() - start
+            self.loaded = True
+
+    def placeholder_output(self):
+        """
+        Show a placeholder in the bar until the module has been loaded.
+        """
+        self.last_output = [{
+            'full_text': self.module_nice_name,
+            'instance': self.module_inst,
+            'name': self.module_name,
+        }]
+        self._py3_wrapper.notify_update(self.module_full_name)
+
     def prepare_module(self):
         """
         Ready the module to get it ready to start.
@@ -133,7 +189,9 @@ class Module(Thread):
         # perform any necessary setup.
         if self.has_post_config_hook:
             try:
-                self.module_class.post_config_hook()
+                with self._py3_wrapper.startup_profile.timed(
+                        'post_config_hook', self.module_full_name):
+                    self.call(self.module_class.post_config_hook)
             except Exception as e:
                 # An exception has been thrown in post_config_hook() disable
                 # the module and show error in module output
@@ -193,7 +251,7 @@ class Module(Thread):
             if method_affected and method['method'] != method_affected:
                 continue
 
-            method['last_output'] = [error]
+            self.set_method_output(method, [error])
 
         self.allow_config_clicks = False
         self.set_updated()
@@ -203,7 +261,7 @@ class Module(Thread):
         hide the module in the i3bar
         """
         for method in self.methods.values():
-            method['last_output'] = {}
+            self.set_method_output(method, {})
 
         self.allow_config_clicks = False
         self.error_hide = True
@@ -213,7 +271,7 @@ class Module(Thread):
         """
         Start the module running.
         """
-        if not (self.disabled or self.terminated):
+        if self.loaded and not (self.disabled or self.terminated):
             # Start the module and call its output method(s)
             self._py3_wrapper.log('starting module %s' % self.module_full_name)
             self.start()
@@ -222,7 +280,7 @@ class Module(Thread):
         """
         Forces an update of the module.
         """
-        if self.disabled or self.terminated:
+        if self.disabled or self.terminated or not self.loaded:
             return
         # clear cached_until for each method to allow update
         for meth in self.methods:
@@ -230,17 +288,37 @@ class Module(Thread):
             if self.config['debug']:
                 self._py3_wrapper.log('clearing cache for method {}'.format(meth))
         # cancel any existing timer
-        if self.timer:
-            self.timer.cancel()
-        # get the thread to update itself
+        self.cancel_timer()
+        # get the thread to update itself, this is not coalesced with other
+        # modules as the user is waiting.
         self.timer = Timer(0, self.run)
         self.timer.start()
 
+    def schedule(self, delay):
+        """
+        Run the module again in delay seconds.
+        """
+        scheduler = self._py3_wrapper.scheduler
+        if scheduler:
+            scheduler.schedule(self, delay)
+        else:
+            self.timer = Timer(delay, self.run)
+            self.timer.start()
+
+    def cancel_timer(self):
+        """
+        Cancel any scheduled run of the module.
+        """
+        if self.timer:
+            self.timer.cancel()
+        scheduler = self._py3_wrapper.scheduler
+        if scheduler:
+            scheduler.cancel(self)
+
     def sleep(self):
         self.sleeping = True
         # cancel any existing timer
-        if self.timer:
-            self.timer.cancel()
+        self.cancel_timer()
 
     def disable_module(self):
         # hide message
@@ -261,9 +339,62 @@ class Module(Thread):
         if self.cache_time == PY3_CACHE_FOREVER:
             return
         # restart
-        delay = max(self.cache_time - time(), 0)
-        self.timer = Timer(delay, self.run)
-        self.timer.start()
+        self.schedule(max(self.cache_time - time(), 0))
+
+    def call(self, method, *args):
+        """
+        Call a method of the module, `async def` methods are run to
+        completion on the shared asyncio loop.
+        """
+        if is_coroutine_function(method):
+            async_loop = self.module_class.py3._get_async_loop()
+            return async_loop.submit(method, *args).result()
+        return method(*args)
+
+    def call_method(self, name, method, *args):
+        """
+        Call a method of the module.  If py3status has a thread pool the call
+        is run there and given method_timeout seconds to complete, by default
+        the module's cache_timeout.  A call that takes longer is reported as
+        an error but left running, its result is used when the module next
+        runs.  `async def` methods are run on the shared asyncio loop in the
+        same way.
+        """
+        if is_coroutine_function(method):
+            executor = self.module_class.py3._get_async_loop()
+        else:
+            executor = self._py3_wrapper.executor
+        if not executor:
+            return method(*args)
+        call = self.pending_calls.pop(name, None)
+        if call is None:
+            call = executor.submit(method, *args)
+        timeout = self.method_timeout
+        if timeout is None:
+            # a hung method must not hold its pool thread forever
+            timeout = getattr(self.module_class, 'cache_timeout',
+                              self.config['cache_timeout'])
+        try:
+            return call.result(timeout)
+        except CallTimeout:
+            self.pending_calls[name] = call
+            raise ModuleErrorException(
+                'timed out after {}s'.format(timeout), None
+            )
+
+    def set_method_output(self, method, output):
+        """
+        Store the output of a method, frozen so that containers can share it,
+        along with a fingerprint of its content.
+        """
+        if isinstance(output, list):
+            output = [freeze(x) for x in output]
+            fingerprint = tuple(x.to_json() for x in output)
+        else:
+            output = freeze(output)
+            fingerprint = output.to_json()
+        method['last_output'] = output
+        method['fingerprint'] = fingerprint
 
     def set_updated(self):
         """
@@ -271,6 +402,14 @@ class Module(Thread):
         We check if the actual content has changed and if so we trigger an
         update in py3status.
         """
+        # if no method output has changed there is nothing to do
+        fingerprints = [
+            method['fingerprint'] for method in self.methods.values()
+        ]
+        if fingerprints == self.fingerprints:
+            self.skipped_update_count += 1
+            return
+        self.fingerprints = fingerprints
         # get latest output
         output = []
         for method in self.methods.values():
@@ -283,6 +422,7 @@ class Module(Thread):
                     output.append(data)
         # if changed store and force display update.
         if output != self.last_output:
+            self.update_count += 1
             # has the modules output become urgent?
             # we only care the update that this happens
             # not any after then.
@@ -364,7 +504,7 @@ class Module(Thread):
             err = 'conflicting "full_text" and "composite" in response'
             raise Exception(err)
         # set universal options on last component
-        composite[-1].update(self.module_options)
+        composite[-1] = update_item(composite[-1], self.module_options)
         # calculate any min width (we split this across components)
         min_width = None
         if 'min_width' in self.module_options:
@@ -377,43 +517,47 @@ class Module(Thread):
         # update all components
         color = response.get('color')
         urgent = response.get('urgent')
-        for index, item in enumerate(response['composite']):
+        # items may be shared Segments so changes are collected and applied
+        # via update_item() rather than by changing the item directly.
+        for index, item in enumerate(composite):
             # validate the response
             if 'full_text' not in item:
                 raise KeyError('missing "full_text" key in response')
+            updates = {}
             # make sure all components have a name
             if 'name' not in item:
                 instance_index = item.get('index', index)
-                item['instance'] = '{} {}'.format(
+                updates['instance'] = '{} {}'.format(
                     self.module_inst, instance_index
                 )
-                item['name'] = self.module_name
+                updates['name'] = self.module_name
             # hide separator for all inner components unless existing
-            if index != len(response['composite']) - 1:
+            if index != len(composite) - 1:
                 if 'separator' not in item:
-                    item['separator'] = False
-                    item['separator_block_width'] = 0
+                    updates['separator'] = False
+                    updates['separator_block_width'] = 0
             # set min width
             if min_width:
-                item['min_width'] = min_width
+                updates['min_width'] = min_width
             # set align
             if align:
-                item['align'] = align
+                updates['align'] = align
             # If a color was supplied for the composite and a composite
             # part does not supply a color, use the composite color.
             if color and 'color' not in item:
-                item['color'] = color
+                updates['color'] = color
+            # if urgent we want to set this to all parts
+            if self.allow_urgent and urgent and 'urgent' not in item:
+                updates['urgent'] = urgent
+            if updates:
+                item = update_item(item, updates)
             # Remove any none color from our output
             if hasattr(item.get('color'), 'none_setting'):
-                del item['color']
-
+                item = remove_key(item, 'color')
             # remove urgent if not allowed
             if not self.allow_urgent:
-                if 'urgent' in item:
-                    del item['urgent']
-            # if urgent we want to set this to all parts
-            elif urgent and 'urgent' not in item:
-                item['urgent'] = urgent
+                item = remove_key(item, 'urgent')
+            composite[index] = item
 
     def _params_type(self, method_name, instance):
         """
@@ -447,6 +591,38 @@ class Module(Thread):
         else:
             return self.PARAMS_LEGACY
 
+    def sandboxed(self, module):
+        """
+        Should the user module be run in a sandbox process.
+        """
+        param = self._py3_wrapper.get_config_attribute(module, 'sandbox')
+        return param is True
+
+    def load_sandboxed(self, filepath):
+        """
+        Start the user module in a sandbox process and return a proxy for it.
+        """
+        fn = self._py3_wrapper.get_config_attribute
+        limits = {}
+        for param, name in [
+                ('sandbox_max_rss', 'max_rss'),
+                ('sandbox_max_cpu', 'max_cpu'),
+                ('sandbox_timeout', 'timeout')]:
+            value = fn(self.module_full_name, param)
+            if not hasattr(value, 'none_setting'):
+                limits[name] = value
+        if 'max_rss' in limits:
+            # configured in MB
+            limits['max_rss'] *= 1024 * 1024
+        # the sandbox Py3 helper gets its config settings from this
+        py3_config = self.config['py3_config']
+        config = {}
+        for section in ['general', 'py3status', self.module_full_name]:
+            for key, value in py3_config.get(section, {}).items():
+                if not key.startswith('.'):
+                    config[key] = value
+        return SandboxProxy(filepath, config, self._py3_wrapper, **limits)
+
     def load_methods(self, module, user_modules):
         """
         Read the given user-written py3status class file and store its methods.
@@ -462,7 +638,10 @@ class Module(Thread):
             self._py3_wrapper.log(
                 'loading module "{}" from {}{}'.format(module, include_path,
                                                        f_name))
-            class_inst = self.load_from_file(include_path + f_name)
+            if self.sandboxed(module):
+                class_inst = self.load_sandboxed(include_path + f_name)
+            else:
+                class_inst = self.load_from_file(include_path + f_name)
         # load from py3status provided modules
         else:
             self._py3_wrapper.log(
@@ -624,6 +803,30 @@ class Module(Thread):
                 param = True
             self.allow_urgent = param
 
+            # method_timeout
+            # how long a method may run for when using the thread pool.
+            param = fn(self.module_full_name, 'method_timeout')
+            if not hasattr(param, 'none_setting'):
+                self.method_timeout = param
+
+            # adaptive_refresh
+            # opt-in, the refresh interval follows how often the output of
+            # the module changes.
+            param = fn(self.module_full_name, 'adaptive_refresh')
+            if param is True:
+                minimum = fn(self.module_full_name, 'adaptive_min_interval')
+                if hasattr(minimum, 'none_setting'):
+                    # never more often than the module's cache_timeout
+                    minimum = None
+                maximum = fn(self.module_full_name, 'adaptive_max_interval')
+                if hasattr(maximum, 'none_setting'):
+                    maximum = MAX_INTERVAL
+                interval = getattr(class_inst, 'cache_timeout',
+                                   self.config['cache_timeout'])
+                self.adaptive_refresh = AdaptiveInterval(
+                    interval, minimum, maximum
+                )
+
             # get the available methods for execution
             for method in sorted(dir(class_inst)):
                 if method.startswith('_'):
@@ -645,13 +848,13 @@ class Module(Thread):
                                 'cached_until': time(),
                                 'call_type': params_type,
                                 'instance': None,
-                                'last_output': {
-                                    'name': method,
-                                    'full_text': ''
-                                },
                                 'method': method,
                                 'name': None
                             }
+                            self.set_method_output(method_obj, {
+                                'name': method,
+                                'full_text': ''
+                            })
                             self.methods[method] = method_obj
 
         # done, log some debug info
@@ -687,7 +890,7 @@ class Module(Thread):
                 click_method = getattr(self.module_class, 'on_click')
                 if self.click_events == self.PARAMS_NEW:
                     # new style modules
-                    click_method(event)
+                    self.call(click_method, event)
                 else:
                     # legacy modules had extra parameters passed
                     click_method(self.i3status_thread.json_list,
@@ -709,11 +912,24 @@ class Module(Thread):
         We will execute the 'kill' method of the module when we terminate.
         """
         # cancel any existing timer
-        if self.timer:
-            self.timer.cancel()
+        self.cancel_timer()
+
+        power = self._py3_wrapper.power
+        if power:
+            power.wakeup()
+            # suspended modules keep their last output, we check again
+            # later as the power state may have changed.
+            if power.is_suspended(self.module_name):
+                if not self.sleeping:
+                    self.schedule(power.max_age)
+                return
 
         if self.lock.is_set():
             cache_time = None
+            # methods run on their default schedule, these can be adapted
+            adaptable = []
+            can_adapt = self.adaptive_refresh is not None
+            fingerprints = self.fingerprints
             # execute each method of this module
             for meth, obj in self.methods.items():
                 my_method = self.methods[meth]
@@ -733,10 +949,11 @@ class Module(Thread):
                     method = getattr(self.module_class, meth)
                     if my_method['call_type'] == self.PARAMS_NEW:
                         # new style modules
-                        response = method()
+                        response = self.call_method(meth, method)
                     else:
                         # legacy modules had parameters passed
-                        response = method(
+                        response = self.call_method(
+                            meth, method,
                             self.i3status_thread.json_list,
                             self.config['py3_config']['general'])
 
@@ -767,8 +984,6 @@ class Module(Thread):
                         # remove urgent if not allowed
                         if not self.allow_urgent and 'urgent' in result:
                             del result['urgent']
-                        # set universal module options in result
-                        result.update(self.module_options)
 
                     result['instance'] = self.module_inst
                     result['name'] = self.module_name
@@ -789,15 +1004,27 @@ class Module(Thread):
                     else:
                         # get module default cached_until
                         cached_until = self.module_class.py3.time_in()
+                    # an explicit cached_until or sync_to is respected
+                    py3 = self.module_class.py3
+                    if cached_until == getattr(py3, '_default_time_in', None):
+                        adaptable.append(my_method)
+                        cached_until = time() + self.adjust_interval(
+                            cached_until - time()
+                        )
+                    else:
+                        can_adapt = False
                     my_method['cached_until'] = cached_until
                     if not cache_time or cached_until < cache_time:
                         cache_time = cached_until
 
                     # update method object output
                     if 'composite' in response:
-                        my_method['last_output'] = result['composite']
+                        self.set_method_output(my_method, result['composite'])
                     else:
-                        my_method['last_output'] = result
+                        # set universal module options in result
+                        self.set_method_output(
+                            my_method, Segment(result, **self.module_options)
+                        )
 
                     # mark module as updated
                     self.set_updated()
@@ -812,6 +1039,7 @@ class Module(Thread):
                     self.error_messages = None
                     self.error_hide = False
                 except ModuleErrorException as e:
+                    can_adapt = False
                     # module has indicated that it has an error
                     self.runtime_error(e.msg, meth)
                     if e.timeout:
@@ -820,22 +1048,38 @@ class Module(Thread):
                         else:
                             cache_time = time() + e.timeout
                     else:
-                        cache_time = time() + getattr(self.module_class,
-                                                      'cache_timeout',
-                                                      self.config['cache_timeout'])
+                        cache_time = time() + self.adjust_interval(
+                            getattr(self.module_class, 'cache_timeout',
+                                    self.config['cache_timeout'])
+                        )
 
                 except Exception as e:
+                    can_adapt = False
                     msg = 'Instance `{}`, user method `{}` failed'
                     msg = msg.format(self.module_full_name, meth)
                     self._py3_wrapper.report_exception(msg, notify_user=False)
                     # added error
                     self.runtime_error(str(e) or e.__class__.__name__, meth)
-                    cache_time = time() + getattr(self.module_class,
-                                                  'cache_timeout',
-                                                  self.config['cache_timeout'])
+                    cache_time = time() + self.adjust_interval(
+                        getattr(self.module_class, 'cache_timeout',
+                                self.config['cache_timeout'])
+                    )
+
+            if can_adapt and adaptable:
+                changed = self.fingerprints != fingerprints
+                cached_until = time() + self.adjust_interval(
+                    self.adaptive_refresh.update(changed)
+                )
+                for my_method in adaptable:
+                    my_method['cached_until'] = cached_until
+                cache_time = min(
+                    method['cached_until'] for method in self.methods.values()
+                )
 
             if cache_time is None:
-                cache_time = time() + self.config['cache_timeout']
+                cache_time = time() + self.adjust_interval(
+                    self.config['cache_timeout']
+                )
             self.cache_time = cache_time
             # new style modules can signal they want to cache forever
             if cache_time == PY3_CACHE_FOREVER:
@@ -843,21 +1087,29 @@ class Module(Thread):
             # don't be hasty mate
             # set timer to do update next time one is needed
             if not self.sleeping:
-                delay = max(cache_time - time(),
-                            self.config['minimum_interval'])
-                self.timer = Timer(delay, self.run)
-                self.timer.start()
+                delay = max(cache_time - time(), self.config['minimum_interval'])
+                self.refresh_interval = delay
+                self.schedule(delay)
+
+    def adjust_interval(self, interval):
+        """
+        Lengthen the module's own refresh interval if the power profile asks
+        for it.
+        """
+        power = self._py3_wrapper.power
+        if power:
+            return power.adjust_interval(interval)
+        return interval
 
     def kill(self):
         # stop timer if exists
-        if self.timer:
-            self.timer.cancel()
+        self.cancel_timer()
         # check and execute the 'kill' method if present
         if self.has_kill:
             try:
                 kill_method = getattr(self.module_class, 'kill')
                 if self.has_kill == self.PARAMS_NEW:
-                    kill_method()
+                    self.call(kill_method)
                 else:
                     # legacy call parameters
                     kill_method(self.i3status_thread.json_list,
@@ -865,3 +1117,12 @@ class Module(Thread):
             except Exception:
                 # this would be stupid to die on exit
                 pass
+        # stop any background tasks the module started on the asyncio loop
+        for task in list(self.async_tasks):
+            task.cancel()
+        # disconnect it from any DBus signals or network changes and cancel
+        # its timers
+        self.subscriptions.disconnect_all()
+        # the kill method runs in the sandbox so stop it afterwards
+        if isinstance(self.module_class, SandboxProxy):
+            self.module_class.close()
@@ -11,7 +11,6 @@ Configuration parameters:
         Can be found here` https://console.aws.amazon.com/billing/home#/account
         (default '')
     aws_secret_access_key: Your AWS secret key (default '')
-    billing_file: Csv file location (default '/tmp/.aws_billing.csv')
     cache_timeout: How often we refresh this module in seconds (default 3600)
     format: string that formats the output. See placeholders below.
         (default '{bill_amount}$')
@@ -40,8 +39,12 @@ import boto
 import csv
 import datetime
 
+from boto.exception import S3ResponseError
 from boto.s3.connection import Key
 
+# size of the chunks the billing file is read in
+CHUNK_SIZE = 65536
+
 
 class Py3status:
     """
@@ -50,54 +53,124 @@ class Py3status:
     aws_access_key_id = ''
     aws_account_id = ''
     aws_secret_access_key = ''
-    billing_file = '/tmp/.aws_billing.csv'
     cache_timeout = 3600
     format = '{bill_amount}$'
     s3_bucket_name = ''
 
+    class Meta:
+        deprecated = {
+            'remove': [
+                {
+                    'param': 'billing_file',
+                    'msg': 'obsolete the billing file is no longer saved',
+                },
+            ],
+        }
+
+    def post_config_hook(self):
+        self._bill_amount = None
+        self._bucket = None
+        self._etag = None
+        self._last_modified = None
+        self._s3_file_key = None
+
+    def _connect(self):
+        return boto.connect_s3(self.aws_access_key_id,
+                               self.aws_secret_access_key)
+
+    def _lines(self, key):
+        """
+        Yield the lines of the billing file as it is downloaded.
+        """
+        buffer = b''
+        while True:
+            chunk = key.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            lines = (buffer + chunk).split(b'\n')
+            buffer = lines.pop()
+            for line in lines:
+                yield line
+        if buffer:
+            yield buffer
+
+    def _find_invoice_total(self, key):
+        """
+        Return the InvoiceTotal amount from the billing file, only the line
+        containing it is parsed.
+        """
+        for line in self._lines(key):
+            if b'InvoiceTotal' not in line:
+                continue
+            line = line.decode('utf-8').strip()
+            if self.py3.is_python_2():
+                line = line.encode('utf-8')
+            for row in csv.reader([line]):
+                return row[-1]
+        return False
+
     def _get_bill_amount(self):
         # Billing file name, generated by Amazon itself
         # Format : 123456789012-aws-billing-csv-yyyy-mm.csv
         s3_file_key = '{}-aws-billing-csv-{}-{}.csv'.format(
             self.aws_account_id, datetime.datetime.now().strftime('%Y'),
             datetime.datetime.now().strftime('%m'))
-        i = 0
-
-        # Connection to s3 service
+        # a new month means a new billing file
+        if s3_file_key != self._s3_file_key:
+            self._bill_amount = None
+            self._etag = None
+            self._last_modified = None
+            self._s3_file_key = s3_file_key
+
+        # The connection is kept between refreshes
+        if self._bucket is None:
+            # Connection to s3 service
+            try:
+                conn = self._connect()
+            except:
+                return 'conn_error'
+
+            # Connection to the bucket
+            try:
+                self._bucket = conn.get_bucket(self.s3_bucket_name)
+            except:
+                return 'bucket_error'
+
+        # Only download the billing file if it has changed since we last
+        # read it
+        headers = {}
+        if self._bill_amount is not None:
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
+        k = Key(self._bucket)
+        k.key = s3_file_key
         try:
-            conn = boto.connect_s3(self.aws_access_key_id,
-                                   self.aws_secret_access_key)
-        except:
-            return 'conn_error'
-
-        # Connection to the bucket
-        try:
-            bucket = conn.get_bucket(self.s3_bucket_name)
-        except:
-            return 'bucket_error'
-
-        # Fetch the objects keys and get the billing file
-        try:
-            k = Key(bucket)
-            k.key = s3_file_key
-            k.get_contents_to_filename(self.billing_file)
-            k.close
+            k.open_read(headers=headers)
+        except S3ResponseError as e:
+            if e.status == 304:
+                return self._bill_amount
+            return 'key_error'
         except:
+            # drop the connection so we start afresh next time
+            self._bucket = None
             return 'key_error'
 
-        # Parse the file and get the InvoiceTotal amount
+        # Parse the file as it downloads and get the InvoiceTotal amount
         try:
-            with open(self.billing_file, 'rb') as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if ''.join(row).find('InvoiceTotal') == -1:
-                        continue
-                    i = i + 1
-                    return row[-1]
+            bill_amount = self._find_invoice_total(k)
         except:
-            return 'csv_error'
-
-        return False
+            bill_amount = 'csv_error'
+        finally:
+            # we may not have read it all, do not reuse the connection
+            k.close(fast=True)
+
+        if bill_amount not in ('csv_error', False):
+            self._bill_amount = bill_amount
+            self._etag = k.etag
+            self._last_modified = k.last_modified
+        return bill_amount
 
     def aws_bill(self):
         response = {
@@ -19,6 +19,9 @@ Color options:
     color_bad: No connection
     color_good: Active connection
 
+Requires:
+    pydbus: python library module
+
 @author jmdana <https://github.com/jmdana>
 @license GPLv3 <http://www.gnu.org/licenses/gpl-3.0.txt>
 
@@ -29,18 +32,15 @@ off
 {'color': '#FF0000', 'full_text': u'BT'}
 """
 
-import dbus
+from gi.repository.GLib import GError
 
 DEFAULT_FORMAT = 'BT[: {format_device}]'
 STRING_NOT_STARTED = "service isn't running"
 
 
-def get_connected_devices():
-    bus = dbus.SystemBus()
-    manager = dbus.Interface(
-        bus.get_object("org.bluez", "/"),
-        "org.freedesktop.DBus.ObjectManager"
-    )
+def get_connected_devices(py3):
+    # the proxy is cached on the system bus connection py3status shares
+    manager = py3.dbus_get("org.bluez", "/", system_bus=True)
 
     objects = manager.GetManagedObjects()
     devices = []
@@ -125,8 +125,8 @@ class Py3status:
 
     def bluetooth(self):
         try:
-            devices = get_connected_devices()
-        except dbus.DBusException:
+            devices = get_connected_devices(self.py3)
+        except GError:
             self.py3.error(STRING_NOT_STARTED)
 
         if devices:
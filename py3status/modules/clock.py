@@ -99,6 +99,10 @@ from time import time
 import pytz
 import tzlocal
 
+DAY = 24 * 60 * 60
+# days to look ahead for the next DST transition of a zone
+TRANSITION_HORIZON = 366
+
 CLOCK_BLOCKS = u'🕛🕧🕐🕜🕑🕝🕒🕞🕓🕟🕔🕠🕕🕡🕖🕢🕗🕣🕘🕤🕙🕥🕚🕦'
 
 
@@ -136,6 +140,22 @@ class Py3status:
 
         self.multiple_tz = len(self._items) > 1
 
+        # names used in format_time for each timezone
+        self._names = {}
+        for name, zone in self._items.items():
+            if zone == '?':
+                continue
+            timezone = getattr(zone, 'zone', None) or str(zone)
+            tzname = timezone.split('/')[-1].replace('_', ' ')
+            self._names[name] = (timezone, tzname)
+
+        # caches so we only do work when the output can have changed
+        self._offsets = {}
+        self._templates = {}
+        self._rendered = {}
+        self._last_times = None
+        self._last_output = None
+
         if not isinstance(self.format_time, list):
             self.format_time = [self.format_time]
 
@@ -167,6 +187,10 @@ class Py3status:
                 time_delta = 60
             self.time_deltas.append(time_delta)
 
+        self._uses_icon = [
+            self.py3.format_contains(x, 'icon') for x in self.format_time
+        ]
+
         self.active_time_format = 0
 
         self._cycle_time = time() + self.cycle
@@ -200,6 +224,139 @@ class Py3status:
             return '?'
         return zone
 
+    def _get_offset(self, name, zone, now):
+        """
+        Return the tzinfo and UTC offset of the zone at time now.  These only
+        change at DST transitions so we cache them until the next one.
+        """
+        try:
+            valid_until, tzinfo, offset = self._offsets[name]
+            if now < valid_until:
+                return tzinfo, offset
+        except KeyError:
+            pass
+
+        t = datetime.fromtimestamp(now, zone)
+        tzinfo = t.tzinfo
+        offset = t.utcoffset()
+        if isinstance(zone, pytz.tzinfo.StaticTzInfo) or zone is pytz.utc:
+            # fixed offset
+            valid_until = float('inf')
+        else:
+            valid_until = self._next_transition(
+                zone, now, (offset, t.tzname()))
+        self._offsets[name] = (valid_until, tzinfo, offset)
+        return tzinfo, offset
+
+    def _next_transition(self, zone, now, current):
+        """
+        Return the time the zone next changes its UTC offset or name from
+        current.  We look a day at a time and then narrow it down to the
+        second.  If there is no transition within TRANSITION_HORIZON days we
+        return the end of it, so the zone is checked again then.
+        """
+        def state(when):
+            t = datetime.fromtimestamp(when, zone)
+            return t.utcoffset(), t.tzname()
+
+        start = int(now)
+        low = start
+        for day in range(1, TRANSITION_HORIZON + 1):
+            high = start + day * DAY
+            if state(high) != current:
+                break
+            low = high
+        else:
+            return high
+        # the zone changes after low and by high
+        while high - low > 1:
+            middle = (low + high) // 2
+            if state(middle) == current:
+                low = middle
+            else:
+                high = middle
+        return high
+
+    def _get_template(self, name, format_index, icon):
+        """
+        Return the format_time for the zone with its placeholders filled in.
+        This is a string or Composite still containing the strftime
+        directives.
+        """
+        key = (name, format_index, icon)
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+        timezone, tzname = self._names[name]
+
+        if self.multiple_tz:
+            name_unclear = tzname
+            timezone_unclear = timezone
+        else:
+            name_unclear = ''
+            timezone_unclear = ''
+
+        template = self.py3.safe_format(
+            self.format_time[format_index],
+            dict(
+                icon=icon,
+                name=tzname,
+                name_unclear=name_unclear,
+                timezone=timezone,
+                timezone_unclear=timezone_unclear,
+            ))
+        if self.py3.is_python_2() and not self.py3.is_composite(template):
+            template = template.encode('utf-8')
+        self._templates[key] = template
+        return template
+
+    def _render(self, name, zone, now):
+        """
+        Render the time for the zone.  The result is cached for the period
+        that the active format_time displays.
+        """
+        format_index = self.active_time_format
+        tzinfo, offset = self._get_offset(name, zone, now)
+        t = datetime.utcfromtimestamp(now) + offset
+        # only the offset needs to be known for the time to be correct but
+        # the tzinfo gives us the right names for %Z etc
+        t = t.replace(tzinfo=tzinfo)
+
+        time_delta = self.time_deltas[format_index]
+        if time_delta:
+            # the output is the same for the whole of this period
+            period = (now + offset.total_seconds()) // time_delta
+            rendered = self._rendered.get((name, format_index))
+            if rendered and rendered[0] == period:
+                return rendered[1]
+        else:
+            period = None
+
+        icon = None
+        if self._uses_icon[format_index]:
+            # calculate the decimal hour
+            h = t.hour + t.minute / 60.
+            if self.round_to_nearest_block:
+                h += (self.block_hours / len(self.blocks)) / 2
+            # make 12 hourly etc
+            h = h % self.block_hours
+            idx = int(h / self.block_hours * len(self.blocks))
+            icon = self.blocks[idx]
+
+        template = self._get_template(name, format_index, icon)
+        if self.py3.is_composite(template):
+            result = self.py3.composite_create([
+                dict(item, full_text=t.strftime(item['full_text']))
+                for item in template
+            ])
+        else:
+            result = t.strftime(template)
+
+        if period is not None:
+            self._rendered[(name, format_index)] = (period, result)
+        return result
+
     def _change_active(self, diff):
         self.active = (self.active + diff) % len(self.format)
 
@@ -227,52 +384,13 @@ class Py3status:
             self._cycle_time = time() + self.cycle
 
         # update our times
+        now = time()
         times = {}
         for name, zone in self._items.items():
             if zone == '?':
                 times[name] = '?'
             else:
-                t = datetime.now(zone)
-                format_time = self.format_time[self.active_time_format]
-                icon = None
-                if self.py3.format_contains(format_time, 'icon'):
-                    # calculate the decimal hour
-                    h = t.hour + t.minute / 60.
-                    if self.round_to_nearest_block:
-                        h += (self.block_hours / len(self.blocks)) / 2
-                    # make 12 hourly etc
-                    h = h % self.block_hours
-                    idx = int(h / self.block_hours * len(self.blocks))
-                    icon = self.blocks[idx]
-
-                timezone = zone.zone
-                tzname = timezone.split('/')[-1].replace('_', ' ')
-
-                if self.multiple_tz:
-                    name_unclear = tzname
-                    timezone_unclear = timezone
-                else:
-                    name_unclear = ''
-                    timezone_unclear = ''
-
-                format_time = self.py3.safe_format(
-                    format_time,
-                    dict(
-                        icon=icon,
-                        name=tzname,
-                        name_unclear=name_unclear,
-                        timezone=timezone,
-                        timezone_unclear=timezone_unclear,
-                    ))
-                if self.py3.is_composite(format_time):
-                    for item in format_time:
-                        item['full_text'] = t.strftime(item['full_text'])
-                else:
-                    if self.py3.is_python_2():
-                        format_time = t.strftime(format_time.encode('utf-8'))
-                    else:
-                        format_time = t.strftime(format_time)
-                times[name] = format_time
+                times[name] = self._render(name, zone, now)
 
         # work out when we need to update
         timeout = self.py3.time_in(
@@ -284,8 +402,20 @@ class Py3status:
             cycle_timeout = self._cycle_time
             timeout = min(timeout, cycle_timeout)
 
+        # only format the output if the times have changed
+        state = (self.active, times)
+        if state != self._last_times:
+            self._last_times = state
+            self._last_output = self.py3.safe_format(
+                self.format[self.active], times
+            )
+        full_text = self._last_output
+        if self.py3.is_composite(full_text):
+            # the output gets modified so make sure we keep our copy intact
+            full_text = full_text.copy()
+
         return {
-            'full_text': self.py3.safe_format(self.format[self.active], times),
+            'full_text': full_text,
             'cached_until': timeout
         }
 
@@ -6,6 +6,11 @@ This module grabs your current balance of different crypto-currents from a
 wallet server. The server must conform to the bitcoin RPC specification.
 Currently Bitcoin, Dogecoin, and Litecoin are supported.
 
+Connections to each server are kept alive and shared by all instances, and
+a coin used several times in the format is only requested once.  Credentials
+read from the daemon configuration files are only read again when the file
+is modified.
+
 Configuration parameters:
     cache_timeout: An integer specifying the cache life-time of the output in
         seconds (default 30)
@@ -101,9 +106,11 @@ SAMPLE OUTPUT
 """
 
 from errno import ENOENT
+from os import stat
 from os.path import expanduser
 import requests
 from string import Formatter
+from threading import Lock
 
 
 COIN_PORTS = {
@@ -116,6 +123,46 @@ REQUEST = {
     'method': 'getbalance',
 }
 
+# the clients are shared by all instances using the same server
+CLIENTS = {}
+CLIENTS_LOCK = Lock()
+
+
+class RpcError(Exception):
+    pass
+
+
+class RpcClient:
+    """
+    JSON-RPC client for a coin server.  The connection is kept alive between
+    requests.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.session = requests.Session()
+        # a session is not safe to use from several threads at once
+        self.lock = Lock()
+
+    def call(self, request, auth=None):
+        """
+        Make the request and return its result.
+        """
+        with self.lock:
+            res = self.session.post(url=self.url, auth=auth, json=request)
+        if res.status_code == requests.codes.unauthorized:
+            raise RpcError('Authentication failed')
+        if res.status_code != requests.codes.ok:
+            raise RpcError('Request Error')
+        return res.json().get('result', None)
+
+
+def get_client(url):
+    with CLIENTS_LOCK:
+        if url not in CLIENTS:
+            CLIENTS[url] = RpcClient(url)
+        return CLIENTS[url]
+
 
 class Py3status:
     cache_timeout = 30
@@ -131,14 +178,14 @@ class Py3status:
     def post_config_hook(self):
         self._active_coins = []
         self._config = None
-        self._credential_cache = {}
+        self._daemon_configs = {}
 
     def coin_balance(self, outputs, config):
         self._config = config
 
         self._active_coins = [e[1] for e in Formatter().parse(self.format)]
         balances = {}
-        for coin in self._active_coins:
+        for coin in set(self._active_coins):
             balances[coin] = self._get_balance(coin)
 
         return {
@@ -146,63 +193,77 @@ class Py3status:
             'cached_until': self.py3.time_in(self.cache_timeout),
         }
 
-    def _get_daemon_config_value(self, coin, key):
+    def _get_daemon_config(self, coin):
+        """
+        Return the settings in the daemon configuration file of coin.  The
+        file is only parsed again when its modification time changes.
+        """
+        path = expanduser('~/.{0}/{0}.conf'.format(coin))
         try:
-            with open(expanduser('~/.{0}/{0}.conf'.format(coin)), 'r') as cfg:
+            mtime = stat(path).st_mtime
+        except OSError as err:
+            if err.errno == ENOENT:
+                return {}
+            raise
+        cached = self._daemon_configs.get(coin)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        values = {}
+        try:
+            with open(path, 'r') as cfg:
                 for line in cfg.readlines():
                     line = line.strip()
                     if line.startswith('#'):
                         continue
                     fields = line.split('=', 1)
-                    if len(fields) == 2 and fields[0].strip() == key:
-                        return fields[1].strip()
+                    if len(fields) == 2:
+                        values.setdefault(fields[0].strip(), fields[1].strip())
         except IOError as err:
             if err.errno == ENOENT:
-                return
+                return {}
             raise
+        self._daemon_configs[coin] = (mtime, values)
+        return values
+
+    def _get_daemon_config_value(self, coin, key):
+        return self._get_daemon_config(coin).get(key)
 
     def _get_credentials(self, coin):
-        if coin not in self._credential_cache:
-            username = getattr(self, '{}_username'.format(coin), None)
-            if username is None:
-                username = getattr(self, 'username', None)
-            if username is None:
-                username = self._get_daemon_config_value(coin, 'rpcuser')
-
-            password = getattr(self, '{}_password'.format(coin), None)
-            if password is None:
-                password = getattr(self, 'password', None)
-            if password is None:
-                password = self._get_daemon_config_value(coin, 'rpcpassword')
-
-            self._credential_cache[coin] = {
-                'username': username,
-                'password': password,
-            }
-
-        return self._credential_cache[coin]
+        username = getattr(self, '{}_username'.format(coin), None)
+        if username is None:
+            username = getattr(self, 'username', None)
+        if username is None:
+            username = self._get_daemon_config_value(coin, 'rpcuser')
+
+        password = getattr(self, '{}_password'.format(coin), None)
+        if password is None:
+            password = getattr(self, 'password', None)
+        if password is None:
+            password = self._get_daemon_config_value(coin, 'rpcpassword')
+
+        return {
+            'username': username,
+            'password': password,
+        }
+
+    def _get_url(self, coin):
+        return '{protocol}://{host}:{port}'.format(protocol=self.protocol,
+                                                   host=self.host,
+                                                   port=COIN_PORTS[coin])
 
     def _get_balance(self, coin):
         if coin not in COIN_PORTS:
             return 'Unsupported coin'
 
         credentials = self._get_credentials(coin)
-
+        auth_data = requests.auth.HTTPBasicAuth(**credentials)
+        url = self._get_url(coin)
         try:
-            auth_data = requests.auth.HTTPBasicAuth(**credentials)
-            url = '{protocol}://{host}:{port}'.format(protocol=self.protocol,
-                                                      host=self.host,
-                                                      port=COIN_PORTS[coin])
-
-            res = requests.post(url=url, auth=auth_data, json=REQUEST)
-
-            if res.status_code == requests.codes.ok:
-                return res.json().get('result', None)
-            elif res.status_code == requests.codes.unauthorized:
-                return 'Authentication failed'
-            else:
-                return 'Request Error'
-        except:
+            return get_client(url).call(REQUEST, auth=auth_data)
+        except RpcError as err:
+            return str(err)
+        except (requests.RequestException, ValueError):
             return 'Connection to \'' + url + '\' failed'
 
 
@@ -85,11 +85,7 @@ class Py3status:
         self.cmd = 'deadbeef --nowplaying-tf "%s"' % fmt
 
     def _is_running(self):
-        try:
-            self.py3.command_output(['pgrep', 'deadbeef'])
-            return True
-        except:
-            return False
+        return self.py3.is_process_running('deadbeef')
 
     def deadbeef(self):
         color = self.color_stopped
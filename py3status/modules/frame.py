@@ -80,6 +80,8 @@ closed
 
 """
 
+from py3status.segment import freeze, update_item
+
 
 class Py3status:
 
@@ -114,11 +116,10 @@ class Py3status:
                 out = self.py3.get_output(item)[:]
                 if self.format_separator is None:
                     if out and 'separator' not in out[-1]:
-                        # we copy the item as we do not want to change the
-                        # original.
-                        last_item = out[-1].copy()
-                        last_item['separator'] = True
-                        out[-1] = last_item
+                        # module output is shared so overlay the item to
+                        # change it
+                        out[-1] = update_item(freeze(out[-1]),
+                                              {'separator': True})
                 else:
                     if self.format_separator:
                         out += [{'full_text': self.format_separator}]
@@ -10,6 +10,12 @@ which provides readonly access to notifications.
 The Github API is rate limited so setting `cache_timeout` too small may cause
 issues see https://developer.github.com/v3/#rate-limiting for details
 
+Requests for issues, pull requests and notifications are made in parallel, in
+the thread pool py3status shares between modules, and they are conditional so
+unchanged data does not count against the rate limit.
+Notifications are shared between all instances using the same credentials and
+the `X-Poll-Interval` requested by Github is respected.
+
 Configuration parameters:
     auth_token: Github personal access token, needed to check notifications
         see above.
@@ -77,10 +83,17 @@ try:
 except ImportError:
     import urllib.parse as urlparse
 
+from threading import Lock
+from time import time
+
 
 GITHUB_API_URL = 'https://api.github.com'
 GITHUB_URL = 'https://github.com/'
 
+# notifications are shared by all instances with the same credentials
+NOTIFICATIONS = {}
+NOTIFICATIONS_LOCK = Lock()
+
 
 class Py3status:
     auth_token = None
@@ -97,6 +110,7 @@ class Py3status:
         self.first = True
         self.notification_warning = False
         self.repo_warning = False
+        self._etags = {}
         self._issues = '?'
         self._pulls = '?'
         self._notify = '?'
@@ -110,6 +124,12 @@ class Py3status:
             else:
                 self.format = '{repo} {issues}/{pull_requests}'
 
+    def _auth(self):
+        # if we have authentication details use them as we get better
+        # rate-limiting.
+        if self.username and self.auth_token:
+            return (self.username, self.auth_token)
+
     def _github_count(self, url):
         """
         Get counts for requests that return 'total_count' in the json response.
@@ -117,18 +137,23 @@ class Py3status:
         if self.first:
             return '?'
         url = GITHUB_API_URL + url + '&per_page=1'
-        # if we have authentication details use them as we get better
-        # rate-limiting.
-        if self.username and self.auth_token:
-            auth = (self.username, self.auth_token)
-        else:
-            auth = None
+        # send the ETag of our last response so that unchanged results are
+        # not sent again and do not count against our rate limit.
+        headers = {}
+        etag, count = self._etags.get(url, (None, None))
+        if etag:
+            headers['If-None-Match'] = etag
         try:
-            info = self.py3.request(url, timeout=10, auth=auth)
+            info = self.py3.request(url, timeout=10, auth=self._auth(),
+                                    headers=headers)
         except (self.py3.RequestException):
             return
+        if info.status_code == 304:
+            return count
         if info and info.status_code == 200:
-            return(int(info.json()['total_count']))
+            count = int(info.json()['total_count'])
+            self._etags[url] = (info.headers.get('ETag'), count)
+            return count
         if info.status_code == 422:
             if not self.repo_warning:
                 self.py3.notify_user('Github repo cannot be found.')
@@ -145,65 +170,130 @@ class Py3status:
                                      'auth_token to check notifications.')
                 self.notification_warning = True
             return '?'
-        if self.first:
-            return '?'
         if self.notifications == 'all' or not self.repo:
             url = GITHUB_API_URL + '/notifications'
         else:
             url = GITHUB_API_URL + '/repos/' + self.repo + '/notifications'
         url += '?per_page=100'
-        try:
-            info = self.py3.request(url, timeout=10,
-                                    auth=(self.username, self.auth_token))
-        except (self.py3.RequestException):
-            return
-        if info.status_code == 200:
-            links = info.headers.get('Link')
-
-            if not links:
-                return len(info.json())
 
-            last_page = 1
-            for link in links.split(','):
-                if 'rel="last"' in link:
-                    last_url = link[link.find('<') + 1:link.find('>')]
-                    parsed = urlparse.urlparse(last_url)
-                    last_page = int(urlparse.parse_qs(parsed.query)['page'][0])
+        auth = (self.username, self.auth_token)
+        with NOTIFICATIONS_LOCK:
+            key = (auth, url)
+            if key not in NOTIFICATIONS:
+                NOTIFICATIONS[key] = {
+                    'count': None,
+                    'etag': None,
+                    'lock': Lock(),
+                    'next_poll': 0,
+                }
+            shared = NOTIFICATIONS[key]
 
-            if last_page == 1:
-                return len(info.json())
+        # only one instance fetches, any others waiting get its result
+        with shared['lock']:
+            if time() < shared['next_poll']:
+                return shared['count']
+            headers = {}
+            if shared['etag']:
+                headers['If-None-Match'] = shared['etag']
             try:
-                last_page_info = self.py3.request(last_url, timeout=10,
-                                                  auth=(self.username, self.auth_token))
-            except self.py3.RequestException:
+                info = self.py3.request(url, timeout=10, auth=auth,
+                                        headers=headers)
+            except (self.py3.RequestException):
                 return
+            # Github tells us how often we are allowed to poll
+            try:
+                poll_interval = int(info.headers.get('X-Poll-Interval'))
+            except (AttributeError, TypeError, ValueError):
+                poll_interval = 0
+            shared['next_poll'] = time() + poll_interval
 
-            return len(info.json()) * (last_page - 1) + len(last_page_info.json())
+            if info.status_code == 304:
+                return shared['count']
+            if info.status_code == 200:
+                count = self._notifications_count(info, auth)
+                if count is not None:
+                    shared['count'] = count
+                    shared['etag'] = info.headers.get('ETag')
+                return count
 
         if info.status_code == 404:
             if not self.repo_warning:
                 self.py3.notify_user('Github repo cannot be found.')
                 self.repo_warning = True
 
+    def _notifications_count(self, info, auth):
+        """
+        Count the notifications, fetching the last page if there are many.
+        """
+        links = info.headers.get('Link')
+
+        if not links:
+            return len(info.json())
+
+        last_page = 1
+        for link in links.split(','):
+            if 'rel="last"' in link:
+                last_url = link[link.find('<') + 1:link.find('>')]
+                parsed = urlparse.urlparse(last_url)
+                last_page = int(urlparse.parse_qs(parsed.query)['page'][0])
+
+        if last_page == 1:
+            return len(info.json())
+        try:
+            last_page_info = self.py3.request(last_url, timeout=10, auth=auth)
+        except self.py3.RequestException:
+            return
+
+        return len(info.json()) * (last_page - 1) + len(last_page_info.json())
+
+    def _fetch(self, requests):
+        """
+        Run the requests concurrently and return a dict of their results.
+        requests is a dict of name: (function, args)
+        """
+        calls = {}
+        for name, (function, args) in requests.items():
+            calls[name] = self.py3.run_in_thread_pool(function, *args)
+        results = {}
+        for name, call in calls.items():
+            results[name] = call.result()
+        return results
+
     def github(self):
         if self.first:
             self._init()
         status = {}
         urgent = False
+        requests = {}
         # issues
         if self.repo and self.py3.format_contains(self.format, 'issues'):
             url = '/search/issues?q=state:open+type:issue+repo:' + self.repo
-            self._issues = self._github_count(url) or self._issues
-        status['issues'] = self._issues
+            requests['issues'] = (self._github_count, [url])
         # pull requests
         if self.repo and self.py3.format_contains(self.format, 'pull_requests'):
             url = '/search/issues?q=state:open+type:pr+repo:' + self.repo
-            self._pulls = self._github_count(url) or self._pulls
-        status['pull_requests'] = self._pulls
+            requests['pull_requests'] = (self._github_count, [url])
         # notifications
-        if (self.py3.format_contains(self.format, 'notifications') or
-                self.py3.format_contains(self.format, 'notifications_count')):
-            count = self._notifications()
+        show_notifications = (
+            self.py3.format_contains(self.format, 'notifications') or
+            self.py3.format_contains(self.format, 'notifications_count')
+        )
+        if show_notifications:
+            requests['notifications'] = (self._notifications, [])
+
+        if self.first:
+            # only the notifications are fetched on the first run, the counts
+            # are left until the next one so that the module shows quickly.
+            requests.pop('issues', None)
+            requests.pop('pull_requests', None)
+        results = self._fetch(requests)
+
+        self._issues = results.get('issues') or self._issues
+        status['issues'] = self._issues
+        self._pulls = results.get('pull_requests') or self._pulls
+        status['pull_requests'] = self._pulls
+        if show_notifications:
+            count = results.get('notifications', '?')
             # if we don't have a notification count, then use the last value
             # that we did have.
             if count is None:
@@ -6,7 +6,7 @@ Configuration parameters:
     cache_timeout: how often we refresh this module in seconds.
         (default 120)
     datapoint_selection: when multiple data points are returned,
-        use "max" or "min" to determine which one to display.
+        use "max", "min", "avg" or "first" to determine which one to display.
         (default "max")
     format: you MUST use placeholders here to display data, see below.
         (default '')
@@ -29,7 +29,9 @@ Configuration parameters:
     threshold_degraded: numerical threshold,
         if set will send a notification and colorize the output.
         (default None)
-    timespan: time range to query graphite for.
+    timespan: time range to query graphite for.  When this is relative eg
+        "-2minutes" the data points are kept between refreshes and only new
+        ones are fetched.
         (default "-2minutes")
     value_comparator: choose between "max" and "min" to compare thresholds
         to the data point value.
@@ -68,8 +70,86 @@ Color options:
 
 @author ultrabug
 """
+import re
+
+from array import array
+from bisect import bisect_left
 from requests import get
 from syslog import syslog, LOG_INFO
+from time import time
+
+# graphite relative time units in seconds
+UNITS = {
+    's': 1,
+    'min': 60,
+    'h': 3600,
+    'd': 86400,
+    'w': 604800,
+    'mon': 2592000,
+    'y': 31536000,
+}
+
+RELATIVE_TIME = re.compile(
+    r'^-(\d+)(s|sec|secs|second|seconds|min|mins|minute|minutes|h|hour|hours|'
+    r'd|day|days|w|week|weeks|mon|month|months|y|year|years)$'
+)
+
+# each reduces a non-empty array of values in a single pass
+REDUCTIONS = {
+    'avg': lambda values: sum(values) / len(values),
+    'first': lambda values: values[0],
+    'max': max,
+    'min': min,
+}
+
+
+def parse_timespan(timespan):
+    """
+    Return the number of seconds in a relative graphite time eg "-2minutes",
+    or None for anything else.
+    """
+    match = RELATIVE_TIME.match(timespan.replace(' ', ''))
+    if not match:
+        return None
+    number, unit = match.groups()
+    for name in sorted(UNITS, key=len, reverse=True):
+        if unit.startswith(name):
+            return int(number) * UNITS[name]
+
+
+class Window:
+    """
+    The data points of a target within the timespan, oldest first.  Null
+    points are not stored.
+    """
+
+    def __init__(self):
+        self.timestamps = array('d')
+        self.values = array('d')
+
+    def extend(self, datapoints):
+        """
+        Add fetched data points, any we already have from the same time on
+        are replaced as graphite may have filled in the latest ones since.
+        """
+        timestamps = [t for v, t in datapoints if v is not None]
+        values = [v for v, t in datapoints if v is not None]
+        if not timestamps:
+            return
+        index = bisect_left(self.timestamps, timestamps[0])
+        del self.timestamps[index:]
+        del self.values[index:]
+        self.timestamps.extend(timestamps)
+        self.values.extend(values)
+
+    def expire(self, oldest):
+        """
+        Drop data points from before oldest.
+        """
+        index = bisect_left(self.timestamps, oldest)
+        if index:
+            del self.timestamps[:index]
+            del self.values[:index]
 
 
 def format_value(num, value_round=True):
@@ -103,6 +183,11 @@ class Py3status:
     value_format = True
     value_round = True
 
+    def post_config_hook(self):
+        self._span = parse_timespan(self.timespan)
+        self._windows = {}
+        self._last_timestamp = None
+
     def _reset_notifications(self):
         """
         """
@@ -118,15 +203,56 @@ class Py3status:
             raise ValueError('missing "graphite_url" configuration')
         if not self.targets:
             raise ValueError('missing "targets" configuration')
-        if self.datapoint_selection not in ['max', 'min']:
+        if self.datapoint_selection not in REDUCTIONS:
             raise ValueError('invalid "datapoint_selection" configuration')
         if self.value_comparator not in ['max', 'min']:
             raise ValueError('invalid "value_comparator" configuration')
 
+    def _fetch_params(self, now):
+        """
+        Only fetch data points since the last ones we have if the timespan
+        is relative, otherwise fetch it all.
+        """
+        if self._span is None:
+            self._windows = {}
+            return [('format', 'json'), ('from', self.timespan)]
+        if self._last_timestamp is None:
+            start = self.timespan
+        else:
+            start = int(max(self._last_timestamp, now - self._span))
+        return [('format', 'json'), ('from', start), ('until', 'now')]
+
+    def _update_windows(self, metrics, now):
+        """
+        Merge fetched metrics into the windows and return them by target.
+        """
+        last_timestamps = []
+        # targets no longer returned, eg a wildcard that matches fewer
+        # series, would otherwise keep us refetching everything.
+        returned = set(metric['target'] for metric in metrics)
+        for target in list(self._windows):
+            if target not in returned:
+                del self._windows[target]
+        for metric in metrics:
+            window = self._windows.setdefault(metric['target'], Window())
+            window.extend(metric['datapoints'])
+            if self._span is not None:
+                window.expire(now - self._span)
+            if window.timestamps:
+                last_timestamps.append(window.timestamps[-1])
+        # we refetch from the oldest of the latest data points so that none
+        # are missed, an empty target means we start again.
+        if last_timestamps and len(last_timestamps) == len(self._windows):
+            self._last_timestamp = min(last_timestamps)
+        else:
+            self._last_timestamp = None
+        return self._windows
+
     def _render_graphite_json(self):
         """
         """
-        params = [('format', 'json'), ('from', self.timespan)]
+        now = time()
+        params = self._fetch_params(now)
         for target in self.targets.split(';'):
             params.append(('target', target))
 
@@ -146,18 +272,13 @@ class Py3status:
         else:
             color_key = 'good'
             r_json = {}
-            for metric in r.json():
-                value = None
-                target = metric['target']
-                for datapoint_list in metric['datapoints']:
-                    point, timestamp = datapoint_list
-                    if point is not None:
-                        if value is None:
-                            value = point
-                        elif self.datapoint_selection == 'max':
-                            value = max(value, point)
-                        elif self.datapoint_selection == 'min':
-                            value = min(value, point)
+            reduce_values = REDUCTIONS[self.datapoint_selection]
+            windows = self._update_windows(r.json(), now)
+            for target, window in sorted(windows.items()):
+                if window.values:
+                    value = reduce_values(window.values)
+                else:
+                    value = None
 
                 if value is None:
                     syslog(
@@ -90,6 +90,8 @@ cycle_again
 
 from time import time
 
+from py3status.segment import freeze, update_item
+
 RETRY_TIMEOUT_NO_CONTENT = 5
 
 
@@ -171,17 +173,24 @@ class Py3status:
         if widths:
             width = max(widths)
             padding = ' ' * (width - current_width)
+            if not padding:
+                return current
+            # module output is shared so overlay the items to change them
+            current = current[:]
             if self.align == 'right':
-                current[0]['full_text'] = padding + current[0]['full_text']
+                current[0] = self._pad(current[0], before=padding)
             elif self.align == 'center':
                 cut = len(padding) // 2
-                current[0]['full_text'] = padding[:cut] + \
-                    current[0]['full_text']
-                current[-1]['full_text'] += padding[cut:]
+                current[0] = self._pad(current[0], before=padding[:cut])
+                current[-1] = self._pad(current[-1], after=padding[cut:])
             else:
-                current[-1]['full_text'] += padding
+                current[-1] = self._pad(current[-1], after=padding)
         return current
 
+    def _pad(self, item, before='', after=''):
+        full_text = before + item['full_text'] + after
+        return update_item(freeze(item), {'full_text': full_text})
+
     def _get_current_module_name(self):
         if not self.items:
             return
@@ -2,6 +2,9 @@
 """
 Display service status for Icinga2.
 
+All instances using the same icinga-web2 server share a connection and the
+counts for every status are fetched with a single query.
+
 Configuration parameters:
     base_url: the base url to the icinga-web2 services list (default '')
     ca: (default True)
@@ -15,7 +18,10 @@ Configuration parameters:
     status: set the status you want to obtain
         (0=OK,1=WARNING,2=CRITICAL,3=UNKNOWN)
         (default 0)
-    url_parameters: (default '?service_state={service_state}&format=json')
+    url_parameters: the `{service_filter}` placeholder is replaced by a
+        filter matching the statuses of all instances.  If instead it
+        contains `{service_state}` each status is queried separately.
+        (default '?{service_filter}&format=json')
     user: username to authenticate against the icinga-web2 interface
         (default '')
 
@@ -24,10 +30,76 @@ Configuration parameters:
 @source https://github.com/nazco/i3status-modules
 """
 
+import codecs
+import re
 import requests
 
+from threading import Lock
+from time import time
+
 STATUS_NAMES = {0: 'OK', 1: 'WARNING', 2: 'CRITICAL', 3: 'UNKNOWN'}
 
+# size of the chunks the response is read in
+CHUNK_SIZE = 16384
+
+# strings, which may run to the end of a chunk, punctuation and other values
+JSON_TOKENS = re.compile(
+    r'"(?:[^"\\]|\\.)*(?:"|\\?\Z)|[{}\[\],:]|[^\s{}\[\],:"]+'
+)
+
+# the session and counts are shared by all instances with the same server
+# and settings.
+QUERIES = {}
+QUERIES_LOCK = Lock()
+SESSION = requests.Session()
+
+
+class ServiceCounter:
+    """
+    Count the services in the JSON list returned by icinga-web2 by their
+    service_state.  The response is fed in as it arrives and only the
+    tokens are scanned, the services themselves are not built.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self._buffer = ''
+        self._depth = 0
+        self._key = None
+        self._state = None
+        self._token = None
+
+    def feed(self, text):
+        text = self._buffer + text
+        end = 0
+        for match in JSON_TOKENS.finditer(text):
+            token = match.group()
+            # a string or value at the end may continue in the next chunk
+            if match.end() == len(text) and token not in '{}[],:':
+                break
+            end = match.end()
+            if token in '{[':
+                self._depth += 1
+            elif token in '}]':
+                if token == '}' and self._depth == 2:
+                    self.total += 1
+                    self.counts[self._state] = self.counts.get(self._state, 0) + 1
+                    self._state = None
+                self._depth -= 1
+            elif token == ':':
+                if self._depth == 2:
+                    self._key = self._token
+            elif token != ',':
+                if self._key == '"service_state"':
+                    try:
+                        self._state = int(token.strip('"'))
+                    except ValueError:
+                        pass
+                self._key = None
+            self._token = token
+        self._buffer = text[end:]
+
 
 class Py3status:
     """
@@ -40,9 +112,23 @@ class Py3status:
     format = '{status_name}: {count}'
     password = ''
     status = 0
-    url_parameters = "?service_state={service_state}&format=json"
+    url_parameters = "?{service_filter}&format=json"
     user = ''
 
+    def post_config_hook(self):
+        key = (self.base_url, self.url_parameters, self.disable_acknowledge,
+               self.user, self.password, self.ca)
+        with QUERIES_LOCK:
+            if key not in QUERIES:
+                QUERIES[key] = {
+                    'counts': {},
+                    'lock': Lock(),
+                    'next_poll': 0,
+                    'statuses': set(),
+                }
+            self._query = QUERIES[key]
+            self._query['statuses'].add(self.status)
+
     def get_status(self):
         response = {
             'color': self.color,
@@ -55,15 +141,51 @@ class Py3status:
         }
         return response
 
+    def _count_services(self, url):
+        """
+        Stream the services list from url and return its ServiceCounter.
+        """
+        counter = ServiceCounter()
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        result = SESSION.get(url, auth=(self.user, self.password),
+                             verify=self.ca, stream=True)
+        try:
+            result.raise_for_status()
+            for chunk in result.iter_content(CHUNK_SIZE):
+                counter.feed(decoder.decode(chunk))
+            counter.feed(decoder.decode(b'', final=True))
+        finally:
+            result.close()
+        return counter
+
     def _query_service_count(self, state):
         url_parameters = self.url_parameters
         if self.disable_acknowledge:
             url_parameters = url_parameters + "&service_handled=0"
-        result = requests.get(
-            self.base_url + url_parameters.format(service_state=state),
-            auth=(self.user, self.password),
-            verify=self.ca)
-        return len(result.json())
+        query = self._query
+        # only one instance queries, any others waiting use its counts
+        with query['lock']:
+            if time() < query['next_poll'] and state in query['counts']:
+                return query['counts'][state]
+            statuses = sorted(query['statuses'] | set([state]))
+            counts = {}
+            if '{service_state}' in url_parameters:
+                for status in statuses:
+                    url = self.base_url + url_parameters.format(
+                        service_state=status)
+                    counts[status] = self._count_services(url).total
+            else:
+                service_filter = '({})'.format('|'.join(
+                    'service_state={}'.format(status) for status in statuses
+                ))
+                url = self.base_url + url_parameters.format(
+                    service_filter=service_filter)
+                counter = self._count_services(url)
+                for status in statuses:
+                    counts[status] = counter.counts.get(status, 0)
+            query['counts'] = counts
+            query['next_poll'] = time() + self.cache_timeout
+            return counts[state]
 
 
 if __name__ == "__main__":
@@ -68,8 +68,6 @@ unknown
 {'color': '#FF0000', 'full_text': u'unknown device'}
 """
 
-from pydbus import SessionBus
-
 
 SERVICE_BUS = 'org.kde.kdeconnect'
 INTERFACE = SERVICE_BUS + '.device'
@@ -105,33 +103,32 @@ class Py3status:
         """
         Get the device id
         """
-        _bus = SessionBus()
-
         if self.device_id is None:
-            self.device_id = self._get_device_id(_bus)
+            self.device_id = self._get_device_id()
             if self.device_id is None:
                 return False
 
+        # the session bus and proxies are shared and cached by py3status
         try:
-            self._dev = _bus.get(SERVICE_BUS,
-                                 DEVICE_PATH + '/%s' % self.device_id)
+            self._dev = self.py3.dbus_get(SERVICE_BUS,
+                                          DEVICE_PATH + '/%s' % self.device_id)
         except Exception:
             return False
 
         return True
 
-    def _get_device_id(self, bus):
+    def _get_device_id(self):
         """
         Find the device id
         """
-        _dbus = bus.get(SERVICE_BUS, PATH)
+        _dbus = self.py3.dbus_get(SERVICE_BUS, PATH)
         devices = _dbus.devices()
 
         if self.device is None and self.device_id is None and len(devices) == 1:
             return devices[0]
 
         for id in devices:
-            self._dev = bus.get(SERVICE_BUS, DEVICE_PATH + '/%s' % id)
+            self._dev = self.py3.dbus_get(SERVICE_BUS, DEVICE_PATH + '/%s' % id)
             if self.device == self._dev.name:
                 return id
 
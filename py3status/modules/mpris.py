@@ -111,16 +111,14 @@ SAMPLE OUTPUT
 
 from datetime import timedelta
 from time import time
-from gi.repository import GObject
 from gi.repository.GLib import GError
-from threading import Thread
 import re
-import sys
-from pydbus import SessionBus
 
 
 SERVICE_BUS = 'org.mpris.MediaPlayer2'
 SERVICE_BUS_URL = '/org/mpris/MediaPlayer2'
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
 
 WORKING_STATES = ['Playing', 'Paused', 'Stopped']
 
@@ -161,10 +159,8 @@ class Py3status:
     state_stop = u'◾'
 
     def __init__(self):
-        self._dbus = None
         self._data = {}
         self._control_states = {}
-        self._kill = False
         self._mpris_players = {}
         self._mpris_names = {}
         self._mpris_name_index = {}
@@ -173,7 +169,8 @@ class Py3status:
         self._tries = 0
 
     def post_config_hook(self):
-        self._dbus = SessionBus()
+        # the session bus and the main loop delivering its signals are
+        # shared with the other modules.
         self._start_listener()
 
     def _init_data(self):
@@ -192,20 +189,18 @@ class Py3status:
             return
 
         try:
-            self._data['player'] = self._player.Identity
-            playback_status = self._player.PlaybackStatus
+            properties = self._player_details['properties']
+            self._data['player'] = self._player_details['identity']
+            playback_status = properties.get('PlaybackStatus')
             self._data['state'] = self._get_state(playback_status)
-            metadata = self._player.Metadata
-            self._update_metadata(metadata)
+            self._update_metadata(properties.get('Metadata', {}))
         except Exception:
             self._data['error_occurred'] = True
 
     def _get_button_state(self, control_state):
-        try:
-            # Workaround: The last parameter returns True for the Stop button.
-            clickable = getattr(self._player, control_state['clickable'], True)
-        except Exception:
-            clickable = False
+        # Workaround: The missing property returns True for the Stop button.
+        properties = self._player_details.get('properties', {})
+        clickable = properties.get(control_state['clickable'], True)
 
         state = self._data.get('state')
         if control_state['action'] == 'Play' and state == PLAYING:
@@ -242,15 +237,20 @@ class Py3status:
         if self._data.get('error_occurred'):
             color = self.py3.COLOR_BAD
 
-        try:
-            ptime_ms = self._player.Position
-            ptime = _get_time_str(ptime_ms)
-        except Exception:
+        position = self._get_position()
+        if position is None:
             ptime = None
-
-        if self.py3.format_contains(self.format, 'time') and self._data.get('state') == PLAYING:
-            # Don't get trapped in aliasing errors!
-            update = time() + 0.5
+        else:
+            ptime = _get_time_str(position)
+
+        rate = self._player_details.get('properties', {}).get('Rate', 1.0)
+        if (position is not None and rate > 0 and
+                self._data.get('state') == PLAYING and
+                self.py3.format_contains(self.format, 'time')):
+            # update when the displayed time next changes, a little late so
+            # we don't get trapped in aliasing errors!
+            microseconds = 1000000 - position % 1000000
+            update = time() + microseconds / (rate * 1000000) + 0.01
         else:
             update = self.py3.CACHE_FOREVER
 
@@ -313,23 +313,32 @@ class Py3status:
 
         return response
 
-    def _start_loop(self):
-        self._loop = GObject.MainLoop()
-        GObject.timeout_add(1000, self._timeout)
+    def _get_position(self):
+        """
+        The position of the current player in microseconds.  Players only
+        tell us when it jumps so it is worked out from the last one we
+        read.
+        """
+        if 'position' not in self._player_details:
+            return None
+        position, timestamp = self._player_details['position']
+        if self._data.get('state') == PLAYING:
+            rate = self._player_details['properties'].get('Rate', 1.0)
+            position += (time() - timestamp) * rate * 1000000
+        return int(position)
+
+    def _read_position(self, player):
         try:
-            self._loop.run()
-        except KeyboardInterrupt:
-            # This branch is only needed for the test mode
-            self._kill = True
-
-    def _name_owner_changed(self, *args):
-        player_id = args[5][0]
-        player_add = args[5][2]
-        player_remove = args[5][1]
-        if player_add:
-            self._add_player(player_id)
+            player['position'] = (player['_dbus_player'].Position, time())
+        except Exception:
+            player.pop('position', None)
+
+    def _name_owner_changed(self, sender, path, iface, signal, params):
+        player_id, player_remove, player_add = params
         if player_remove:
             self._remove_player(player_id)
+        if player_add:
+            self._add_player(player_id, player_add)
         self._set_player()
 
     def _set_player(self):
@@ -370,48 +379,69 @@ class Py3status:
         self.py3.update()
 
     def _player_monitor(self, player_id):
-        def player_on_change(*args):
+        def player_on_change(sender, path, iface, signal, params):
             """
             Monitor a player and update its status.
             """
-            data = args[1]
-            status = data.get('PlaybackStatus')
-            if status:
-                player = self._mpris_players[player_id]
-
-                # Note: Workaround. Since all players get noted if playback status
-                #       has been changed we have to check if we are the choosen one
-                try:
-                    dbus_status = player['_dbus_player'].PlaybackStatus
-                except GError:
-                    # Prevent errors when calling methods of deleted dbus objects
-                    return
-                if status != dbus_status:
-                    # FIXME: WE DON'T RECOGNIZE ANY TITLE CHANGE
-                    return
+            player = self._mpris_players.get(player_id)
+            interface, changed, invalidated = params
+            if not player or interface != PLAYER_INTERFACE:
+                return
+            properties = player['properties']
+            properties.update(changed)
+            try:
+                if invalidated:
+                    properties.update(
+                        player['_dbus_player'].GetAll(PLAYER_INTERFACE)
+                    )
+            except GError:
+                # Prevent errors when calling methods of deleted dbus objects
+                return
+            # the position is not signalled so we read it again when the
+            # track, playback status or rate change.
+            self._read_position(player)
 
+            status = properties.get('PlaybackStatus')
+            if status in WORKING_STATES:
                 player['status'] = status
                 player['_state_priority'] = WORKING_STATES.index(status)
             self._set_player()
         return player_on_change
 
-    def _add_player(self, player_id):
+    def _player_seeked(self, player_id):
+        def player_on_seek(sender, path, iface, signal, params):
+            player = self._mpris_players.get(player_id)
+            if player:
+                player['position'] = (params[0], time())
+                self.py3.update()
+        return player_on_seek
+
+    def _add_player(self, player_id, owner=None):
         """
         Add player to mpris_players
         """
         if not player_id.startswith(SERVICE_BUS):
             return False
 
-        player = self._dbus.get(player_id, SERVICE_BUS_URL)
+        player = self.py3.dbus_get(player_id, SERVICE_BUS_URL)
+        # all the properties we need are fetched in one call for each
+        # interface.
+        try:
+            identity = player.GetAll(SERVICE_BUS).get('Identity')
+            properties = player.GetAll(PLAYER_INTERFACE)
+            if owner is None:
+                owner = self._dbus_names.GetNameOwner(player_id)
+        except GError:
+            # the player has gone
+            return False
 
-        if player.Identity not in self._mpris_names:
-            self._mpris_names[player.Identity] = player_id.split('.')[-1]
+        if identity not in self._mpris_names:
+            self._mpris_names[identity] = player_id.split('.')[-1]
             for p in self._mpris_players.values():
                 if not p['name'] and p['identity'] in self._mpris_names:
                     p['name'] = self._mpris_names[p['identity']]
                     p['full_name'] = u'{} {}'.format(p['name'], p['index'])
 
-        identity = player.Identity
         name = self._mpris_names.get(identity)
         if self.player_priority != [] and name not in self.player_priority \
                 and '*' not in self.player_priority:
@@ -420,11 +450,30 @@ class Py3status:
         if identity not in self._mpris_name_index:
             self._mpris_name_index[identity] = 0
 
-        status = player.PlaybackStatus
+        status = properties.get('PlaybackStatus')
+        if status not in WORKING_STATES:
+            status = 'Stopped'
         state_priority = WORKING_STATES.index(status)
         index = self._mpris_name_index[identity]
         self._mpris_name_index[identity] += 1
-        subscription = player.PropertiesChanged.connect(self._player_monitor(player_id))
+        # Players all use the same object path, we only want the signals
+        # sent by this one.
+        subscriptions = [
+            self.py3.dbus_subscribe(
+                self._player_monitor(player_id),
+                sender=owner,
+                iface=PROPERTIES_INTERFACE,
+                signal='PropertiesChanged',
+                object_path=SERVICE_BUS_URL,
+            ),
+            self.py3.dbus_subscribe(
+                self._player_seeked(player_id),
+                sender=owner,
+                iface=PLAYER_INTERFACE,
+                signal='Seeked',
+                object_path=SERVICE_BUS_URL,
+            ),
+        ]
 
         self._mpris_players[player_id] = {
             '_dbus_player': player,
@@ -434,9 +483,14 @@ class Py3status:
             'identity': identity,
             'name': name,
             'full_name': u'{} {}'.format(name, index),
+            'properties': properties,
             'status': status,
-            'subscription': subscription,
+            'subscriptions': subscriptions,
         }
+        if 'Position' in properties:
+            self._mpris_players[player_id]['position'] = (
+                properties['Position'], time()
+            )
 
         return True
 
@@ -446,36 +500,24 @@ class Py3status:
         """
         player = self._mpris_players.get(player_id)
         if player:
-            if player.get('subscription'):
-                player['subscription'].disconnect()
+            for subscription in player['subscriptions']:
+                subscription.disconnect()
             del self._mpris_players[player_id]
 
     def _get_players(self):
-        bus = self._dbus.get('org.freedesktop.DBus')
-        for player in bus.ListNames():
+        for player in self._dbus_names.ListNames():
             self._add_player(player)
 
         self._set_player()
 
     def _start_listener(self):
-        self._dbus.con.signal_subscribe(
-            None,
-            'org.freedesktop.DBus',
-            'NameOwnerChanged',
-            None,
-            None,
-            0,
+        self._dbus_names = self.py3.dbus_get('org.freedesktop.DBus')
+        self._name_subscription = self.py3.dbus_subscribe(
             self._name_owner_changed,
+            iface='org.freedesktop.DBus',
+            signal='NameOwnerChanged',
         )
         self._get_players()
-        t = Thread(target=self._start_loop)
-        t.daemon = True
-        t.start()
-
-    def _timeout(self):
-        if self._kill:
-            self._loop.quit()
-            sys.exit(0)
 
     def _update_metadata(self, metadata):
         is_stream = False
@@ -508,7 +550,9 @@ class Py3status:
             self._data['title'] = re.sub(r'\....$', '', self._data.get('title'))
 
     def kill(self):
-        self._kill = True
+        self._name_subscription.disconnect()
+        for player_id in list(self._mpris_players):
+            self._remove_player(player_id)
 
     def mpris(self):
         """
@@ -534,9 +578,6 @@ class Py3status:
                                                  text,
                                                  buttons)
 
-        if self._kill:
-            raise KeyboardInterrupt
-
         if (self._data.get('error_occurred') or
                 current_player_id != self._player_details.get('id')):
             # Something went wrong or the player changed during our processing
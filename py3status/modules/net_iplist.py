@@ -6,6 +6,10 @@ This module supports both IPv4 and IPv6. There is the possibility to blacklist
 interfaces and IPs, as well as to show interfaces with no IP address. It will
 show an alternate text if no IP are available.
 
+The addresses are followed by py3status from the kernel's netlink events so
+the module is updated as soon as they change.  Where netlink is not available
+they are read from `ip` every cache_timeout instead.
+
 Configuration parameters:
     cache_timeout: refresh interval for this module in seconds.
         (default 30)
@@ -47,9 +51,6 @@ net_iplist {
 }
 ```
 
-Requires:
-    ip: utility found in iproute2 package
-
 @author guiniol
 
 SAMPLE OUTPUT
@@ -59,6 +60,8 @@ SAMPLE OUTPUT
 
 
 import re
+
+from collections import OrderedDict
 from fnmatch import fnmatch
 
 
@@ -74,9 +77,14 @@ class Py3status:
     remove_empty = True
 
     def post_config_hook(self):
-        self.iface_re = re.compile(r'\d+: (?P<iface>\w+):')
-        self.ip_re = re.compile(r'\s+inet (?P<ip4>[\d\.]+)(?:/| )')
-        self.ip6_re = re.compile(r'\s+inet6 (?P<ip6>[\da-f:]+)(?:/| )')
+        try:
+            self.py3.network_subscribe(self.py3.update)
+            self._netlink = True
+        except Exception:
+            self._netlink = False
+            self.iface_re = re.compile(r'\d+: (?P<iface>\w+):')
+            self.ip_re = re.compile(r'\s+inet (?P<ip4>[\d\.]+)(?:/| )')
+            self.ip6_re = re.compile(r'\s+inet6 (?P<ip6>[\da-f:]+)(?:/| )')
 
     def ip_list(self):
         response = {
@@ -121,9 +129,24 @@ class Py3status:
         return response
 
     def _get_data(self):
+        if not self._netlink:
+            return self._get_ip_data()
+
+        data = OrderedDict()
+        for iface, info in self.py3.network_interfaces().items():
+            ips = {}
+            for key in ('ip4', 'ip6'):
+                if info[key]:
+                    ips[key] = info[key]
+            if ips or not self.remove_empty:
+                data[iface] = ips
+
+        return data
+
+    def _get_ip_data(self):
         txt = self.py3.command_output(['ip', 'address', 'show']).splitlines()
 
-        data = {}
+        data = OrderedDict()
         for line in txt:
             iface = self.iface_re.match(line)
             if iface:
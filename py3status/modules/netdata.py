@@ -7,7 +7,8 @@ Configuration parameters:
     format: display format for this module
         *(default '{nic} [\?color=down LAN(Kb): {down}↓ {up}↑]
         [\?color=total T(Mb): {download}↓ {upload}↑ {total}↕]')*
-    nic: network interface to use (default None)
+    nic: network interface to use, if None the interface of the default
+        route is used and followed when the route changes (default None)
     thresholds: color thresholds to use
         *(default {'down': [(0, 'bad'), (30, 'degraded'), (60, 'good')],
         'total': [(0, 'good'), (400, 'degraded'), (700, 'bad')]})*
@@ -131,24 +132,36 @@ class Py3status:
         """
         Get network interface.
         """
-        if self.nic is None:
-            # Get default gateway directly from /proc.
-            with open('/proc/net/route') as fh:
-                for line in fh:
-                    fields = line.strip().split()
-                    if fields[1] == '00000000' and int(fields[3], 16) & 2:
-                        self.nic = fields[0]
-                        break
-            if self.nic is None:
-                self.nic = 'lo'
+        self._default_nic = self.nic is None
+        if self._default_nic:
+            self._set_default_nic()
+
+    def _set_default_nic(self):
+        """
+        Use the interface of the default route.
+        """
+        nic = 'lo'
+        for name, interface in self.py3.network_interfaces().items():
+            if interface['default_route']:
+                nic = name
+                break
+        if nic != self.nic:
+            self.nic = nic
+            # the counters of the new interface are the starting point
+            self.old_received = self.old_transmitted = None
             self.py3.log('selected nic: %s' % self.nic)
 
     def netdata(self):
         """
         Calculate network speed and network traffic.
         """
+        if self._default_nic:
+            self._set_default_nic()
         data = GetData(self.nic)
         received_bytes, transmitted_bytes = data.netBytes()
+        if self.old_received is None:
+            self.old_received = received_bytes
+            self.old_transmitted = transmitted_bytes
 
         # net_speed (statistic)
         down = (received_bytes - self.old_received) / 1024.
@@ -2,6 +2,10 @@
 """
 Determine if you have an Internet Connection.
 
+There can be no connection without a default route, so the url is only
+checked when there is one.  The module is updated as soon as the network
+interfaces or routes change.
+
 Configuration parameters:
     cache_timeout: refresh interval for this module (default 10)
     format: display format for this module (default '{icon}')
@@ -66,8 +70,21 @@ class Py3status:
     def post_config_hook(self):
         self.color_on = self.py3.COLOR_ON or self.py3.COLOR_GOOD
         self.color_off = self.py3.COLOR_OFF or self.py3.COLOR_BAD
+        try:
+            self.py3.network_subscribe(self.py3.update)
+            self._follow_routes = True
+        except Exception:
+            self._follow_routes = False
+
+    def _default_route(self):
+        for interface in self.py3.network_interfaces().values():
+            if interface['default_route'] and interface['carrier']:
+                return True
+        return False
 
     def _connection_present(self):
+        if self._follow_routes and not self._default_route():
+            return False
         if '://' in self.url:
             try:
                 urlopen(self.url, timeout=self.timeout)
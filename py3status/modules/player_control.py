@@ -41,7 +41,7 @@ import os
 import subprocess
 
 try:
-    import dbus
+    import pydbus  # noqa
     dbus_available = True
 except:
     dbus_available = False
@@ -167,9 +167,9 @@ class Py3status:
                 if self.debug:
                     self.py3.log('found player: %s' % player_name)
 
-                # those players need the dbus module
+                # those players need the pydbus module
                 if player_name in ('vlc') and not dbus_available:
-                    self.py3.log('%s requires the dbus python module' % player_name)
+                    self.py3.log('%s requires the pydbus python module' % player_name)
                     return None
 
                 return player_name
@@ -179,9 +179,9 @@ class Py3status:
     def _get_vlc(self):
         mpris = 'org.mpris.MediaPlayer2'
         mpris_slash = '/' + mpris.replace('.', '/')
-        bus = dbus.SessionBus()
-        proxy = bus.get_object(mpris + '.vlc', mpris_slash)
-        return dbus.Interface(proxy, dbus_interface=mpris + '.Player')
+        # the proxy is cached on the session bus py3status shares
+        proxy = self.py3.dbus_get(mpris + '.vlc', mpris_slash)
+        return proxy[mpris + '.Player']
 
     def player_control(self):
         return dict(
@@ -13,12 +13,9 @@ Configuration parameters:
     format_separator: separator between minutes:seconds (default ':')
     max_breaks: maximum number of breaks (default 4)
     num_progress_bars: number of progress bars (default 5)
-    sound_break_end: break end sound (file path) (requires pyglet
-        or pygame) (default None)
-    sound_pomodoro_end: pomodoro end sound (file path) (requires pyglet
-        or pygame) (default None)
-    sound_pomodoro_start: pomodoro start sound (file path) (requires pyglet
-        or pygame) (default None)
+    sound_break_end: break end sound (file path) (default None)
+    sound_pomodoro_end: pomodoro end sound (file path) (default None)
+    sound_pomodoro_start: pomodoro start sound (file path) (default None)
     timer_break: normal break time (seconds) (default 300)
     timer_long_break: long break time (seconds) (default 900)
     timer_pomodoro: pomodoro time (seconds) (default 1500)
@@ -34,6 +31,9 @@ Color options:
     color_degraded: Pomodoro break
     color_good: Pomodoro active
 
+Requires:
+    paplay or play: to play sounds
+
 i3status.conf example:
 ```
 pomodoro {
@@ -51,57 +51,7 @@ running
 """
 
 from math import ceil
-from threading import Timer
 from time import time
-import os
-
-try:
-    from pygame import mixer as pygame_mixer
-except ImportError:
-    pygame_mixer = None
-
-try:
-    import pyglet
-except ImportError:
-    pyglet = None
-
-
-class Player(object):
-    _default = '_silence'
-
-    def __init__(self):
-        if pyglet is not None:
-            pyglet.options['audio'] = ('pulse', 'silent')
-            self._player = pyglet.media.Player()
-            self._default = '_pyglet'
-        elif pygame_mixer is not None:
-            pygame_mixer.init()
-            self._default = '_pygame'
-
-    def _silence(self, sound_fname):
-        pass
-
-    def _pygame(self, sound_fname):
-        pygame_mixer.music.load(sound_fname)
-        pygame_mixer.music.play()
-
-    def _pyglet(self, sound_fname):
-        res_dir, f = os.path.split(sound_fname)
-
-        if res_dir not in pyglet.resource.path:
-            pyglet.resource.path = [res_dir]
-            pyglet.resource.reindex()
-
-        self._player.queue(pyglet.resource.media(f, streaming=False))
-        self._player.play()
-
-    @property
-    def available(self):
-        return self._default != '_silence'
-
-    def __call__(self, sound_fname):
-        getattr(self, self._default)(os.path.expanduser(sound_fname))
-
 
 PROGRESS_BAR_ITEMS = u"▏▎▍▌▋▊▉"
 
@@ -134,11 +84,14 @@ class Py3status:
         self._prefix = 'Pomodoro'
         self._timer = None
         self._end_time = None
-        self._player = Player()
         self._format = 'Pomodoro {time}'
         self._alert = False
         if self.display_bar is True:
             self.format = u'{bar}'
+        for sound in (self.sound_break_end, self.sound_pomodoro_end,
+                      self.sound_pomodoro_start):
+            if sound:
+                self.py3.load_sound(sound)
         self._initialized = True
 
     def _time_up(self):
@@ -197,8 +150,9 @@ class Py3status:
                 self._end_time = time() + self._time_left
                 if self._timer:
                     self._timer.cancel()
-                self._timer = Timer(self._time_left, self._time_up)
-                self._timer.start()
+                self._timer = self.py3.call_later(
+                    self._time_left, self._time_up
+                )
                 if self._active:
                     self._play_sound(self.sound_pomodoro_start)
 
@@ -299,15 +253,7 @@ class Py3status:
         if not sound_fname:
             return
 
-        if not self._player.available:
-            self.py3.log("pomodoro module: the pyglet or pygame "
-                         "library are required to play sounds")
-            return
-
-        try:
-            self._player(sound_fname)
-        except Exception:
-            return
+        self.py3.play_sound(sound_fname)
 
 
 if __name__ == "__main__":
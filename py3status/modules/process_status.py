@@ -61,14 +61,7 @@ class Py3status:
         self.color_off = self.py3.COLOR_OFF or self.py3.COLOR_BAD
 
     def _is_running(self):
-        try:
-            pgrep = ["pgrep", self.process]
-            if self.full:
-                pgrep = ["pgrep", "-f", self.process]
-            self.py3.command_output(pgrep)
-            return True
-        except:
-            return False
+        return self.py3.is_process_running(self.process, full=self.full)
 
     def process_status(self):
         if self.process is None:
@@ -76,6 +76,8 @@ import re
 import math
 from time import time
 
+from py3status.segment import freeze, update_item
+
 HEX_RE = re.compile('#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})')
 
 
@@ -174,7 +176,9 @@ class Py3status:
         for item in self.items:
             out = self.py3.get_output(item)
             if out and 'separator' not in out[-1]:
-                out[-1]['separator'] = True
+                # module output is shared so overlay the item to change it
+                out = out[:-1] + [update_item(freeze(out[-1]),
+                                              {'separator': True})]
             output += out
         return output
 
@@ -202,10 +206,9 @@ class Py3status:
             if self.multi_color:
                 offset = (self.active_color + (index * step)) % len(self.colors)
                 color = self.colors[offset]
-            obj = item.copy()
-            if self.force or not obj.get('color'):
-                obj['color'] = color
-            output.append(obj)
+            if self.force or not item.get('color'):
+                item = update_item(freeze(item), {'color': color})
+            output.append(item)
 
         composites = {'output': self.py3.composite_create(output)}
         rainbow = self.py3.safe_format(self.format, composites)
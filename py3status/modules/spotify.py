@@ -37,6 +37,7 @@ spotify {
 ```
 
 Requires:
+    pydbus: python library module
     spotify (>=1.0.27.71.g0a26e3b2)
 
 @author Pierre Guilbert, Jimmy Garpehäll, sondrele, Andrwe
@@ -52,9 +53,12 @@ stopped
 """
 
 from datetime import timedelta
-import dbus
 import re
 
+SPOTIFY = 'org.mpris.MediaPlayer2.spotify'
+SPOTIFY_PATH = '/org/mpris/MediaPlayer2'
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+
 
 class Py3status:
     """
@@ -107,16 +111,15 @@ class Py3status:
         """
         Get the current song metadatas (artist - title)
         """
-        bus = dbus.SessionBus()
         try:
-            self.__bus = bus.get_object('org.mpris.MediaPlayer2.spotify',
-                                        '/org/mpris/MediaPlayer2')
-            self.player = dbus.Interface(
-                self.__bus, 'org.freedesktop.DBus.Properties')
+            # the properties are fetched once on the shared session bus and
+            # then kept up to date from spotify's signals.
+            properties = self.py3.dbus_properties(
+                SPOTIFY, SPOTIFY_PATH, PLAYER_INTERFACE
+            )
 
             try:
-                metadata = self.player.Get('org.mpris.MediaPlayer2.Player',
-                                           'Metadata')
+                metadata = properties['Metadata']
                 album = metadata.get('xesam:album')
                 artist = metadata.get('xesam:artist')[0]
                 microtime = metadata.get('mpris:length')
@@ -126,9 +129,7 @@ class Py3status:
                     album = self._sanitize_title(album)
                     title = self._sanitize_title(title)
 
-                playback_status = self.player.Get(
-                    'org.mpris.MediaPlayer2.Player', 'PlaybackStatus'
-                )
+                playback_status = properties['PlaybackStatus']
                 if playback_status.strip() == 'Playing':
                     color = self.py3.COLOR_PLAYING or self.py3.COLOR_GOOD
                 else:
@@ -20,7 +20,11 @@ SAMPLE OUTPUT
 """
 
 import json
+import os
+
 STRING_NOT_INSTALLED = "isn't installed"
+# files that change whenever the task database does
+DATA_FILES = ['pending.data', 'taskchampion.sqlite3']
 
 
 class Py3status:
@@ -33,14 +37,51 @@ class Py3status:
     def post_config_hook(self):
         if not self.py3.check_commands('task'):
             raise Exception(STRING_NOT_INSTALLED)
+        location = self._get_data_location()
+        self.data_files = [os.path.join(location, x) for x in DATA_FILES]
+        self.last_signature = None
+        self.task_result = None
 
-    def taskWarrior(self):
+    def _get_data_location(self):
+        try:
+            location = self.py3.command_output(
+                'task rc.verbose:nothing _get rc.data.location').strip()
+        except self.py3.CommandError:
+            location = None
+        if not location:
+            location = os.environ.get('TASKDATA', '~/.task')
+        return os.path.expanduser(location)
+
+    def _get_signature(self):
+        """
+        Get the modification times of the task data files.  If none of the
+        files can be found we return None and always query taskwarrior.
+        """
+        signature = []
+        for data_file in self.data_files:
+            try:
+                stat = os.stat(data_file)
+            except OSError:
+                continue
+            signature.append((data_file, stat.st_mtime, stat.st_size))
+        return tuple(signature) or None
+
+    def _get_tasks(self):
         def describeTask(taskObj):
             return str(taskObj['id']) + ' ' + taskObj['description']
 
-        task_command = 'task start.before:tomorrow status:pending export'
+        # only export the active tasks rather than the whole database
+        task_command = 'task rc.verbose:nothing +ACTIVE export'
         task_json = json.loads(self.py3.command_output(task_command))
-        task_result = ', '.join(map(describeTask, task_json))
+        return ', '.join(map(describeTask, task_json))
+
+    def taskWarrior(self):
+        # only run task when the database has changed
+        signature = self._get_signature()
+        if signature is None or signature != self.last_signature:
+            self.task_result = self._get_tasks()
+            self.last_signature = signature
+        task_result = self.task_result
         return {
             'cached_until': self.py3.time_in(self.cache_timeout),
             'full_text': self.py3.safe_format(self.format, {'task': task_result})
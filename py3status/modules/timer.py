@@ -46,7 +46,6 @@ paused
 """
 
 from time import time
-from threading import Timer
 
 
 class Py3status:
@@ -65,6 +64,8 @@ class Py3status:
         self.alarm_timer = None
         self.alarm = False
         self.done = False
+        if self.sound:
+            self.py3.load_sound(self.sound)
 
     def _time_up(self):
         """
@@ -77,7 +78,7 @@ class Py3status:
         if self.sound:
             self.py3.play_sound(self.sound)
             self.alarm = True
-        self.timer()
+        self.py3.update()
 
     def timer(self):
 
@@ -177,8 +178,9 @@ class Py3status:
                 if self.alarm_timer:
                     self.alarm_timer.cancel()
                 self.done = False
-                self.alarm_timer = Timer(self.time_left or self.time, self._time_up)
-                self.alarm_timer.start()
+                self.alarm_timer = self.py3.call_later(
+                    self.time_left or self.time, self._time_up
+                )
 
         if button == 2:
             self.running = False
@@ -2,9 +2,10 @@
 """
 Display the current transfer rates of a tor instance
 
+Tor reports the bandwidth used each second, the module is updated when the
+displayed rates change.
+
 Configuration parameters:
-    cache_timeout: An integer specifying the cache life-time of the modules
-        output in seconds (default 2)
     control_address: The address on which the Tor daemon listens for control
         connections (default "127.0.0.1")
     control_password: The password to use for the Tor control connection
@@ -17,12 +18,18 @@ Configuration parameters:
         (default "[\?min_length=12 {rate:.1f} {unit}]")
     rate_unit: The unit to use for the transfer rates
         (default "B/s")
+    rate_window: The number of seconds the rates are averaged over
+        (default 5)
+    reconnect_timeout: How long to wait in seconds before reconnecting to
+        Tor, doubled after each failure (default 2)
     si_units: A boolean value selecting whether or not to use SI units
         (default False)
 
 Format placeholders:
     {down} The incoming transfer rate
+    {down_peak} The highest incoming transfer rate in the window
     {up} The outgoing transfer rate
+    {up_peak} The highest outgoing transfer rate in the window
 
 format_value placeholders:
     {rate} The current transfer-rate's value
@@ -35,7 +42,7 @@ Example:
 
 ```
 tor_rate {
-    cache_timeout = 10
+    reconnect_timeout = 10
     format = "IN: {down} | OUT: {up}"
     control_port = 1337
     control_password = "TertiaryAdjunctOfUnimatrix01"
@@ -51,87 +58,179 @@ order += "tor_rate"
 SAMPLE OUTPUT
 {'full_text': u'\u2191 652.3 B/s \u2193 938.1 B/s'}
 """
+from __future__ import division
+
+from collections import deque
 
 from stem import ProtocolError, SocketError
 from stem.connection import AuthenticationFailure
-from stem.control import Controller, EventType
+from stem.control import Controller, EventType, State
 
 ERROR_AUTHENTICATION = 'Error: Failed to authenticate with Tor daemon!'
 ERROR_CONNECTION = 'Error: Failed to establish control connection!'
 ERROR_PROTOCOL = 'Error: Failed to register event handler!'
 
+# longest wait in seconds between attempts to reconnect
+MAX_BACKOFF = 300
+
+
+class RateWindow:
+    """
+    Ring buffer of the last size rates with their average and peak, both
+    kept up to date in constant (amortized) time as rates are added.
+    """
+
+    def __init__(self, size):
+        self.rates = deque(maxlen=size)
+        self.total = 0
+        # decreasing rates that may still become the peak
+        self._peaks = deque()
+        self._count = 0
+
+    def add(self, rate):
+        if len(self.rates) == self.rates.maxlen:
+            self.total -= self.rates[0]
+            # the oldest rate leaves the window
+            if self._peaks[0][1] == self._count - self.rates.maxlen:
+                self._peaks.popleft()
+        self.rates.append(rate)
+        self.total += rate
+        while self._peaks and self._peaks[-1][0] <= rate:
+            self._peaks.pop()
+        self._peaks.append((rate, self._count))
+        self._count += 1
+
+    @property
+    def average(self):
+        if not self.rates:
+            return 0
+        return self.total / len(self.rates)
+
+    @property
+    def peak(self):
+        if not self._peaks:
+            return 0
+        return self._peaks[0][0]
+
 
 class Py3status:
     """
     """
-    cache_timeout = 2
     control_address = '127.0.0.1'
     control_password = None
     control_port = 9051
     format = u'↑ {up} ↓ {down}'
     format_value = '[\?min_length=12 {rate:.1f} {unit}]'
     rate_unit = 'B/s'
+    rate_window = 5
+    reconnect_timeout = 2
     si_units = False
 
+    class Meta:
+        deprecated = {
+            'rename': [
+                {
+                    'param': 'cache_timeout',
+                    'new': 'reconnect_timeout',
+                    'msg': 'obsolete parameter use `reconnect_timeout`',
+                },
+            ],
+        }
+
     def post_config_hook(self):
         self._auth_failure = False
-        self._down = 0
+        self._backoff = self.reconnect_timeout
+        self._control = None
+        self._down = RateWindow(self.rate_window)
         self._handler_active = False
-        self._up = 0
+        self._text = None
+        self._up = RateWindow(self.rate_window)
 
     def tor_rate(self, outputs, config):
-        text = ''
-        if not self._handler_active and not self._auth_failure:
-            try:
-                self._register_event_handler()
-            except ProtocolError:
-                text = ERROR_PROTOCOL
-            except SocketError:
-                text = ERROR_CONNECTION
-            except AuthenticationFailure:
-                text = ERROR_AUTHENTICATION
-                self._auth_failure = True
-        elif self._auth_failure:
+        if self._auth_failure:
             text = ERROR_AUTHENTICATION
+            cached_until = self.py3.CACHE_FOREVER
+        elif self._handler_active:
+            # new rates are pushed by _handle_event()
+            text = self._text or self._format_rates()
+            cached_until = self.py3.CACHE_FOREVER
         else:
-            text = self.py3.safe_format(self.format, self._get_rates())
+            try:
+                self._register_event_handler()
+                self._backoff = self.reconnect_timeout
+                text = self._format_rates()
+                cached_until = self.py3.CACHE_FOREVER
+            except (ProtocolError, SocketError, AuthenticationFailure) as e:
+                self._close()
+                if isinstance(e, AuthenticationFailure):
+                    text = ERROR_AUTHENTICATION
+                    self._auth_failure = True
+                elif isinstance(e, SocketError):
+                    text = ERROR_CONNECTION
+                else:
+                    text = ERROR_PROTOCOL
+                # wait longer after each failure to reconnect
+                cached_until = self.py3.time_in(self._backoff)
+                self._backoff = min(self._backoff * 2, MAX_BACKOFF)
 
         return {
-            'cached_until': self.py3.time_in(self.cache_timeout),
+            'cached_until': cached_until,
             'full_text': text,
         }
 
+    def _format_rate(self, rate):
+        rate, unit = self.py3.format_units(rate,
+                                           unit=self.rate_unit,
+                                           si=self.si_units)
+        return self.py3.safe_format(self.format_value, {
+            'rate': rate,
+            'unit': unit,
+        })
+
     def _get_rates(self):
-        up, up_unit = self.py3.format_units(self._up,
-                                            unit=self.rate_unit,
-                                            si=self.si_units)
-        down, down_unit = self.py3.format_units(self._down,
-                                                unit=self.rate_unit,
-                                                si=self.si_units)
         return {
-            'up': self.py3.safe_format(self.format_value, {
-                'rate': up,
-                'unit': up_unit,
-            }),
-            'down': self.py3.safe_format(self.format_value, {
-                'rate': down,
-                'unit': down_unit,
-            }),
+            'down': self._format_rate(self._down.average),
+            'down_peak': self._format_rate(self._down.peak),
+            'up': self._format_rate(self._up.average),
+            'up_peak': self._format_rate(self._up.peak),
         }
 
+    def _format_rates(self):
+        self._text = self.py3.safe_format(self.format, self._get_rates())
+        return self._text
+
     def _handle_event(self, event):
-        self._down = event.read
-        self._up = event.written
+        self._down.add(event.read)
+        self._up.add(event.written)
+        # only update the bar if what it shows has changed
+        text = self._text
+        if text is None or list(self._format_rates()) != list(text):
+            self.py3.update()
+
+    def _handle_status(self, controller, state, timestamp):
+        if state == State.CLOSED and self._handler_active:
+            # reconnect when the module next runs
+            self._handler_active = False
+            self.py3.update()
+
+    def _close(self):
+        if self._control is not None:
+            self._control.close()
+            self._control = None
 
     def _register_event_handler(self):
+        self._close()
         self._control = Controller.from_port(address=self.control_address,
                                              port=self.control_port)
-        if self.control_password:
-            self._control.authenticate(password=self.control_password)
-        self._control.add_event_listener(lambda e: self._handle_event(e),
-                                         EventType.BW)
+        self._control.authenticate(password=self.control_password)
+        self._control.add_status_listener(self._handle_status)
+        self._control.add_event_listener(self._handle_event, EventType.BW)
         self._handler_active = True
 
+    def kill(self):
+        self._handler_active = False
+        self._close()
+
 
 if __name__ == "__main__":
     from py3status.module_test import module_test
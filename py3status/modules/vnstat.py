@@ -5,6 +5,8 @@ Display vnstat statistics.
 Configuration parameters:
     cache_timeout: refresh interval for this module (default 180)
     coloring: see coloring rules below (default {})
+    database_dir: directory of the vnstat database, None to use the
+        DatabaseDir of ~/.vnstatrc or /etc/vnstat.conf (default None)
     format: display format for this module (default '{total}')
     initial_multi: set to 1 to disable first bytes
         (default 1024)
@@ -44,8 +46,19 @@ SAMPLE OUTPUT
 """
 
 from __future__ import division  # python2 compatibility
+
+import os
+import re
+
+from subprocess import Popen, PIPE
+from time import strftime
+
 STRING_ERROR = 'vnstat: returned wrong'
 STRING_UNAVAILABLE = "vnstat: isn't installed"
+# vnstat updates its database files here unless configured otherwise
+DATABASE_DIR = '/var/lib/vnstat'
+# the vnstat configuration files, in the order vnstat reads them
+CONFIG_FILES = ['~/.vnstatrc', '/etc/vnstat.conf']
 
 
 class Py3status:
@@ -54,6 +67,7 @@ class Py3status:
     # available configuration parameters
     cache_timeout = 180
     coloring = {}
+    database_dir = None
     format = "{total}"
     initial_multi = 1024
     left_align = 0
@@ -74,6 +88,11 @@ class Py3status:
         # list of units, first one - value/initial_multi, second - value/1024,
         # third - value/1024^2, etc...
         self.units = ["kb", "mb", "gb", "tb", ]
+        self.available = bool(self.py3.check_commands(["vnstat"]))
+        if self.database_dir is None:
+            self.database_dir = self._get_database_dir()
+        self.last_signature = None
+        self.last_stat = None
 
     def _divide_and_format(self, value):
         # Divide a value and return formatted string
@@ -85,23 +104,86 @@ class Py3status:
                 break
         return self.value_format.format(value=value, unit=unit)
 
+    def _get_database_dir(self):
+        """
+        Return the DatabaseDir vnstat is configured with.
+        """
+        setting = re.compile(r'\s*DatabaseDir\s+"?([^"\n]+)')
+        for path in CONFIG_FILES:
+            try:
+                with open(os.path.expanduser(path)) as f:
+                    for line in f:
+                        match = setting.match(line)
+                        if match:
+                            return match.group(1).strip()
+            except IOError:
+                continue
+        return DATABASE_DIR
+
+    def _get_signature(self):
+        """
+        The database only changes when vnstat writes to it, or when a new
+        period starts.  If the database cannot be found we return None and
+        always read the statistics.
+        """
+        try:
+            names = sorted(os.listdir(self.database_dir))
+        except OSError:
+            return None
+        signature = [strftime('%Y%m%d')]
+        for name in names:
+            try:
+                signature.append(
+                    os.stat(os.path.join(self.database_dir, name)).st_mtime)
+            except OSError:
+                pass
+        return tuple(signature)
+
+    def _read_stat(self):
+        """
+        Stream the database dump and stop as soon as we find the counters for
+        the current period, the rest of the history is never read.
+        """
+        period = "{};0;".format(self.statistics_type)
+        process = Popen(["vnstat", "--dumpdb"], stdout=PIPE,
+                        universal_newlines=True)
+        try:
+            # readline() as iterating the pipe reads ahead in python 2
+            for line in iter(process.stdout.readline, ''):
+                if line.startswith(period):
+                    break
+            else:
+                return None
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+
+        type, number, ts, rxm, txm, rxk, txk, fill = line.strip().split(";")
+        up = (int(txm) * 1024 + int(txk)) * 1024
+        down = (int(rxm) * 1024 + int(rxk)) * 1024
+        return {"up": up, "down": down, "total": up + down}
+
     def vntstat(self):
-        if not self.py3.check_commands(["vnstat"]):
+        if not self.available:
             return {
                 'cached_until': self.py3.CACHE_FOREVER,
                 'color': self.py3.COLOR_BAD,
                 'full_text': STRING_UNAVAILABLE
             }
 
-        def filter_stat():
-            # Get statistics in list of lists of words
-            out = self.py3.command_output(["vnstat", "--dumpdb"]).splitlines()
-            for x in out:
-                if x.startswith("{};0;".format(self.statistics_type)):
-                    return x
-        try:
-            type, number, ts, rxm, txm, rxk, txk, fill = filter_stat().split(";")
-        except:
+        signature = self._get_signature()
+        if signature is None or signature != self.last_signature:
+            try:
+                self.last_stat = self._read_stat()
+            except (OSError, ValueError):
+                self.last_stat = None
+            # retry next time if we failed to read the statistics
+            if self.last_stat:
+                self.last_signature = signature
+        stat = self.last_stat
+        if not stat:
             return {
                 'cached_until': self.py3.time_in(self.cache_timeout),
                 'color': self.py3.COLOR_BAD,
@@ -110,10 +192,6 @@ class Py3status:
 
         response = {'cached_until': self.py3.time_in(self.cache_timeout)}
 
-        up = (int(txm) * 1024 + int(txk)) * 1024
-        down = (int(rxm) * 1024 + int(rxk)) * 1024
-        stat = {"up": up, "down": down, "total": up + down}
-
         keys = list(self.coloring.keys())
         keys.sort()
         for k in keys:
@@ -4,6 +4,8 @@ Drop-in replacement for i3status run_watch VPN module.
 
 Expands on the i3status module by displaying the name of the connected vpn
 using pydbus. Asynchronously updates on dbus signals unless check_pid is True.
+The signals are received on the DBus connection py3status shares between
+modules.
 
 Configuration parameters:
     cache_timeout: How often to refresh in seconds when check_pid is True.
@@ -34,12 +36,12 @@ off
 {'color': '#FF0000', 'full_text': u'VPN: no'}
 """
 
-from pydbus import SystemBus
-from gi.repository import GObject
-from threading import Thread
 from os import path
 from time import sleep
 
+NETWORK_MANAGER = 'org.freedesktop.NetworkManager'
+NETWORK_MANAGER_PATH = '/org/freedesktop/NetworkManager'
+
 
 class Py3status:
     # Available Configuration Parameters
@@ -49,50 +51,46 @@ class Py3status:
     pidfile = '/sys/class/net/vpn0/dev_id'
 
     def post_config_hook(self):
-        self.thread_started = False
-        self.active = []
-
-    def _start_handler_thread(self):
-        """Called once to start the event handler thread."""
-        # Create handler thread
-        t = Thread(target=self._start_loop)
-        t.daemon = True
-
-        # Start handler thread
-        t.start()
-        self.thread_started = True
-
-    def _start_loop(self):
-        """Starts main event handler loop, run in handler thread t."""
-        # Create our main loop, get our bus, and add the signal handler
-        loop = GObject.MainLoop()
-        bus = SystemBus()
-        manager = bus.get(".NetworkManager")
-        manager.onPropertiesChanged = self._vpn_signal_handler
-
-        # Loop forever
-        loop.run()
-
-    def _vpn_signal_handler(self, args):
+        self.active = None
+        self.vpn = None
+        if not self.check_pid:
+            self.py3.dbus_subscribe(
+                self._vpn_signal_handler,
+                sender=NETWORK_MANAGER,
+                iface='org.freedesktop.DBus.Properties',
+                signal='PropertiesChanged',
+                object_path=NETWORK_MANAGER_PATH,
+                arg0=NETWORK_MANAGER,
+                system_bus=True,
+            )
+
+    def _vpn_signal_handler(self, sender, object_path, iface, signal, params):
         """Called on NetworkManager PropertiesChanged signal"""
-        # Args is a dictionary of changed properties
         # We only care about changes in ActiveConnections
-        active = "ActiveConnections"
-        # Compare current ActiveConnections to last seen ActiveConnections
-        if active in args.keys() and sorted(self.active) != sorted(args[active]):
-            self.active = args[active]
+        if "ActiveConnections" in params[1]:
             self.py3.update()
 
     def _get_vpn_status(self):
         """Returns None if no VPN active, Id if active."""
+        # The properties are kept up to date from the signals so reading
+        # them does not use the bus.
+        properties = self.py3.dbus_properties(
+            NETWORK_MANAGER, NETWORK_MANAGER_PATH, NETWORK_MANAGER,
+            system_bus=True
+        )
+        active = sorted(properties.get("ActiveConnections", []))
+        if active == self.active:
+            return self.vpn
+        self.active = active
+        self.vpn = None
         # Sleep for a bit to let any changes in state finish
         sleep(0.3)
         # Check if any active connections are a VPN
-        bus = SystemBus()
-        for name in self.active:
-            conn = bus.get(".NetworkManager", name)
+        for name in active:
+            conn = self.py3.dbus_get(NETWORK_MANAGER, name, system_bus=True)
             if conn.Vpn:
-                return conn.Id
+                self.vpn = conn.Id
+                return self.vpn
         # No active VPN
         return None
 
@@ -104,10 +102,6 @@ class Py3status:
     def return_status(self):
         """Returns response dict"""
 
-        # Start signal handler thread if it should be running
-        if not self.check_pid and not self.thread_started:
-            self._start_handler_thread()
-
         # Set color_bad as default output. Replaced if VPN active.
         name = None
         color = self.py3.COLOR_BAD
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 """
-Display WiFi bit rate, quality, signal and SSID using iw.
+Display WiFi bit rate, quality, signal and SSID.
+
+The details are asked for over nl80211, or using iw if that is not
+available.  The module is updated as soon as the link goes up or down.
 
 Configuration parameters:
     bitrate_bad: Bad bit rate in Mbit/s (default 26)
@@ -17,7 +20,8 @@ Configuration parameters:
         (default True)
     signal_bad: Bad signal strength in percent (default 29)
     signal_degraded: Degraded signal strength in percent (default 49)
-    use_sudo: Use sudo to run iw, make sure iw requires some root rights
+    use_sudo: Use sudo to run iw when nl80211 is not available, make sure
+        iw requires some root rights
         without a password by adding a sudoers entry, eg...
         '<user> ALL=(ALL) NOPASSWD:/usr/bin/iw dev,/usr/bin/iw dev [a-z]* link'
         (default False)
@@ -38,8 +42,10 @@ Color options:
     color_good: Signal strength above signal_degraded
 
 Requires:
-    iw: cli configuration utility for wireless devices
-    ip: only for {ip}. may be part of iproute2: ip routing utilities
+    iw: cli configuration utility for wireless devices, only needed if
+        nl80211 is not available
+    ip: only for {ip} if netlink is not available. may be part of iproute2:
+        ip routing utilities
 
 __Note: Some distributions eg Debian require `iw` to be run with privileges.
 In this case you will need to use the `use_sudo` configuration parameter.__
@@ -78,19 +84,30 @@ class Py3status:
         self._max_bitrate = 0
         self._ssid = ''
         self.iw_cmd = self.py3.check_commands(['iw', '/sbin/iw'])
+        try:
+            devices = list(self.py3.network_wireless())
+            self._use_iw = False
+        except Exception:
+            devices = None
+            self._use_iw = True
         # Try and guess the wifi interface
-        cmd = [self.iw_cmd, 'dev']
-        if self.use_sudo:
-            cmd.insert(0, 'sudo')
         try:
-            iw = self.py3.command_output(cmd)
-            devices = re.findall('Interface\s*([^\s]+)', iw)
+            if self._use_iw:
+                cmd = [self.iw_cmd, 'dev']
+                if self.use_sudo:
+                    cmd.insert(0, 'sudo')
+                iw = self.py3.command_output(cmd)
+                devices = re.findall('Interface\s*([^\s]+)', iw)
             if not devices or 'wlan0' in devices:
                 self.device = 'wlan0'
             else:
                 self.device = devices[0]
         except:
             pass
+        try:
+            self.py3.network_subscribe(self.py3.update)
+        except Exception:
+            pass
 
         # DEPRECATION WARNING
         format_down = getattr(self, 'format_down', None)
@@ -108,21 +125,26 @@ class Py3status:
             msg += 'parameters you should update to use the new format.'
             self.py3.log(msg)
 
-    def wifi(self):
+    def _get_link(self):
         """
-        Get WiFi status using iw.
+        Return the bitrate, its unit, the signal in dBm and the SSID of the
+        access point.
         """
-        self.signal_dbm_bad = self._percent_to_dbm(self.signal_bad)
-        self.signal_dbm_degraded = self._percent_to_dbm(self.signal_degraded)
+        if not self._use_iw:
+            info = self.py3.network_wireless().get(self.device, {})
+            bitrate = info.get('bitrate')
+            bitrate_unit = None
+            if bitrate is not None:
+                bitrate_unit = 'MBit/s'
+                if self.round_bitrate:
+                    bitrate = round(bitrate)
+            return (bitrate, bitrate_unit, info.get('signal_dbm'),
+                    info.get('ssid'))
+
         cmd = [self.iw_cmd, 'dev', self.device, 'link']
         if self.use_sudo:
             cmd.insert(0, 'sudo')
-        try:
-            iw = self.py3.command_output(cmd)
-        except:
-            return {'cache_until': self.py3.CACHE_FOREVER,
-                    'color': self.py3.COLOR_ERROR or self.py3.COLOR_BAD,
-                    'full_text': STRING_ERROR}
+        iw = self.py3.command_output(cmd)
         # bitrate
         bitrate_out = re.search('tx bitrate: ([^\s]+) ([^\s]+)', iw)
         if bitrate_out:
@@ -140,10 +162,8 @@ class Py3status:
         signal_out = re.search('signal: ([\-0-9]+)', iw)
         if signal_out:
             signal_dbm = int(signal_out.group(1))
-            signal_percent = min(self._dbm_to_percent(signal_dbm), 100)
         else:
             signal_dbm = None
-            signal_percent = None
         ssid_out = re.search('SSID: (.+)', iw)
         if ssid_out:
             ssid = ssid_out.group(1)
@@ -154,18 +174,51 @@ class Py3status:
             ssid = ssid.encode('latin-1').decode('utf-8')
         else:
             ssid = None
+        return bitrate, bitrate_unit, signal_dbm, ssid
 
-        # check command
-        if self.py3.format_contains(self.format, 'ip'):
-            cmd = ['ip', 'addr', 'list', self.device]
-            if self.use_sudo:
-                cmd.insert(0, 'sudo')
-            ip_info = self.py3.command_output(cmd)
-            ip_match = re.search('inet\s+([0-9.]+)', ip_info)
-            if ip_match:
-                ip = ip_match.group(1)
+    def _get_ip(self):
+        """
+        Return the IPv4 address of the device.
+        """
+        if not self._use_iw:
+            try:
+                interface = self.py3.network_interfaces().get(self.device, {})
+            except Exception:
+                pass
             else:
-                ip = None
+                ip4 = interface.get('ip4')
+                return ip4[0] if ip4 else None
+
+        cmd = ['ip', 'addr', 'list', self.device]
+        if self.use_sudo:
+            cmd.insert(0, 'sudo')
+        ip_info = self.py3.command_output(cmd)
+        ip_match = re.search('inet\s+([0-9.]+)', ip_info)
+        if ip_match:
+            return ip_match.group(1)
+        return None
+
+    def wifi(self):
+        """
+        Get WiFi status.
+        """
+        self.signal_dbm_bad = self._percent_to_dbm(self.signal_bad)
+        self.signal_dbm_degraded = self._percent_to_dbm(self.signal_degraded)
+        try:
+            bitrate, bitrate_unit, signal_dbm, ssid = self._get_link()
+        except:
+            return {'cache_until': self.py3.CACHE_FOREVER,
+                    'color': self.py3.COLOR_ERROR or self.py3.COLOR_BAD,
+                    'full_text': STRING_ERROR}
+
+        # signal
+        if signal_dbm is not None:
+            signal_percent = min(self._dbm_to_percent(signal_dbm), 100)
+        else:
+            signal_percent = None
+
+        if self.py3.format_contains(self.format, 'ip'):
+            ip = self._get_ip()
         else:
             ip = ''
 
@@ -8,6 +8,10 @@ This modules allows you to handle your screens outputs directly from your bar!
     - Activate the screen or screen combination on a single click
     - It will detect any newly connected or removed screen automatically
 
+When python-xlib is installed the outputs are read directly from the X server
+and only when it sends a RandR screen change event, otherwise the output of
+`xrandr` is polled.
+
 For convenience, this module also proposes some added features:
     - Dynamic parameters for POSITION and WORKSPACES assignment (see below)
     - Automatic fallback to a given screen or screen combination when no more
@@ -17,7 +21,8 @@ For convenience, this module also proposes some added features:
     - Define your own subset of output combinations to use
 
 Configuration parameters:
-    cache_timeout: how often to (re)detect the outputs (default 10)
+    cache_timeout: how often to (re)detect the outputs when the RandR
+        events are not available (default 10)
     fallback: when the current output layout is not available anymore,
         fallback to this layout if available. This is very handy if you
         have a laptop and switched to an external screen for presentation
@@ -68,6 +73,10 @@ Color options:
     color_degraded: Using a fallback layout
     color_good: Displayed layout active
 
+Requires:
+    xrandr: command line interface to RandR extension
+    python-xlib: (optional) to be told of screen changes instead of polling
+
 Example config:
 
 ```
@@ -94,11 +103,26 @@ single
 
 """
 
+import os
+
 from collections import deque
 from collections import OrderedDict
 from itertools import combinations
+from select import select
+from threading import Thread
 from time import sleep
 
+try:
+    from Xlib import display as xdisplay
+    from Xlib.ext import randr
+    xlib_available = True
+except ImportError:
+    xlib_available = False
+
+# RandR output connection states
+RR_CONNECTED = 0
+RR_DISCONNECTED = 1
+
 
 class Py3status:
     """
@@ -136,61 +160,175 @@ class Py3status:
         self.active_comb = None
         self.active_layout = None
         self.active_mode = 'extend'
+        self.available_combinations = deque()
+        self.combinations_map = {}
+        self.connected = None
         self.displayed = None
+        self.layout = None
         self.max_width = 0
-
-    def _get_layout(self):
+        self._combinations_cache = {}
+        self._display = None
+        self._events = None
+        self._killed = False
+        self._layout_changed = True
+        self._listener = None
+        self._listening = False
+        self._wakeup = None
+
+    def _start_listener(self):
         """
-        Get the outputs layout from xrandr and try to detect the
-        currently active layout as best as we can on start.
+        Ask the X server for RandR screen change events and start a thread
+        waiting for them, so the layout is only read again when it changes.
         """
-        connected = list()
-        active_layout = list()
-        disconnected = list()
-        layout = OrderedDict({
-            'connected': OrderedDict(),
-            'disconnected': OrderedDict()
-        })
+        if not xlib_available:
+            return
+        try:
+            # the events are read on their own connection as the thread
+            # blocks waiting for them.
+            events = xdisplay.Display()
+            if not events.has_extension('RANDR'):
+                events.close()
+                return
+            events.screen().root.xrandr_select_input(
+                randr.RRScreenChangeNotifyMask |
+                randr.RROutputChangeNotifyMask
+            )
+            events.flush()
+            self._display = xdisplay.Display()
+        except Exception as err:
+            self.py3.log('xrandr events unavailable error="{}"'.format(err))
+            return
+        # kill() writes to the pipe to wake the thread and then closes the
+        # connection it was waiting on.
+        self._events = events
+        wakeup, self._wakeup = os.pipe()
+        self._listening = True
+        self._listener = Thread(target=self._listen, args=(events, wakeup))
+        self._listener.daemon = True
+        self._listener.start()
+
+    def _listen(self, events, wakeup):
+        """
+        Wait for RandR events and update the module when one arrives.
+        """
+        try:
+            while not self._killed:
+                if not events.pending_events():
+                    select([events, wakeup], [], [])
+                    if self._killed:
+                        break
+                events.next_event()
+                self._layout_changed = True
+                self.py3.update()
+        except Exception as err:
+            if not self._killed:
+                self.py3.log('xrandr events error="{}"'.format(err))
+        os.close(wakeup)
+        if not self._killed:
+            # poll xrandr from now on
+            self._listening = False
+            self._layout_changed = True
+            self._events = None
+            events.close()
+
+    def _read_outputs(self):
+        """
+        Return a list of (output, state, active) for the connected and
+        disconnected outputs.
+        """
+        if self._listening:
+            try:
+                return self._read_outputs_randr()
+            except Exception as err:
+                self.py3.log('xrandr randr error="{}"'.format(err))
+        return self._read_outputs_xrandr()
 
+    def _read_outputs_randr(self):
+        """
+        Read the outputs from the X server.  The server has already probed
+        them when it sent its event so the current resources are used.
+        """
+        outputs = []
+        root = self._display.screen().root
+        resources = root.xrandr_get_screen_resources_current()
+        for output in resources.outputs:
+            info = self._display.xrandr_get_output_info(
+                output, resources.config_timestamp)
+            name = info.name
+            if isinstance(name, bytes):
+                name = name.decode('utf-8')
+            if info.connection == RR_CONNECTED:
+                outputs.append((name, 'connected', info.crtc != 0))
+            elif info.connection == RR_DISCONNECTED:
+                outputs.append((name, 'disconnected', False))
+        return outputs
+
+    def _read_outputs_xrandr(self):
+        """
+        Parse the outputs from the output of xrandr.
+        """
+        outputs = []
         current = self.py3.command_output('xrandr')
         for line in current.splitlines():
             try:
                 s = line.split(' ')
                 if s[1] == 'connected':
-                    output, state = s[0], s[1]
-                    if s[2][0] == '(':
-                        mode, infos = None, ' '.join(s[2:]).strip('\n')
-                    else:
-                        mode, infos = s[2], ' '.join(s[3:]).strip('\n')
-                        active_layout.append(output)
-                    connected.append(output)
+                    outputs.append((s[0], s[1], s[2][0] != '('))
                 elif s[1] == 'disconnected':
-                    output, state = s[0], s[1]
-                    mode, infos = None, ' '.join(s[2:]).strip('\n')
-                    disconnected.append(output)
-                else:
-                    continue
+                    outputs.append((s[0], s[1], False))
             except Exception as err:
                 self.py3.log('xrandr error="{}"'.format(err))
-            else:
-                layout[state][output] = {
-                    'infos': infos,
-                    'mode': mode,
-                    'state': state
-                }
+        return outputs
+
+    def _get_layout(self):
+        """
+        Get the outputs layout and try to detect the currently active
+        layout as best as we can on start.
+        """
+        active_layout = list()
+        layout = OrderedDict({
+            'connected': OrderedDict(),
+            'disconnected': OrderedDict()
+        })
+
+        for output, state, active in self._read_outputs():
+            if active:
+                active_layout.append(output)
+            layout[state][output] = {
+                'active': active,
+                'state': state
+            }
 
         # initialize the active layout
         if self.active_layout is None:
             self.active_comb = tuple(active_layout)
-            self.active_layout = self._get_string_and_set_width(
+            self.active_layout = self._get_string(
                 tuple(active_layout), self.active_mode)
 
         return layout
 
     def _set_available_combinations(self):
         """
-        Generate all connected outputs combinations and
-        set the max display width while iterating.
+        Set the combinations of the connected outputs.  They are only
+        generated once for each set of connected outputs.
+        """
+        connected = tuple(self.layout['connected'])
+        if connected == self.connected:
+            # keep the current selection
+            return
+        if connected not in self._combinations_cache:
+            self._combinations_cache[connected] = self._get_combinations()
+        available, combinations_map, max_width = self._combinations_cache[
+            connected]
+        self.available_combinations = deque(available)
+        self.combinations_map = combinations_map
+        self.connected = connected
+        self.max_width = max_width
+
+    def _get_combinations(self):
+        """
+        Generate all connected outputs combinations and the max display
+        width of them.
         """
         available = set()
         combinations_map = {}
@@ -199,11 +337,10 @@ class Py3status:
         if self.output_combinations:
             whitelist = self.output_combinations.split('|')
 
-        self.max_width = 0
         for output in range(len(self.layout['connected'])):
             for comb in combinations(self.layout['connected'], output + 1):
                 for mode in ['clone', 'extend']:
-                    string = self._get_string_and_set_width(comb, mode)
+                    string = self._get_string(comb, mode)
                     if whitelist and string not in whitelist:
                         continue
                     if len(comb) == 1:
@@ -216,17 +353,17 @@ class Py3status:
         if whitelist:
             available = reversed([comb for comb in whitelist
                                   if comb in available])
+        available = list(available)
 
-        self.available_combinations = deque(available)
-        self.combinations_map = combinations_map
+        max_width = max([len(string) for string in available] or [0])
+        return available, combinations_map, max_width
 
-    def _get_string_and_set_width(self, combination, mode):
+    def _get_string(self, combination, mode):
         """
-        Construct the string to be displayed and record the max width.
+        Construct the string to be displayed.
         """
         show = '{}'.format(self._separator(mode)).join(combination)
         show = show.rstrip('{}'.format(self._separator(mode)))
-        self.max_width = max([self.max_width, len(show)])
         return show
 
     def _choose_what_to_display(self, force_refresh=False):
@@ -340,9 +477,9 @@ class Py3status:
 
     def _refresh_py3status(self):
         """
-        Send a SIGUSR1 signal to py3status to force a bar refresh.
+        Force a refresh of the whole bar.
         """
-        self.py3.command_run('killall -s USR1 py3status')
+        self.py3.refresh_all()
 
     def _fallback_to_available_output(self):
         """
@@ -395,6 +532,7 @@ class Py3status:
         if button in [1, 5]:
             self._switch_selection(1)
         if button == 2:
+            self._layout_changed = True
             self._choose_what_to_display(force_refresh=True)
         if button == 3:
             self._apply()
@@ -404,8 +542,14 @@ class Py3status:
         This is the main py3status method, it will orchestrate what's being
         displayed on the bar.
         """
-        self.layout = self._get_layout()
-        self._set_available_combinations()
+        if self.layout is None:
+            self._start_listener()
+        # when listening for RandR events the layout is only read again
+        # after one arrives.
+        if self._layout_changed or not self._listening:
+            self._layout_changed = False
+            self.layout = self._get_layout()
+            self._set_available_combinations()
         self._choose_what_to_display()
 
         if (len(self.available_combinations) < 2 and
@@ -418,8 +562,12 @@ class Py3status:
                 output = self.displayed
             full_text = self.py3.safe_format(self.format, {'output': output})
 
+        if self._listening:
+            cached_until = self.py3.CACHE_FOREVER
+        else:
+            cached_until = self.py3.time_in(self.cache_timeout)
         response = {
-            'cached_until': self.py3.time_in(self.cache_timeout),
+            'cached_until': cached_until,
             'full_text': full_text
         }
 
@@ -442,6 +590,20 @@ class Py3status:
 
         return response
 
+    def kill(self):
+        self._killed = True
+        if self._wakeup is not None:
+            try:
+                os.write(self._wakeup, b'x')
+            except OSError:
+                # the thread has already stopped
+                pass
+            self._listener.join(1)
+            os.close(self._wakeup)
+        for display in [self._events, self._display]:
+            if display is not None:
+                display.close()
+
 
 if __name__ == "__main__":
     """
@@ -55,12 +55,7 @@ class Py3status:
             raise Exception(STRING_UNAVAILABLE)
 
     def _is_running(self):
-        try:
-            self.py3.command_output(['pidof', 'xscreensaver'])
-        except:
-            return False
-        else:
-            return True
+        return self.py3.is_process_running('xscreensaver', exact=True)
 
     def xscreensaver(self):
         run = self._is_running()
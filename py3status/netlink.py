@@ -0,0 +1,552 @@
+import os
+import socket
+import struct
+
+from collections import OrderedDict
+from errno import ENOBUFS
+from threading import Lock, Thread
+from time import sleep
+
+from py3status.subscription import Subscription as BaseSubscription
+
+NETLINK_ROUTE = 0
+NETLINK_GENERIC = 16
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_DUMP = 0x300
+
+NLA_TYPE_MASK = 0x3fff
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+RTM_GETROUTE = 26
+
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_ROUTE = 0x400
+
+IFF_UP = 0x1
+IFF_LOWER_UP = 0x10000
+
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+
+RTA_OIF = 4
+RTA_PRIORITY = 6
+RTA_TABLE = 15
+RT_TABLE_MAIN = 254
+RTN_UNICAST = 1
+
+GENL_ID_CTRL = 16
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+
+NL80211_CMD_GET_INTERFACE = 5
+NL80211_CMD_GET_STATION = 17
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_IFNAME = 4
+NL80211_ATTR_STA_INFO = 21
+NL80211_ATTR_SSID = 52
+NL80211_STA_INFO_SIGNAL = 7
+NL80211_STA_INFO_TX_BITRATE = 8
+NL80211_RATE_INFO_BITRATE = 1
+NL80211_RATE_INFO_BITRATE32 = 5
+
+OPERSTATES = [
+    'unknown', 'notpresent', 'down', 'lowerlayerdown', 'testing', 'dormant',
+    'up',
+]
+
+NLMSGHDR = struct.Struct('=LHHLL')
+RTATTR = struct.Struct('=HH')
+IFINFOMSG = struct.Struct('=BxHiII')
+IFADDRMSG = struct.Struct('=BBBBI')
+RTMSG = struct.Struct('=BBBBBBBBI')
+GENLMSGHDR = struct.Struct('=BBH')
+
+RECV_SIZE = 65536
+
+# seconds to wait before reading the state again after a failed dump
+RESYNC_DELAY = 1
+
+
+def align(length):
+    return (length + 3) & ~3
+
+
+def parse_messages(data):
+    """
+    Yield (type, flags, seq, payload) for each netlink message in data.
+    """
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, msg_type, flags, seq, pid = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        payload = data[offset + NLMSGHDR.size:offset + length]
+        yield msg_type, flags, seq, payload
+        offset += align(length)
+
+
+def parse_attributes(data, offset=0):
+    """
+    Return a dict of the attributes in data, starting at offset.
+    """
+    attributes = {}
+    while offset + RTATTR.size <= len(data):
+        length, attr_type = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        value = data[offset + RTATTR.size:offset + length]
+        attributes[attr_type & NLA_TYPE_MASK] = value
+        offset += align(length)
+    return attributes
+
+
+def pack_message(msg_type, flags, seq, payload):
+    length = NLMSGHDR.size + len(payload)
+    return NLMSGHDR.pack(length, msg_type, flags, seq, 0) + payload
+
+
+def pack_attribute(attr_type, value):
+    length = RTATTR.size + len(value)
+    padding = b'\0' * (align(length) - length)
+    return RTATTR.pack(length, attr_type) + value + padding
+
+
+def unpack_string(value):
+    return value.split(b'\0', 1)[0].decode('utf-8', 'replace')
+
+
+def unpack_int(fmt, value):
+    return struct.unpack(fmt, value[:struct.calcsize(fmt)])[0]
+
+
+class NetlinkSocket:
+    """
+    A netlink socket able to make requests.
+    """
+
+    def __init__(self, protocol, groups=0):
+        self.seq = 0
+        self.socket = socket.socket(
+            socket.AF_NETLINK, socket.SOCK_RAW, protocol
+        )
+        self.socket.bind((0, groups))
+
+    def recv(self):
+        return self.socket.recv(RECV_SIZE)
+
+    def request(self, msg_type, flags, payload, handle):
+        """
+        Send a request and pass each message of the reply to handle.  Any
+        other messages, such as events, received meanwhile are passed to it
+        too.
+        """
+        self.seq += 1
+        seq = self.seq
+        self.socket.send(
+            pack_message(msg_type, flags | NLM_F_REQUEST, seq, payload)
+        )
+        done = False
+        while not done:
+            for message in parse_messages(self.recv()):
+                msg_type, flags, msg_seq, payload = message
+                if msg_seq != seq:
+                    handle(message)
+                elif msg_type == NLMSG_DONE:
+                    done = True
+                elif msg_type == NLMSG_ERROR:
+                    error = -unpack_int('=i', payload)
+                    if error:
+                        raise OSError(error, os.strerror(error))
+                    done = True
+                else:
+                    handle(message)
+                    if not flags & NLM_F_MULTI:
+                        done = True
+
+    def close(self):
+        self.socket.close()
+
+
+class Subscription(BaseSubscription):
+    """
+    A callback told of changes to the network state.
+    """
+
+    def __init__(self, network, callback):
+        BaseSubscription.__init__(self, callback)
+        self.network = network
+
+    def _disconnect(self):
+        self.network._unsubscribe(self)
+
+
+def new_tables():
+    """
+    Return empty tables of the links, addresses and default routes.
+    """
+    return {'addresses': {}, 'default_routes': set(), 'links': {}}
+
+
+def update_tables(tables, message):
+    """
+    Update the tables from a netlink message.  Returns True if anything
+    changed.
+    """
+    msg_type, flags, seq, payload = message
+    if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+        return _update_link(tables, msg_type, payload)
+    if msg_type in (RTM_NEWADDR, RTM_DELADDR):
+        return _update_address(tables, msg_type, payload)
+    if msg_type in (RTM_NEWROUTE, RTM_DELROUTE):
+        return _update_route(tables, msg_type, payload)
+    return False
+
+
+def _update_link(tables, msg_type, payload):
+    family, if_type, index, flags, change = IFINFOMSG.unpack_from(payload)
+    if msg_type == RTM_DELLINK:
+        tables['links'].pop(index, None)
+        tables['addresses'].pop(index, None)
+        for route in list(tables['default_routes']):
+            if route[1] == index:
+                tables['default_routes'].discard(route)
+        return True
+    attributes = parse_attributes(payload, IFINFOMSG.size)
+    old = tables['links'].get(index, {})
+    link = {
+        'carrier': bool(flags & IFF_LOWER_UP),
+        'name': old.get('name'),
+        'operstate': old.get('operstate', 'unknown'),
+        'up': bool(flags & IFF_UP),
+    }
+    if IFLA_OPERSTATE in attributes:
+        operstate = unpack_int('=B', attributes[IFLA_OPERSTATE])
+        if operstate < len(OPERSTATES):
+            link['operstate'] = OPERSTATES[operstate]
+    if IFLA_IFNAME in attributes:
+        link['name'] = unpack_string(attributes[IFLA_IFNAME])
+    tables['links'][index] = link
+    return link != old
+
+
+def _update_address(tables, msg_type, payload):
+    family, prefixlen, flags, scope, index = IFADDRMSG.unpack_from(payload)
+    if family == socket.AF_INET:
+        kind = 'ip4'
+    elif family == socket.AF_INET6:
+        kind = 'ip6'
+    else:
+        return False
+    attributes = parse_attributes(payload, IFADDRMSG.size)
+    # point to point links have the remote address as IFA_ADDRESS
+    value = attributes.get(IFA_LOCAL, attributes.get(IFA_ADDRESS))
+    if value is None:
+        return False
+    address = (kind, socket.inet_ntop(family, value), prefixlen)
+    addresses = tables['addresses'].setdefault(index, [])
+    if msg_type == RTM_NEWADDR:
+        if address in addresses:
+            return False
+        addresses.append(address)
+    else:
+        if address not in addresses:
+            return False
+        addresses.remove(address)
+    return True
+
+
+def _update_route(tables, msg_type, payload):
+    (family, dst_len, src_len, tos, table, protocol, scope, route_type,
+     flags) = RTMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, RTMSG.size)
+    if RTA_TABLE in attributes:
+        table = unpack_int('=I', attributes[RTA_TABLE])
+    # only the default routes are of interest
+    if (dst_len != 0 or table != RT_TABLE_MAIN or
+            route_type != RTN_UNICAST or RTA_OIF not in attributes):
+        return False
+    priority = 0
+    if RTA_PRIORITY in attributes:
+        priority = unpack_int('=I', attributes[RTA_PRIORITY])
+    route = (family, unpack_int('=I', attributes[RTA_OIF]), priority)
+    if msg_type == RTM_NEWROUTE:
+        if route in tables['default_routes']:
+            return False
+        tables['default_routes'].add(route)
+    else:
+        if route not in tables['default_routes']:
+            return False
+        tables['default_routes'].discard(route)
+    return True
+
+
+class NetworkState:
+    """
+    The state of the network interfaces, shared by all modules.
+
+    One rtnetlink socket is opened the first time the state is needed.  The
+    links, addresses and default routes are read from the kernel once and
+    then kept up to date from the events it sends, in a thread of their
+    own.  Modules can ask for a snapshot at any time and be told when
+    something changes, so they need neither poll nor run `ip`.
+
+    The details of wireless connections change constantly and the kernel
+    does not send events for them so they are asked for over nl80211 when
+    needed.
+
+    log, if given, is called with a message when the state cannot be read.
+    """
+
+    def __init__(self, log=None):
+        self.log = log
+        self.thread = None
+        self._lock = Lock()
+        self._nl80211 = None
+        self._nl80211_family = None
+        self._nl80211_lock = Lock()
+        self._socket = None
+        self._start_lock = Lock()
+        self._subscriptions = []
+        self._tables = new_tables()
+
+    def start(self):
+        """
+        Read the network state and start following its changes, if this has
+        not already been done.
+        """
+        with self._start_lock:
+            if self.thread is not None:
+                return
+            groups = (RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR |
+                      RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE)
+            self._socket = NetlinkSocket(NETLINK_ROUTE, groups)
+            try:
+                self._dump()
+            except Exception:
+                self._socket.close()
+                self._socket = None
+                raise
+            self.thread = Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def _dump(self):
+        """
+        Ask the kernel for all the links, addresses and routes.  They are
+        read into new tables which then replace the current ones at once, so
+        interfaces() never returns a half read state.
+        """
+        tables = new_tables()
+
+        def handle(message):
+            update_tables(tables, message)
+
+        requests = [
+            (RTM_GETLINK, IFINFOMSG.pack(0, 0, 0, 0, 0)),
+            (RTM_GETADDR, IFADDRMSG.pack(0, 0, 0, 0, 0)),
+            (RTM_GETROUTE, RTMSG.pack(0, 0, 0, 0, 0, 0, 0, 0, 0)),
+        ]
+        for msg_type, payload in requests:
+            self._socket.request(
+                msg_type, NLM_F_DUMP, payload, handle
+            )
+        with self._lock:
+            self._tables = tables
+
+    def _resync(self):
+        """
+        Read everything again after events were dropped, until it succeeds.
+        """
+        while True:
+            try:
+                self._dump()
+                return
+            except Exception as err:
+                self._log('Reading the network state failed: {}'.format(err))
+                sleep(RESYNC_DELAY)
+
+    def _log(self, msg):
+        if self.log:
+            self.log(msg, 'warning')
+
+    def _run(self):
+        while True:
+            try:
+                changed = self.handle(self._socket.recv())
+            except (OSError, socket.error) as err:
+                if err.errno != ENOBUFS:
+                    # the snapshot will no longer change
+                    self._log('Network events stopped: {}'.format(err))
+                    return
+                # events were dropped so everything is read again
+                self._resync()
+                changed = True
+            if changed:
+                self._notify()
+
+    def _notify(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.callback()
+
+    def handle(self, data):
+        """
+        Update the state from the netlink messages in data.  Returns True
+        if anything changed.
+        """
+        changed = False
+        for message in parse_messages(data):
+            with self._lock:
+                if update_tables(self._tables, message):
+                    changed = True
+        return changed
+
+    def interfaces(self):
+        """
+        Return an OrderedDict of the network interfaces by name.  Each is a
+        dict of
+
+            carrier: True if the link is connected
+            default_route: True if a default route goes through it
+            index: index of the interface
+            ip4: list of IPv4 addresses
+            ip6: list of IPv6 addresses
+            operstate: RFC 2863 state of the interface eg 'up', 'down'
+            up: True if the interface has been brought up
+        """
+        result = OrderedDict()
+        with self._lock:
+            tables = self._tables
+            default = set(route[1] for route in tables['default_routes'])
+            for index in sorted(tables['links']):
+                link = tables['links'][index]
+                addresses = tables['addresses'].get(index, [])
+                result[link['name']] = {
+                    'carrier': link['carrier'],
+                    'default_route': index in default,
+                    'index': index,
+                    'ip4': [x[1] for x in addresses if x[0] == 'ip4'],
+                    'ip6': [x[1] for x in addresses if x[0] == 'ip6'],
+                    'operstate': link['operstate'],
+                    'up': link['up'],
+                }
+        return result
+
+    def subscribe(self, callback):
+        """
+        Call callback() from the netlink thread whenever the interfaces,
+        their addresses or the default routes change.  Returns a
+        Subscription.
+        """
+        subscription = Subscription(self, callback)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def wireless(self):
+        """
+        Return an OrderedDict of the wireless interfaces by name.  Each is a
+        dict of the ssid, the signal_dbm and the tx bitrate in Mbit/s of
+        the access point it is connected to, these are None if it is not
+        connected.
+        """
+        with self._nl80211_lock:
+            if self._nl80211 is None:
+                nl80211 = NetlinkSocket(NETLINK_GENERIC)
+                try:
+                    self._nl80211_family = self._get_family(nl80211, 'nl80211')
+                except Exception:
+                    nl80211.close()
+                    raise
+                self._nl80211 = nl80211
+            replies = []
+            self._nl80211.request(
+                self._nl80211_family, NLM_F_DUMP,
+                GENLMSGHDR.pack(NL80211_CMD_GET_INTERFACE, 0, 0),
+                replies.append,
+            )
+            interfaces = OrderedDict()
+            for msg_type, flags, seq, payload in replies:
+                if msg_type != self._nl80211_family:
+                    continue
+                attributes = parse_attributes(payload, GENLMSGHDR.size)
+                if NL80211_ATTR_IFNAME not in attributes:
+                    continue
+                info = {'bitrate': None, 'signal_dbm': None, 'ssid': None}
+                if NL80211_ATTR_SSID in attributes:
+                    info['ssid'] = attributes[NL80211_ATTR_SSID].decode(
+                        'utf-8', 'replace')
+                    index = unpack_int('=I', attributes[NL80211_ATTR_IFINDEX])
+                    self._read_station(index, info)
+                name = unpack_string(attributes[NL80211_ATTR_IFNAME])
+                interfaces[name] = info
+        return interfaces
+
+    def _get_family(self, sock, name):
+        """
+        Return the id of the named generic netlink family.
+        """
+        replies = []
+        payload = GENLMSGHDR.pack(CTRL_CMD_GETFAMILY, 1, 0) + pack_attribute(
+            CTRL_ATTR_FAMILY_NAME, name.encode('utf-8') + b'\0')
+        sock.request(GENL_ID_CTRL, 0, payload, replies.append)
+        for msg_type, flags, seq, payload in replies:
+            attributes = parse_attributes(payload, GENLMSGHDR.size)
+            if CTRL_ATTR_FAMILY_ID in attributes:
+                return unpack_int('=H', attributes[CTRL_ATTR_FAMILY_ID])
+        raise OSError('no {} netlink family'.format(name))
+
+    def _read_station(self, index, info):
+        """
+        Add the signal and bitrate of the access point the interface is
+        connected to, to info.
+        """
+        replies = []
+        payload = GENLMSGHDR.pack(NL80211_CMD_GET_STATION, 0, 0) + \
+            pack_attribute(NL80211_ATTR_IFINDEX, struct.pack('=I', index))
+        self._nl80211.request(
+            self._nl80211_family, NLM_F_DUMP, payload, replies.append
+        )
+        for msg_type, flags, seq, payload in replies:
+            attributes = parse_attributes(payload, GENLMSGHDR.size)
+            if NL80211_ATTR_STA_INFO not in attributes:
+                continue
+            station = parse_attributes(attributes[NL80211_ATTR_STA_INFO])
+            if NL80211_STA_INFO_SIGNAL in station:
+                info['signal_dbm'] = unpack_int(
+                    '=b', station[NL80211_STA_INFO_SIGNAL])
+            rate = parse_attributes(
+                station.get(NL80211_STA_INFO_TX_BITRATE, b''))
+            # the rates are in units of 100 kbit/s
+            if NL80211_RATE_INFO_BITRATE32 in rate:
+                info['bitrate'] = unpack_int(
+                    '=I', rate[NL80211_RATE_INFO_BITRATE32]) / 10.0
+            elif NL80211_RATE_INFO_BITRATE in rate:
+                info['bitrate'] = unpack_int(
+                    '=H', rate[NL80211_RATE_INFO_BITRATE]) / 10.0
+            break
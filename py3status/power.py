@@ -0,0 +1,131 @@
+import os
+
+from threading import Lock
+from time import time
+
+# same location battery_level reads its information from
+SYS_POWER_SUPPLY_PATH = '/sys/class/power_supply'
+
+AC = 'ac'
+BATTERY = 'battery'
+
+# settings used when profiles are enabled but not configured
+DEFAULT_PROFILES = {
+    AC: {},
+    BATTERY: {
+        'interval_multiplier': 2,
+        'loop_interval': 0.5,
+        'minimum_interval': 5,
+    },
+}
+
+DEFAULT_SETTINGS = {
+    'interval_multiplier': 1,
+    'loop_interval': 0.1,
+    'minimum_interval': 0,
+    'suspend': [],
+}
+
+
+class PowerProfiles:
+    """
+    Scheduling profiles that follow the AC/battery state.
+
+    The state is read from sysfs, where an online ``Mains`` supply means we
+    are on AC and a discharging ``Battery`` without one means we are on
+    battery.  Each profile can lengthen module refresh intervals by a
+    multiplier, set a minimum interval, slow the main loop and suspend named
+    modules altogether.
+    """
+
+    def __init__(self, profiles=None, sys_path=SYS_POWER_SUPPLY_PATH,
+                 max_age=10):
+        if not isinstance(profiles, dict):
+            profiles = DEFAULT_PROFILES
+        self.max_age = max_age
+        self.profiles = {}
+        for name in (AC, BATTERY):
+            settings = dict(DEFAULT_SETTINGS)
+            settings.update(profiles.get(name) or {})
+            self.profiles[name] = settings
+        self.sys_path = sys_path
+        self.wakeups = 0
+        self._lock = Lock()
+        self._state = None
+        self._timestamp = None
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except (IOError, OSError):
+            return None
+
+    def read_state(self):
+        """
+        Return AC or BATTERY depending on the current power supply.
+        """
+        try:
+            supplies = os.listdir(self.sys_path)
+        except OSError:
+            supplies = []
+        discharging = False
+        for supply in supplies:
+            path = os.path.join(self.sys_path, supply)
+            supply_type = self._read(os.path.join(path, 'type'))
+            if supply_type == 'Mains':
+                if self._read(os.path.join(path, 'online')) == '1':
+                    return AC
+            elif supply_type == 'Battery':
+                status = self._read(os.path.join(path, 'status'))
+                if status == 'Discharging':
+                    discharging = True
+        # desktops have no battery so are always on AC
+        return BATTERY if discharging else AC
+
+    @property
+    def state(self):
+        """
+        The current power state, only rechecked every max_age seconds.
+        """
+        with self._lock:
+            now = time()
+            if self._timestamp is None or now - self._timestamp >= self.max_age:
+                self._state = self.read_state()
+                self._timestamp = now
+            return self._state
+
+    @property
+    def profile(self):
+        return self.profiles[self.state]
+
+    def loop_interval(self):
+        """
+        Time the main loop should sleep between checks for updates.
+        """
+        return self.profile['loop_interval']
+
+    def is_suspended(self, module_name):
+        """
+        Return True if the module should not run in the current profile.
+        """
+        return module_name in self.profile['suspend']
+
+    def adjust_interval(self, interval):
+        """
+        Return a module's refresh interval lengthened for the current
+        profile.  Only the module's own interval is lengthened, times it
+        asked for with sync_to or cached_until are left alone.
+        """
+        profile = self.profile
+        return max(
+            interval * profile['interval_multiplier'],
+            profile['minimum_interval']
+        )
+
+    def wakeup(self):
+        """
+        Count a wakeup, a module run or main loop iteration.
+        """
+        with self._lock:
+            self.wakeups += 1
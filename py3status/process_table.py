@@ -0,0 +1,127 @@
+import os
+import re
+
+from threading import Lock
+from time import time
+
+PROC_PATH = '/proc'
+
+
+class ProcessTable:
+    """
+    Shared snapshot of the process table.
+
+    Rather than each module forking ``pgrep`` or ``pidof`` we scan
+    ``/proc/[pid]/comm`` and ``/proc/[pid]/cmdline`` once per period and
+    answer all queries from that snapshot.  Matching behaves like ``pgrep``,
+    the pattern is a regular expression searched for in the process name or,
+    if ``full`` is set, in the full command line.
+    """
+
+    def __init__(self, proc_path=PROC_PATH, max_age=1):
+        self.max_age = max_age
+        self.proc_path = proc_path
+        self.scan_count = 0
+        self._cmdlines = {}
+        self._lock = Lock()
+        self._names = {}
+        self._patterns = {}
+        self._timestamp = None
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except (IOError, OSError):
+            # the process has gone away or we are not allowed to look
+            return None
+
+    def scan(self):
+        """
+        Rebuild the name and cmdline indexes from the process table.
+        """
+        own_pid = os.getpid()
+        names = {}
+        cmdlines = {}
+        try:
+            entries = os.listdir(self.proc_path)
+        except OSError:
+            entries = []
+        for entry in entries:
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            # like pgrep we never report ourselves
+            if pid == own_pid:
+                continue
+            base = os.path.join(self.proc_path, entry)
+            comm = self._read(os.path.join(base, 'comm'))
+            if comm is None:
+                continue
+            name = comm.rstrip(b'\n').decode('utf-8', 'replace')
+            names.setdefault(name, []).append(pid)
+            cmdline = self._read(os.path.join(base, 'cmdline'))
+            if cmdline:
+                # arguments are nul separated, pgrep -f joins them by spaces
+                cmdline = cmdline.rstrip(b'\0').replace(b'\0', b' ')
+                cmdlines[pid] = cmdline.decode('utf-8', 'replace')
+            else:
+                # kernel threads have no cmdline pgrep -f uses the name
+                cmdlines[pid] = name
+        self._names = names
+        self._cmdlines = cmdlines
+        self._timestamp = time()
+        self.scan_count += 1
+
+    def _refresh(self):
+        if self._timestamp is None or time() - self._timestamp >= self.max_age:
+            self.scan()
+
+    def _get_matcher(self, pattern, exact):
+        try:
+            return self._patterns[(pattern, exact)]
+        except KeyError:
+            if exact:
+                matcher = re.compile(r'(?:{})\Z'.format(pattern)).match
+            else:
+                matcher = re.compile(pattern).search
+            self._patterns[(pattern, exact)] = matcher
+            return matcher
+
+    def get_pids(self, pattern, full=False, exact=False):
+        """
+        Return a sorted list of pids matching pattern.
+
+        pattern is a regular expression searched for in the process name, or
+        in the full command line if full is True.  If exact is True the
+        pattern must match the whole name or command line, as with ``pgrep
+        -x``.
+        """
+        with self._lock:
+            self._refresh()
+            names = self._names
+            cmdlines = self._cmdlines
+        match = self._get_matcher(pattern, exact)
+        pids = []
+        if full:
+            for pid, cmdline in cmdlines.items():
+                if match(cmdline):
+                    pids.append(pid)
+        else:
+            if exact and re.escape(pattern) == pattern:
+                # fast path for a literal name
+                return sorted(names.get(pattern, []))
+            for name, name_pids in names.items():
+                if match(name):
+                    pids.extend(name_pids)
+        return sorted(pids)
+
+    def is_running(self, pattern, full=False, exact=False):
+        """
+        Return True if any process matches pattern.  An invalid pattern
+        matches nothing, as with ``pgrep``.
+        """
+        try:
+            return bool(self.get_pids(pattern, full=full, exact=exact))
+        except re.error:
+            return False
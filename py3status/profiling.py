@@ -1,4 +1,10 @@
 import cProfile
+import json
+import os
+
+from contextlib import contextmanager
+from threading import Lock, current_thread
+from time import time
 
 # Used in development
 enable_profiling = False
@@ -19,3 +25,70 @@ def profile(thread_run_fn):
             profiler.dump_stats("py3status-%s.profile" % thread_id)
 
     return wrapper_run
+
+
+class StartupProfile:
+    """
+    Records when each phase of startup happens so that the critical path to
+    the first output line can be found.  Times are in seconds relative to the
+    creation of the profile.
+    """
+
+    def __init__(self):
+        self.first_output = None
+        self.lock = Lock()
+        self.phases = []
+        self.start = time()
+
+    def add(self, phase, start, end, name=None):
+        """
+        Record a phase that ran from start to end.
+        """
+        with self.lock:
+            self.phases.append({
+                'duration': end - start,
+                'end': end - self.start,
+                'name': name,
+                'phase': phase,
+                'start': start - self.start,
+                'thread': current_thread().name,
+            })
+
+    @contextmanager
+    def timed(self, phase, name=None):
+        """
+        Context manager that records the phase it wraps.
+        """
+        start = time()
+        try:
+            yield
+        finally:
+            self.add(phase, start, time(), name)
+
+    def output_started(self):
+        """
+        Record the time the first output line was sent to i3bar.
+        """
+        if self.first_output is None:
+            self.first_output = time() - self.start
+
+    def report(self):
+        """
+        Return a dict of the recorded phases ordered by start time.
+        """
+        with self.lock:
+            phases = sorted(self.phases, key=lambda x: x['start'])
+        return {
+            'first_output': self.first_output,
+            'phases': phases,
+        }
+
+    def dump(self, path):
+        """
+        Write the report as json to path.  It is written to a temporary file
+        first so that the report is never seen half written.
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+        os.rename(tmp_path, path)
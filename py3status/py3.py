@@ -1,7 +1,6 @@
 from __future__ import division
 
 import collections
-import os
 import sys
 import shlex
 
@@ -9,17 +8,29 @@ from fnmatch import fnmatch
 from math import log10
 from pprint import pformat
 from subprocess import Popen, PIPE
+from threading import Lock
 from time import time
 
 from py3status import exceptions
 from py3status.formatter import Formatter, Composite
+from py3status.dbus_pool import DBusPool
+from py3status.executor import ThreadPool
+from py3status.glib_loop import GLibLoop
+from py3status.netlink import NetworkState
+from py3status.process_table import ProcessTable
 from py3status.request import HttpResponse
+from py3status.segment import view
+from py3status.sound import SoundPlayer
+from py3status.timer_queue import TimerQueue
 
 PY3_CACHE_FOREVER = -1
 PY3_LOG_ERROR = 'error'
 PY3_LOG_INFO = 'info'
 PY3_LOG_WARNING = 'warning'
 
+# threads shared by modules for blocking calls, see run_in_thread_pool()
+THREAD_POOL_SIZE = 4
+
 # basestring does not exist in python3
 try:
     basestring
@@ -84,8 +95,19 @@ class Py3:
     """Show as Warning"""
 
     # Shared by all Py3 Instances
+    _async_loop = None
+    _async_loop_lock = Lock()
+    _dbus_pool = None
     _formatter = None
+    _glib_loop = None
+    _network = None
     _none_color = NoneColor()
+    _process_table = None
+    _process_table_lock = Lock()
+    _thread_pool = None
+    _thread_pool_lock = Lock()
+    _sound_player = None
+    _timer_queue = None
 
     # Exceptions
     Py3Exception = exceptions.Py3Exception
@@ -98,6 +120,7 @@ class Py3:
     def __init__(self, module=None, i3s_config=None, py3status=None):
         self._audio = None
         self._config_setting = {}
+        self._default_time_in = None
         self._format_placeholders = {}
         self._format_placeholders_cache = {}
         self._i3s_config = i3s_config or {}
@@ -477,14 +500,25 @@ class Py3:
             if module_info:
                 module_info['module'].force_update()
 
+    def refresh_all(self):
+        """
+        Update every module of the bar, including the i3status ones, as
+        sending py3status a SIGUSR1 does.
+        """
+        if self._module:
+            self._module._py3_wrapper.refresh_modules()
+
     def get_output(self, module_name):
         """
         Return the output of the named module.  This will be a list.
+
+        The output of a module is shared so the items are views, changes made
+        to them do not change the output of the module itself.
         """
         output = []
         module_info = self._get_module_info(module_name)
         if module_info:
-            output = module_info['module'].get_latest()
+            output = [view(x) for x in module_info['module'].get_latest()]
         return output
 
     def trigger_event(self, module_name, event):
@@ -578,6 +612,9 @@ class Py3:
         then be relative to that time.
         """
 
+        # a request for the modules normal cache_timeout that is not synced
+        # can have its interval adapted by the module runner.
+        default = sync_to is None and not offset
         if seconds is None:
             # If we have a sync_to then seconds can be 0
             if sync_to and sync_to > 0:
@@ -589,6 +626,9 @@ class Py3:
                 except AttributeError:
                     # use default cache_timeout
                     seconds = self._module.config['cache_timeout']
+        elif default:
+            module = getattr(self, '_py3status_module', None)
+            default = seconds == getattr(module, 'cache_timeout', None)
 
         # Unless explicitly set we sync to the nearest second
         # Unless the requested update is in less than a second
@@ -604,7 +644,10 @@ class Py3:
         if sync_to:
             requested = (requested + sync_to) - (requested % sync_to)
 
-        return requested + offset
+        requested += offset
+        if default:
+            self._default_time_in = requested
+        return requested
 
     def format_contains(self, format_string, name):
         """
@@ -882,7 +925,14 @@ class Py3:
         if self._is_python_2:
             output = output.decode('utf-8')
             error = error.decode('utf-8')
-        retcode = process.poll()
+        return self._command_result(command, process.poll(), output, error)
+
+    def _command_result(self, command, retcode, output, error):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Return the output of a command that has been run or raise a
+        CommandError if it failed.
+        """
         if retcode:
             # under certain conditions a successfully run command may get a
             # return code of -15 even though correct output was returned see
@@ -906,16 +956,60 @@ class Py3:
             )
         return output
 
+    def run_in_thread_pool(self, function, *args):
+        """
+        Run `function(*args)` in a pool of threads shared by all modules.
+        Modules can use this to make several blocking requests at once
+        rather than starting threads of their own.
+
+        Returns a call whose `result(timeout=None)` method waits for the
+        function to complete and returns its result.  Any exception it
+        raised is reraised.  The function must not itself wait for other
+        calls made in the pool.
+
+        :param function: function to call
+        :param args: arguments to pass to it
+        """
+        with self._thread_pool_lock:
+            if not self._thread_pool:
+                self.__class__._thread_pool = ThreadPool(THREAD_POOL_SIZE)
+        return self._thread_pool.submit(function, *args)
+
+    def is_process_running(self, process, full=False, exact=False):
+        """
+        Checks to see if a process is running.  This behaves like ``pgrep``
+        but all modules share a single scan of the process table so no
+        command needs to be run.
+
+        :param process: regular expression matched against the process name
+        :param full: if True match against the full command line like
+            ``pgrep -f``
+        :param exact: if True the whole name or command line must match like
+            ``pgrep -x``
+
+        returns True if a matching process was found.
+        """
+        with self._process_table_lock:
+            if not self._process_table:
+                self.__class__._process_table = ProcessTable()
+        return self._process_table.is_running(process, full=full, exact=exact)
+
     def play_sound(self, sound_file):
         """
         Plays sound_file if possible.
         """
         self.stop_sound()
-        cmd = self.check_commands(['paplay', 'play'])
-        if cmd:
-            sound_file = os.path.expanduser(sound_file)
-            c = shlex.split('{} {}'.format(cmd, sound_file))
-            self._audio = Popen(c)
+        self._audio = self._get_sound_player().play(sound_file)
+
+    def load_sound(self, sound_file):
+        """
+        Prepare sound_file so that it plays straight away.  Modules can call
+        this from `post_config_hook()` for their alert sounds.
+
+        Short wav files are decoded and kept in memory when `paplay` is
+        available, other files are played from disk as usual.
+        """
+        self._get_sound_player().load(sound_file)
 
     def stop_sound(self):
         """
@@ -999,3 +1093,358 @@ class Py3:
                             headers=headers,
                             timeout=timeout,
                             auth=auth)
+
+    def _get_async_loop(self):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Return the shared asyncio loop, created and started if needed.
+        asyncio is slow to import so this is only done once a module uses it.
+        """
+        from py3status.async_loop import asyncio, AsyncLoop
+
+        with self._async_loop_lock:
+            if self._module:
+                wrapper = self._module._py3_wrapper
+                if not wrapper.async_loop and asyncio:
+                    wrapper.async_loop = AsyncLoop()
+                async_loop = wrapper.async_loop
+            else:
+                # module test mode, there is no py3status
+                if not self._async_loop and asyncio:
+                    self.__class__._async_loop = AsyncLoop()
+                async_loop = self._async_loop
+        if not async_loop:
+            raise exceptions.Py3Exception('asyncio is not available')
+        async_loop.start()
+        return async_loop
+
+    def create_task(self, coroutine):
+        """
+        Run a coroutine in the background on the asyncio loop that py3status
+        shares between modules.
+
+        This is intended for modules that wait for events, they can call
+        `py3.update()` when something happens rather than starting a thread
+        of their own.  Any exception raised by the coroutine is logged.  The
+        task is cancelled when the module is killed.
+
+        :param coroutine: coroutine object eg `self._listen()`
+        """
+        module = self._module
+
+        def task_done(call):
+            if not module:
+                # module test mode, the error is raised by call.result()
+                return
+            module.async_tasks.discard(call)
+            if call.cancelled:
+                return
+            try:
+                call.result()
+            except Exception:
+                msg = 'Task in `{}` failed'.format(module.module_full_name)
+                module._py3_wrapper.report_exception(msg, notify_user=False)
+
+        async_loop = self._get_async_loop()
+        call = async_loop.make_call(lambda: coroutine, callback=task_done)
+        # known before it can finish or the module be killed
+        if module:
+            module.async_tasks.add(call)
+        async_loop.submit_call(call)
+        return call
+
+    def _get_glib_loop(self):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Return the shared GLib main loop.
+        """
+        if self._module:
+            return self._module._py3_wrapper.glib_loop
+        # module test mode, there is no py3status
+        if not self._glib_loop:
+            self.__class__._glib_loop = GLibLoop()
+        return self._glib_loop
+
+    def _get_dbus_pool(self):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Return the shared DBus connections.
+        """
+        if self._module:
+            return self._module._py3_wrapper.dbus_pool
+        # module test mode, there is no py3status
+        if not self._dbus_pool:
+            self.__class__._dbus_pool = DBusPool(self._get_glib_loop())
+        return self._dbus_pool
+
+    def start_glib_loop(self):
+        """
+        Start the GLib main loop that py3status shares between modules, if
+        it is not already running.
+
+        Modules listening for DBus signals with pydbus should call this
+        rather than running a `GObject.MainLoop` in a thread of their own.
+        """
+        self._get_glib_loop().start()
+
+    def dbus_get(self, bus_name, object_path=None, system_bus=False):
+        """
+        Return a pydbus proxy for a DBus object.  The session and system bus
+        connections are shared by all modules and proxies are cached, so
+        this can be called on every update.
+
+        :param bus_name: well-known or unique name of the service
+        :param object_path: path of the object, pydbus works it out from
+            the bus name if not given
+        :param system_bus: use the system bus rather than the session bus
+        """
+        return self._get_dbus_pool().get(bus_name, object_path, system_bus)
+
+    def dbus_properties(self, bus_name, object_path, interface,
+                        system_bus=False):
+        """
+        Return a dict of the properties of a DBus interface.
+
+        The properties are fetched with a single `GetAll` call the first
+        time they are asked for and are then kept up to date from the
+        `PropertiesChanged` signal, so reading them does not use the bus.
+        The snapshot is shared between all modules.
+
+        :param bus_name: well-known name of the service
+        :param object_path: path of the object
+        :param interface: interface the properties belong to
+        :param system_bus: use the system bus rather than the session bus
+        """
+        return self._get_dbus_pool().properties(
+            bus_name, object_path, interface, system_bus
+        )
+
+    def dbus_subscribe(self, callback, sender=None, iface=None, signal=None,
+                       object_path=None, arg0=None, system_bus=False):
+        """
+        Listen for a DBus signal.  `callback(sender, object_path, iface,
+        signal, params)` is called from the GLib main loop py3status shares
+        between modules, which is started if needed.  Modules listening for
+        the same signal share one subscription on the bus.
+
+        Returns a subscription with a `disconnect()` method.  Any
+        subscriptions still connected when the module is killed are
+        disconnected.
+
+        :param callback: function to call when the signal is received
+        :param sender: name of the sender, None for any
+        :param iface: interface of the signal, None for any
+        :param signal: name of the signal, None for any
+        :param object_path: path of the object, None for any
+        :param arg0: the first argument of the signal must be this string
+        :param system_bus: use the system bus rather than the session bus
+        """
+        def subscribe(signal_received):
+            return self._get_dbus_pool().subscribe(
+                signal_received, sender, iface, signal, object_path, arg0,
+                system_bus,
+            )
+
+        return self._subscribe(
+            subscribe, callback, 'DBus signal handler in `{}` failed'
+        )
+
+    def _subscribe(self, subscribe, callback, error_msg):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Register callback with a shared service by calling subscribe() with
+        it, and return the subscription.  Exceptions the callback raises are
+        reported with error_msg and the subscription is disconnected when
+        the module is killed.
+        """
+        module = self._module
+        if not module:
+            # module test mode, there is nothing to report to
+            return subscribe(callback)
+
+        def called(*args):
+            try:
+                callback(*args)
+            except Exception:
+                msg = error_msg.format(module.module_full_name)
+                module._py3_wrapper.report_exception(msg, notify_user=False)
+
+        subscription = subscribe(called)
+        module.subscriptions.add(subscription)
+        return subscription
+
+    def _get_sound_player(self):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Return the shared sound player.
+        """
+        if self._module:
+            return self._module._py3_wrapper.sound_player
+        # module test mode, there is no py3status
+        if not self._sound_player:
+            self.__class__._sound_player = SoundPlayer()
+        return self._sound_player
+
+    def _get_timer_queue(self):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Return the shared one-shot timers.
+        """
+        if self._module:
+            return self._module._py3_wrapper.timer_queue
+        # module test mode, there is no py3status
+        if not self._timer_queue:
+            self.__class__._timer_queue = TimerQueue()
+        return self._timer_queue
+
+    def call_later(self, delay, callback):
+        """
+        Call `callback()` once in `delay` seconds.  This is for alarms and
+        the like, the module's own updates should use `cached_until`.
+
+        The timers of all modules share a single thread, so the callback
+        should be quick.  Modules will often just change some state and
+        call `self.py3.update()`.
+
+        Returns a deadline with a `cancel()` method.  Any deadlines still
+        pending when the module is killed are cancelled.
+
+        :param delay: seconds to wait
+        :param callback: function to call
+        """
+        def add(timer_expired):
+            return self._get_timer_queue().add(delay, timer_expired)
+
+        return self._subscribe(add, callback, 'Timer callback in `{}` failed')
+
+    def _get_network(self):
+        """
+        THIS IS PRIVATE AND UNSUPPORTED.
+        Return the shared network state, started if needed.
+        """
+        if self._module:
+            network = self._module._py3_wrapper.network
+        else:
+            # module test mode, there is no py3status
+            if not self._network:
+                self.__class__._network = NetworkState()
+            network = self._network
+        network.start()
+        return network
+
+    def network_interfaces(self):
+        """
+        Return an OrderedDict of the network interfaces by name.  Each
+        interface is a dict with these keys
+
+            carrier: True if the link is connected
+            default_route: True if a default route goes through it
+            index: index of the interface
+            ip4: list of IPv4 addresses
+            ip6: list of IPv6 addresses
+            operstate: state of the interface eg 'up', 'down', 'dormant'
+            up: True if the interface has been brought up
+
+        py3status follows the changes to the interfaces with a single
+        netlink socket shared by all modules, so this does not run any
+        command.
+        """
+        return self._get_network().interfaces()
+
+    def network_subscribe(self, callback):
+        """
+        Call `callback()` whenever the network interfaces, their addresses
+        or the default routes change.  Modules will usually pass
+        `self.py3.update` so that they are updated immediately.
+
+        Returns a subscription with a `disconnect()` method.  Any
+        subscriptions still connected when the module is killed are
+        disconnected.
+
+        :param callback: function to call when the network changes
+        """
+        return self._subscribe(
+            self._get_network().subscribe, callback,
+            'Network change handler in `{}` failed',
+        )
+
+    def network_wireless(self):
+        """
+        Return an OrderedDict of the wireless interfaces by name.  Each is a
+        dict with the `ssid`, `signal_dbm` and tx `bitrate` in Mbit/s of the
+        access point it is connected to.  These are None when it is not
+        connected.  The details are asked for over nl80211.
+        """
+        return self._get_network().wireless()
+
+    def async_sleep(self, seconds):
+        """
+        Return an awaitable that sleeps for the given number of seconds.
+        For use in `async def` methods in place of `time.sleep()`.
+
+        :param seconds: time to sleep in seconds
+        """
+        return self._get_async_loop().sleep(seconds)
+
+    def async_command_output(self, command, shell=False):
+        """
+        Awaitable version of `py3.command_output()` for use in `async def`
+        methods.  The command is run as an asyncio subprocess so no thread
+        waits for it.  It is killed if the awaiting task is cancelled.
+        """
+        async_loop = self._get_async_loop()
+        args = command
+        # convert the command to sequence if a string
+        if isinstance(command, basestring):
+            command = shlex.split(command)
+        if not shell:
+            args = command
+        elif not isinstance(args, basestring):
+            args = ' '.join(args)
+
+        def started(process):
+            def finished(streams):
+                output, error = [x.decode('utf-8') for x in streams]
+                return self._command_result(
+                    command, process.returncode, output, error
+                )
+
+            def cancelled(future):
+                if future.cancelled() and process.returncode is None:
+                    process.kill()
+
+            communicate = async_loop.then(process.communicate(), finished)
+            communicate.add_done_callback(cancelled)
+            return communicate
+
+        def failed(e):
+            msg = "Command '{cmd}' {error}".format(cmd=command[0], error=e)
+            raise exceptions.CommandError(
+                msg, error_code=getattr(e, 'errno', None)
+            )
+
+        return async_loop.then(
+            async_loop.subprocess(args, shell), started, failed
+        )
+
+    def async_request(self, url, params=None, data=None, headers=None,
+                      timeout=None, auth=None):
+        """
+        Awaitable version of `py3.request()` for use in `async def` methods.
+        The request is made without blocking the asyncio loop.
+        """
+        return self._get_async_loop().run_in_executor(
+            self.request, url, params, data, headers, timeout, auth
+        )
+
+    def async_open_connection(self, host=None, port=None, path=None):
+        """
+        Return an awaitable that opens a socket connection for use in
+        `async def` methods.  Once awaited it gives a `(reader, writer)` pair
+        of asyncio streams.
+
+        :param host: host to connect to
+        :param port: port to connect to
+        :param path: path of a unix socket, used instead of host and port
+        """
+        return self._get_async_loop().open_connection(host, port, path)
@@ -63,6 +63,9 @@ class HttpResponse:
             elif isinstance(e, HTTPError):
                 self._status_code = e.code
                 self._error_message = reason
+                # the error still carries the response headers which are
+                # needed for things like conditional requests (304)
+                self._response = e
             else:
                 # unknown exception, so just raise it
                 raise RequestURLError(reason)
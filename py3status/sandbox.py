@@ -0,0 +1,448 @@
+"""
+Run a user module in a child process.
+
+The core talks to the child over its stdin/stdout using frames, a 4 byte big
+endian length followed by that many bytes of JSON.  The child loads the
+module and runs its methods when asked.  Calls the module makes to ``py3``
+that need the running py3status, eg ``py3.update()`` or
+``py3.notify_user()``, are sent back to the core to be run there.
+"""
+import inspect
+import json
+import os
+import select
+import signal
+import struct
+import subprocess
+import sys
+import traceback
+import types
+
+from threading import RLock
+from time import time
+
+from py3status.composite import Composite
+from py3status.py3 import Py3, ModuleErrorException, NoneColor
+from py3status.segment import Segment
+
+HEADER = struct.Struct('>I')
+
+# Py3 methods the child forwards to the core
+FORWARDED = (
+    'get_output', 'is_my_event', 'log', 'notify_user', 'prevent_refresh',
+    'trigger_event', 'update',
+)
+
+# default per call deadline in seconds
+CALL_TIMEOUT = 10
+# how often the cpu use of the child is sampled in seconds
+CPU_SAMPLE_PERIOD = 5
+
+
+class SandboxError(Exception):
+    """
+    The sandboxed module failed or had to be restarted.
+    """
+
+
+def encode(value):
+    """
+    json default hook for values that we send between processes.
+    """
+    if isinstance(value, Composite):
+        return {'__composite__': value.get_content()}
+    if isinstance(value, Segment):
+        return value.to_dict()
+    if isinstance(value, NoneColor):
+        return {'__none_color__': True}
+    raise TypeError('{!r} cannot be sent to or from a sandbox'.format(value))
+
+
+def decode(value):
+    """
+    json object hook reversing encode()
+    """
+    if '__composite__' in value:
+        return Composite(value['__composite__'])
+    if '__none_color__' in value:
+        return NoneColor()
+    return value
+
+
+def write_frame(fd, message):
+    data = json.dumps(message, default=encode).encode('utf-8')
+    data = HEADER.pack(len(data)) + data
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def read_exact(fd, size, deadline=None):
+    data = b''
+    while len(data) < size:
+        if deadline is not None:
+            remaining = deadline - time()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise SandboxError('timed out')
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            raise SandboxError('sandbox closed')
+        data += chunk
+    return data
+
+
+def read_frame(fd, deadline=None):
+    size = HEADER.unpack(read_exact(fd, HEADER.size, deadline))[0]
+    data = read_exact(fd, size, deadline)
+    return json.loads(data.decode('utf-8'), object_hook=decode)
+
+
+class SandboxPy3(Py3):
+    """
+    Py3 helper used in the child.  Most helpers are run locally, those that
+    need the running py3status are forwarded to the core.
+    """
+
+    def __init__(self, connection, i3s_config, py3status):
+        Py3.__init__(self, i3s_config=i3s_config, py3status=py3status)
+        self._connection = connection
+
+    def _forward(self, name, args, kwargs):
+        return self._connection.py3_call(name, args, kwargs)
+
+
+def _make_forwarded(name):
+    def forwarded(self, *args, **kwargs):
+        return self._forward(name, args, kwargs)
+    forwarded.__name__ = name
+    return forwarded
+
+
+for _name in FORWARDED:
+    setattr(SandboxPy3, _name, _make_forwarded(_name))
+
+
+class ChildConnection:
+    """
+    The child side of the connection.
+    """
+
+    def __init__(self, in_fd, out_fd):
+        self.in_fd = in_fd
+        self.out_fd = out_fd
+
+    def py3_call(self, name, args, kwargs):
+        write_frame(self.out_fd, {
+            'op': 'py3', 'name': name, 'args': args, 'kwargs': kwargs,
+        })
+        reply = read_frame(self.in_fd)
+        if reply['op'] == 'py3_error':
+            raise SandboxError(reply['msg'])
+        return reply['value']
+
+
+def method_kind(method, name):
+    """
+    Return how the core should call the method, see Module._params_type()
+    """
+    arg_count = 2 if name == 'on_click' else 1
+    try:
+        spec = inspect.getfullargspec(method)
+        args, vargs, kw = spec.args, spec.varargs, spec.varkw
+    except AttributeError:
+        args, vargs, kw, defaults = inspect.getargspec(method)
+    if len(args) == arg_count and not vargs and not kw:
+        return 'new'
+    return 'legacy'
+
+
+def child_main(filepath):
+    """
+    Entry point of the child process.
+    """
+    # keep stdout for our frames, anything the module prints goes to stderr
+    in_fd = sys.stdin.fileno()
+    out_fd = os.dup(sys.stdout.fileno())
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    connection = ChildConnection(in_fd, out_fd)
+
+    setup = read_frame(in_fd)
+    try:
+        from py3status.module import Module
+        module = Module.load_from_file(filepath)
+        if module is None:
+            raise ImportError('no Py3status class in {}'.format(filepath))
+    except Exception as e:
+        write_frame(out_fd, {'op': 'import_error', 'msg': str(e)})
+        return
+
+    py3 = SandboxPy3(connection, setup['config'], module)
+    if not hasattr(module, 'py3'):
+        module.py3 = py3
+    methods = {}
+    for name in dir(module):
+        if name.startswith('_'):
+            continue
+        attribute = getattr(module, name)
+        if 'method' in str(type(attribute)):
+            methods[name] = method_kind(attribute, name)
+    write_frame(out_fd, {'op': 'ready', 'methods': methods})
+
+    while True:
+        try:
+            message = read_frame(in_fd)
+        except SandboxError:
+            # the core has gone away
+            return
+        op = message['op']
+        try:
+            reply = {'op': 'result'}
+            if op == 'call':
+                value = getattr(module, message['name'])(*message['args'])
+                # let the core know if the module asked for its own
+                # cache_timeout so that it can still be adapted
+                default = getattr(module.py3, '_default_time_in', None)
+                if isinstance(value, dict) and default is not None and \
+                        value.get('cached_until') == default:
+                    reply['default_time_in'] = default
+            elif op == 'getattr':
+                value = getattr(module, message['name'])
+            elif op == 'setattr':
+                value = setattr(module, message['name'], message['value'])
+            reply['value'] = value
+        except ModuleErrorException as e:
+            reply = {
+                'op': 'error', 'kind': 'module_error',
+                'msg': e.msg, 'timeout': e.timeout,
+            }
+        except AttributeError as e:
+            reply = {'op': 'error', 'kind': 'attribute', 'msg': str(e)}
+        except Exception as e:
+            reply = {
+                'op': 'error', 'kind': 'exception',
+                'msg': str(e) or e.__class__.__name__,
+                'traceback': traceback.format_exc(),
+            }
+        try:
+            write_frame(out_fd, reply)
+        except TypeError as e:
+            write_frame(out_fd, {
+                'op': 'error', 'kind': 'exception', 'msg': str(e),
+            })
+
+
+class SandboxProxy(object):
+    """
+    Stands in for the module instance in the core.
+
+    Methods of the module are created on the proxy with matching signatures
+    so that the Module thread can treat it as the real thing.  Setting
+    attributes, eg module configuration, is passed on to the child and
+    recorded so that it can be replayed if the child has to be restarted.
+
+    After each call the child's resident memory and cpu use are checked, if
+    it is over its limits it is restarted.
+    """
+
+    def __init__(self, filepath, config=None, py3_wrapper=None,
+                 max_rss=None, max_cpu=None, timeout=CALL_TIMEOUT):
+        attrs = self.__dict__
+        attrs['_config'] = config or {}
+        attrs['_cpu_sample'] = None
+        attrs['_filepath'] = filepath
+        attrs['_lock'] = RLock()
+        attrs['_max_cpu'] = max_cpu
+        attrs['_max_rss'] = max_rss
+        attrs['_methods'] = {}
+        attrs['_process'] = None
+        attrs['_py3_wrapper'] = py3_wrapper
+        attrs['_settings'] = {}
+        attrs['_timeout'] = timeout
+        attrs['restarts'] = 0
+        self._start()
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self._methods))
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name in ('Meta', 'py3'):
+            # containers and Meta settings are not supported in the sandbox,
+            # py3 is only ever set in the core.
+            raise AttributeError(name)
+        try:
+            return self._methods[name]
+        except KeyError:
+            pass
+        return self._request({'op': 'getattr', 'name': name})
+
+    def __setattr__(self, name, value):
+        if name == 'py3':
+            # the py3 helper stays in the core and answers forwarded calls
+            self.__dict__['py3'] = value
+            return
+        with self._lock:
+            self._settings[name] = value
+            self._request({'op': 'setattr', 'name': name, 'value': value})
+
+    def _start(self):
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'py3status.sandbox', self._filepath],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+        self.__dict__['_process'] = process
+        self.__dict__['_cpu_sample'] = None
+        write_frame(process.stdin.fileno(), {'config': self._config})
+        reply = read_frame(process.stdout.fileno(), time() + self._timeout)
+        if reply['op'] == 'import_error':
+            self._stop()
+            raise ImportError(reply['msg'])
+        methods = {}
+        for name, kind in reply['methods'].items():
+            methods[name] = self._make_method(name, kind)
+        self.__dict__['_methods'] = methods
+        for name, value in self._settings.items():
+            self._request({'op': 'setattr', 'name': name, 'value': value})
+
+    def _stop(self):
+        process = self._process
+        if process and process.poll() is None:
+            process.kill()
+            process.wait()
+        if process:
+            process.stdin.close()
+            process.stdout.close()
+
+    def _restart(self, reason):
+        if self._py3_wrapper:
+            self._py3_wrapper.log('restarting sandbox for {}: {}'.format(
+                self._filepath, reason))
+        self._stop()
+        self.__dict__['restarts'] += 1
+        self._start()
+        if 'post_config_hook' in self._methods:
+            self._request({'op': 'call', 'name': 'post_config_hook',
+                           'args': []})
+
+    def _make_method(self, name, kind):
+        if kind == 'legacy':
+            def method(self, i3s_output_list, i3s_config):
+                return self._call(name, [i3s_output_list, i3s_config])
+        elif name == 'on_click':
+            def method(self, event):
+                return self._call(name, [event])
+        else:
+            def method(self):
+                return self._call(name, [])
+        method.__name__ = str(name)
+        return types.MethodType(method, self)
+
+    def _call(self, name, args):
+        with self._lock:
+            try:
+                return self._request({'op': 'call', 'name': name,
+                                      'args': args})
+            finally:
+                self._check_limits()
+
+    def _request(self, message):
+        """
+        Send a request to the child and wait for its reply, answering any
+        py3 calls it makes meanwhile.
+        """
+        with self._lock:
+            process = self._process
+            deadline = time() + self._timeout
+            try:
+                write_frame(process.stdin.fileno(), message)
+                while True:
+                    reply = read_frame(process.stdout.fileno(), deadline)
+                    if reply['op'] != 'py3':
+                        break
+                    self._py3_call(reply)
+            except (SandboxError, OSError, IOError) as e:
+                self._restart(str(e))
+                raise SandboxError('sandbox {}'.format(e))
+        if reply['op'] == 'result':
+            if 'default_time_in' in reply and 'py3' in self.__dict__:
+                self.py3._default_time_in = reply['default_time_in']
+            return reply['value']
+        if reply['kind'] == 'module_error':
+            raise ModuleErrorException(reply['msg'], reply['timeout'])
+        if reply['kind'] == 'attribute':
+            raise AttributeError(reply['msg'])
+        if self._py3_wrapper and reply.get('traceback'):
+            self._py3_wrapper.log(reply['traceback'])
+        raise SandboxError(reply['msg'])
+
+    def _py3_call(self, request):
+        try:
+            method = getattr(self.py3, request['name'])
+            value = method(*request['args'], **request['kwargs'])
+            reply = {'op': 'py3_result', 'value': value}
+        except Exception as e:
+            reply = {'op': 'py3_error', 'msg': str(e)}
+        write_frame(self._process.stdin.fileno(), reply)
+
+    def _read_proc(self, name):
+        try:
+            with open('/proc/{}/{}'.format(self._process.pid, name)) as f:
+                return f.read()
+        except (IOError, OSError):
+            return None
+
+    def rss(self):
+        """
+        Resident memory of the child in bytes.
+        """
+        status = self._read_proc('status')
+        for line in (status or '').splitlines():
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+        return None
+
+    def cpu_time(self):
+        """
+        Cpu time used by the child in seconds.
+        """
+        stat = self._read_proc('stat')
+        if not stat:
+            return None
+        # the process name can contain spaces so split after it
+        fields = stat.rsplit(')', 1)[1].split()
+        ticks = os.sysconf(os.sysconf_names['SC_CLK_TCK'])
+        return (int(fields[11]) + int(fields[12])) / float(ticks)
+
+    def _check_limits(self):
+        if self._max_rss:
+            rss = self.rss()
+            if rss and rss > self._max_rss:
+                self._restart('rss {} over limit'.format(rss))
+                return
+        if self._max_cpu:
+            now = time()
+            cpu = self.cpu_time()
+            if cpu is None:
+                return
+            if self._cpu_sample is None:
+                self.__dict__['_cpu_sample'] = (now, cpu)
+                return
+            then, then_cpu = self._cpu_sample
+            if now - then < CPU_SAMPLE_PERIOD:
+                return
+            self.__dict__['_cpu_sample'] = (now, cpu)
+            percent = 100 * (cpu - then_cpu) / (now - then)
+            if percent > self._max_cpu:
+                self._restart('cpu {:.0f}% over limit'.format(percent))
+
+    def close(self):
+        """
+        Stop the child process.
+        """
+        self._stop()
+
+
+if __name__ == '__main__':
+    # ignore ctrl-c, the core will stop us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    child_main(sys.argv[1])
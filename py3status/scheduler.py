@@ -0,0 +1,85 @@
+from threading import Condition, Thread
+from time import time
+
+# how long a batch may take before its output is released
+BATCH_TIMEOUT = 1
+
+
+class Scheduler(Thread):
+    """
+    Shared timer for module refreshes.
+
+    Rather than each module having its own ``threading.Timer`` modules ask
+    the scheduler to run them at a given time.  Refreshes that fall within
+    ``slack`` seconds of the earliest one are coalesced, the process wakes
+    once at the latest of them and the modules are run as a batch.  While a
+    batch is running ``batch_running`` is set so that py3status can wait and
+    output all their changes as a single i3bar line.
+    """
+
+    def __init__(self, slack):
+        Thread.__init__(self)
+        self.daemon = True
+        self.batch_running = False
+        self.batches = 0
+        self.slack = slack
+        self._condition = Condition()
+        self._timers = {}
+
+    def schedule(self, module, delay):
+        """
+        Run module in delay seconds replacing any existing schedule.
+        """
+        with self._condition:
+            self._timers[module] = time() + delay
+            self._condition.notify()
+
+    def cancel(self, module):
+        """
+        Remove any scheduled run of module.
+        """
+        with self._condition:
+            self._timers.pop(module, None)
+
+    def _next_batch(self):
+        """
+        Wait until a batch is due and return its modules.
+        """
+        with self._condition:
+            while True:
+                if not self._timers:
+                    self._condition.wait()
+                    continue
+                first = min(self._timers.values())
+                wake = max(
+                    when for when in self._timers.values()
+                    if when <= first + self.slack
+                )
+                now = time()
+                if wake <= now:
+                    break
+                self._condition.wait(wake - now)
+            due = [
+                module for module, when in self._timers.items()
+                if when <= now
+            ]
+            for module in due:
+                del self._timers[module]
+            self.batch_running = True
+            return due
+
+    def run(self):
+        while True:
+            due = self._next_batch()
+            self.batches += 1
+            threads = []
+            for module in due:
+                thread = Thread(target=module.run)
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+            # don't let a slow module hold up the output of the others
+            deadline = time() + BATCH_TIMEOUT
+            for thread in threads:
+                thread.join(max(deadline - time(), 0))
+            self.batch_running = False
@@ -0,0 +1,293 @@
+from json import dumps
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    # python 2
+    from collections import MutableMapping
+
+# keys of the i3bar protocol, these are stored in slots.  Any other keys a
+# module may add are kept in a dict.
+# https://i3wm.org/docs/i3bar-protocol.html
+KEYS = (
+    'full_text', 'short_text', 'color', 'background', 'border',
+    'border_top', 'border_right', 'border_bottom', 'border_left',
+    'min_width', 'align', 'urgent', 'name', 'instance', 'separator',
+    'separator_block_width', 'markup', 'index',
+)
+
+_KEY_SET = frozenset(KEYS)
+
+
+class Segment(object):
+    """
+    An immutable piece of i3bar output.
+
+    Once a module has produced its output it is frozen into Segments.  These
+    can then be shared by containers without being copied.  A container that
+    needs to change a segment eg set its color creates an overlay, a new
+    Segment with the changed keys.
+
+    Segments are compact, protocol keys are held in slots, and their hash and
+    JSON serialization are only calculated once.  Comparing Segments uses the
+    hash so unchanged output is quickly detected.
+
+    Segments provide read only dict style access so code that just looks at
+    output does not need to know about them.
+    """
+
+    __slots__ = KEYS + ('_extra', '_hash', '_json')
+
+    def __init__(self, data=None, **kw):
+        set_attr = object.__setattr__
+        set_attr(self, '_extra', None)
+        set_attr(self, '_hash', None)
+        set_attr(self, '_json', None)
+        if data:
+            if isinstance(data, Segment):
+                data = data.to_dict()
+            if kw:
+                data = dict(data, **kw)
+        else:
+            data = kw
+        extra = None
+        for key, value in data.items():
+            if key in _KEY_SET:
+                set_attr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        if extra:
+            set_attr(self, '_extra', extra)
+
+    def __setattr__(self, name, value):
+        raise TypeError('Segment is immutable')
+
+    def __delattr__(self, name):
+        raise TypeError('Segment is immutable')
+
+    def __setitem__(self, key, value):
+        raise TypeError('Segment is immutable')
+
+    def __delitem__(self, key):
+        raise TypeError('Segment is immutable')
+
+    def __getitem__(self, key):
+        if key in _KEY_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __contains__(self, key):
+        if key in _KEY_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Segment):
+            if hash(self) != hash(other):
+                return False
+            return self.to_json() == other.to_json()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(self.to_json()))
+        return self._hash
+
+    def __repr__(self):
+        return '<Segment {!r}>'.format(self.to_dict())
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = [key for key in KEYS if hasattr(self, key)]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """
+        Return the content as a new dict.
+        """
+        data = {}
+        for key in KEYS:
+            try:
+                data[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def to_json(self):
+        """
+        Return the content serialized as JSON.  This is only done once.
+        """
+        if self._json is None:
+            object.__setattr__(
+                self, '_json', dumps(self.to_dict(), sort_keys=True)
+            )
+        return self._json
+
+    def copy(self):
+        """
+        Return a mutable copy as a dict.
+        """
+        return self.to_dict()
+
+    def overlay(self, updates=None, remove=None):
+        """
+        Return a new Segment with updates applied and any keys in remove
+        removed.  The original Segment is not changed.
+        """
+        data = self.to_dict()
+        if updates:
+            data.update(updates)
+        for key in remove or []:
+            data.pop(key, None)
+        return Segment(data)
+
+
+class SegmentView(MutableMapping):
+    """
+    A mutable view of a shared Segment, as given to containers by
+    py3.get_output().
+
+    Containers written before output was shared change the items of the
+    output they get.  Changes made to a view are kept in the view, the
+    Segment itself and so the output of the other module is not changed.
+    Nothing is copied unless the view is changed.
+    """
+
+    def __init__(self, segment):
+        self.segment = segment
+        self._changes = {}
+        self._removed = set()
+
+    def __getitem__(self, key):
+        if key in self._changes:
+            return self._changes[key]
+        if key in self._removed:
+            raise KeyError(key)
+        return self.segment[key]
+
+    def __setitem__(self, key, value):
+        self._changes[key] = value
+        self._removed.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._changes.pop(key, None)
+        self._removed.add(key)
+
+    def __iter__(self):
+        for key in self.segment.keys():
+            if key not in self._removed and key not in self._changes:
+                yield key
+        for key in self._changes:
+            yield key
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def __repr__(self):
+        return '<SegmentView {!r}>'.format(dict(self.items()))
+
+    def copy(self):
+        """
+        Return the content as a new dict.
+        """
+        return dict(self.items())
+
+    def freeze(self):
+        """
+        Return the content as a Segment, the shared Segment itself if the
+        view has not been changed.
+        """
+        if not self._changes and not self._removed:
+            return self.segment
+        return self.segment.overlay(self._changes, self._removed)
+
+
+def freeze(item):
+    """
+    Return item as a Segment.
+    """
+    if isinstance(item, Segment):
+        return item
+    if isinstance(item, SegmentView):
+        return item.freeze()
+    return Segment(item)
+
+
+def view(item):
+    """
+    Return a mutable view of item if it is a Segment.
+    """
+    if isinstance(item, Segment):
+        return SegmentView(item)
+    return item
+
+
+def update_item(item, updates, soft=False):
+    """
+    Update an output item, a dict or Segment, and return it.
+    Dicts are updated in place, Segments get an overlay.
+    If soft is True existing values are not overwritten.
+    """
+    if soft:
+        updates = dict(
+            (key, value) for key, value in updates.items() if key not in item
+        )
+        if not updates:
+            return item
+    if isinstance(item, Segment):
+        return item.overlay(updates)
+    item.update(updates)
+    return item
+
+
+def remove_key(item, key):
+    """
+    Remove key from an output item, a dict or Segment, and return it.
+    """
+    if key not in item:
+        return item
+    if isinstance(item, Segment):
+        return item.overlay(remove=[key])
+    del item[key]
+    return item
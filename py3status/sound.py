@@ -0,0 +1,125 @@
+import os
+import wave
+
+from subprocess import Popen, PIPE
+from threading import Lock, Thread
+
+PLAYERS = ['paplay', 'play']
+
+# wav files no longer than this are decoded once and kept in memory
+PRELOAD_SECONDS = 5
+
+# sample formats paplay understands by sample width in bytes
+RAW_FORMATS = {1: 'u8', 2: 's16le', 3: 's24le', 4: 's32le'}
+
+
+def which(command):
+    """
+    Return the path of command if it is on the PATH.
+    """
+    for path in os.environ.get('PATH', os.defpath).split(os.pathsep):
+        filename = os.path.join(path, command)
+        if os.path.isfile(filename) and os.access(filename, os.X_OK):
+            return filename
+
+
+class SoundPlayer:
+    """
+    Plays sound files for all modules.
+
+    The player is looked for on the PATH once.  Short wav files are decoded
+    the first time they are loaded and their samples are kept, they are
+    then fed to paplay as raw audio so the file is not read again.  Other
+    files are passed to the player as they are.
+    """
+
+    def __init__(self, players=PLAYERS):
+        self._lock = Lock()
+        self._player = False
+        self._players = players
+        self._sounds = {}
+
+    def player(self):
+        """
+        Return (name, path) of the player to use, or None if there is none.
+        """
+        with self._lock:
+            if self._player is False:
+                self._player = None
+                for name in self._players:
+                    path = which(name)
+                    if path:
+                        self._player = (name, path)
+                        break
+            return self._player
+
+    def load(self, sound_file):
+        """
+        Decode sound_file if it is a short wav file and paplay is the player.
+        The file is decoded again only if it is modified.  Returns True if
+        its samples are kept in memory.
+        """
+        player = self.player()
+        if not player or player[0] != 'paplay':
+            return False
+        sound_file = os.path.expanduser(sound_file)
+        try:
+            mtime = os.stat(sound_file).st_mtime
+        except OSError:
+            return False
+        with self._lock:
+            cached = self._sounds.get(sound_file)
+        if cached and cached[0] == mtime:
+            return cached[1] is not None
+
+        sound = None
+        try:
+            wav = wave.open(sound_file, 'rb')
+            try:
+                width = wav.getsampwidth()
+                rate = wav.getframerate()
+                frames = wav.getnframes()
+                if width in RAW_FORMATS and frames <= PRELOAD_SECONDS * rate:
+                    args = [
+                        '--raw',
+                        '--format={}'.format(RAW_FORMATS[width]),
+                        '--rate={}'.format(rate),
+                        '--channels={}'.format(wav.getnchannels()),
+                    ]
+                    sound = (args, wav.readframes(frames))
+            finally:
+                wav.close()
+        except (wave.Error, EOFError, IOError):
+            pass
+        with self._lock:
+            self._sounds[sound_file] = (mtime, sound)
+        return sound is not None
+
+    def play(self, sound_file):
+        """
+        Start playing sound_file.  Returns the player process, which can be
+        killed to stop the sound, or None if there is no player.
+        """
+        player = self.player()
+        if not player:
+            return None
+        sound_file = os.path.expanduser(sound_file)
+        if not self.load(sound_file):
+            return Popen([player[1], sound_file])
+
+        with self._lock:
+            args, samples = self._sounds[sound_file][1]
+        process = Popen([player[1]] + args, stdin=PIPE)
+        # paplay reads the samples as it plays them
+        feeder = Thread(target=self._feed, args=(process, samples))
+        feeder.daemon = True
+        feeder.start()
+        return process
+
+    def _feed(self, process, samples):
+        try:
+            process.stdin.write(samples)
+            process.stdin.close()
+        except (IOError, OSError):
+            # the sound was stopped
+            pass
@@ -0,0 +1,62 @@
+from threading import Lock
+
+
+class Subscription:
+    """
+    A callback a module registered with one of the services py3status
+    shares between modules, such as DBus signals, network changes or
+    timers.  Each service subclasses this and implements _disconnect().
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        # False once disconnected, or for one-shot callbacks once run
+        self.active = True
+        # Subscriptions of the module this is removed from once disconnected
+        self.registry = None
+
+    def disconnect(self):
+        """
+        Stop the callback from being called.  It is safe to call this more
+        than once.
+        """
+        if self.registry is not None:
+            self.registry.discard(self)
+        self._disconnect()
+        self.active = False
+
+    def _disconnect(self):
+        raise NotImplementedError
+
+
+class Subscriptions:
+    """
+    The subscriptions of a module that are still active, so that they can
+    be disconnected when it is killed.  Services remove them from their own
+    threads so this is protected by a lock.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._subscriptions = set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def add(self, subscription):
+        subscription.registry = self
+        with self._lock:
+            # a timer can be run before it is added
+            if subscription.active:
+                self._subscriptions.add(subscription)
+
+    def discard(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def disconnect_all(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.disconnect()
@@ -0,0 +1,117 @@
+import heapq
+
+from itertools import count
+from threading import Condition, Thread
+from time import time
+
+from py3status.subscription import Subscription
+
+
+class Deadline(Subscription):
+    """
+    A callback registered with the TimerQueue to be run once when it is due.
+    It is no longer active once it has been cancelled or run.
+    """
+
+    def __init__(self, queue, when, callback):
+        Subscription.__init__(self, callback)
+        self.queue = queue
+        self.when = when
+
+    def _disconnect(self):
+        self.queue._cancel(self)
+
+    def cancel(self):
+        """
+        Stop the callback from being run.  It is safe to call this more than
+        once or after the callback has been run.
+        """
+        self.disconnect()
+
+
+class TimerQueue:
+    """
+    One-shot timers shared by all modules.
+
+    Rather than each module starting a ``threading.Timer`` for every alarm
+    deadlines are kept in a heap and a single thread sleeps until the
+    earliest of them.  The thread is started when the first deadline is
+    added.  Callbacks are run in that thread so they should be quick.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self._cancelled = 0
+        self._condition = Condition()
+        self._heap = []
+        self._order = count()
+
+    def add(self, delay, callback):
+        """
+        Call callback() in delay seconds.  Returns a Deadline.
+        """
+        deadline = Deadline(self, time() + delay, callback)
+        with self._condition:
+            heapq.heappush(
+                self._heap, (deadline.when, next(self._order), deadline)
+            )
+            if self.thread is None:
+                self.thread = Thread(target=self._run)
+                self.thread.daemon = True
+                self.thread.start()
+            self._condition.notify()
+        return deadline
+
+    def pending(self):
+        """
+        Return the number of deadlines waiting to be run.
+        """
+        with self._condition:
+            return len(self._heap) - self._cancelled
+
+    def _cancel(self, deadline):
+        with self._condition:
+            # deadlines are made inactive once they have been run
+            if not deadline.active:
+                return
+            deadline.active = False
+            self._cancelled += 1
+            # don't let pauses and restarts fill the heap
+            if self._cancelled * 2 > len(self._heap):
+                self._heap = [
+                    entry for entry in self._heap if entry[2].active
+                ]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+            self._condition.notify()
+
+    def _next_deadline(self):
+        """
+        Wait until a deadline is due and return it.
+        """
+        with self._condition:
+            while True:
+                while self._heap and not self._heap[0][2].active:
+                    heapq.heappop(self._heap)
+                    self._cancelled -= 1
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - time()
+                if delay <= 0:
+                    deadline = heapq.heappop(self._heap)[2]
+                    # it can no longer be cancelled
+                    deadline.active = False
+                    return deadline
+                self._condition.wait(delay)
+
+    def _run(self):
+        while True:
+            deadline = self._next_deadline()
+            if deadline.registry is not None:
+                deadline.registry.discard(deadline)
+            try:
+                deadline.callback()
+            except Exception:
+                # module callbacks are wrapped by Py3 which reports errors
+                pass
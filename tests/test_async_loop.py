@@ -0,0 +1,218 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from py3status.async_loop import AsyncLoop
+from py3status.executor import CallTimeout
+from py3status.module import Module
+from py3status.process_table import ProcessTable
+from py3status.py3 import Py3
+
+from test_module import make_module
+
+asyncio = pytest.importorskip('asyncio')
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 5), reason='async def needs python 3.5'
+)
+
+# async def is a syntax error on older pythons so the test modules are
+# compiled at runtime.
+MODULES = '''
+class Counter:
+    """
+    Polled, its method waits on the loop.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    async def counter(self):
+        await self.py3.async_sleep(0.01)
+        self.count += 1
+        return {'full_text': str(self.count)}
+
+    async def slow(self):
+        await self.py3.async_sleep(10)
+
+
+class Listener:
+    """
+    Push, a background task updates the module when an event happens.
+    """
+
+    def post_config_hook(self):
+        self.event = None
+        self.events = []
+        self.threads = set()
+        self.py3.create_task(self._listen())
+
+    async def _listen(self):
+        import asyncio
+        import threading
+        self.event = asyncio.Event()
+        while True:
+            await self.event.wait()
+            self.event.clear()
+            self.threads.add(threading.current_thread())
+            self.events.append(len(self.events))
+            self.py3.update()
+
+    def listener(self):
+        return {
+            'full_text': str(len(self.events)),
+            'cached_until': self.py3.CACHE_FOREVER,
+        }
+'''
+
+
+def module_classes():
+    namespace = {}
+    exec(MODULES, namespace)
+    return namespace
+
+
+def make_async_module(name):
+    module, wrapper = make_module(name.lower())
+    module.methods[name.lower()].update({
+        'cached_until': 0, 'call_type': Module.PARAMS_NEW, 'name': None,
+    })
+    wrapper.async_loop = AsyncLoop()
+    module.module_class = module_classes()[name]()
+    module.module_class.py3 = Py3(module)
+    module.loaded = True
+    module.sleeping = True
+    return module, wrapper
+
+
+def test_submit():
+    loop = AsyncLoop()
+    assert loop.submit(sum, [1, 2]).result(1) == 3
+    call = loop.submit(loop.sleep, 0.2)
+    with pytest.raises(CallTimeout):
+        call.result(0.01)
+    assert loop.stuck == 1
+    call.result(1)
+    assert loop.stuck == 0
+
+
+def test_async_method():
+    module, wrapper = make_async_module('Counter')
+    module.method_timeout = 1
+    for i in range(3):
+        module.methods['counter']['cached_until'] = 0
+        module.run()
+    assert module.get_latest()[0]['full_text'] == '3'
+
+    # a slow coroutine gets the same deadline as a slow thread
+    del module.methods['counter']
+    module.methods['slow'] = {
+        'cached_until': 0, 'call_type': Module.PARAMS_NEW, 'name': None,
+        'method': 'slow',
+    }
+    module.method_timeout = 0.05
+    module.run()
+    assert module.error_messages[1] == 'uptime: timed out after 0.05s'
+    assert wrapper.async_loop.stuck == 1
+
+
+def test_push_modules_share_loop():
+    before = threading.active_count()
+    modules = []
+    loop = AsyncLoop()
+    for i in range(20):
+        module, wrapper = make_async_module('Listener')
+        wrapper.async_loop = loop
+        module.call(module.module_class.post_config_hook)
+        modules.append(module)
+    # one thread for all the modules
+    assert threading.active_count() == before + 1
+
+    for module in modules:
+        while module.module_class.event is None:
+            time.sleep(0.01)
+        for i in range(3):
+            loop.loop.call_soon_threadsafe(module.module_class.event.set)
+            time.sleep(0.02)
+
+    threads = set()
+    for module in modules:
+        threads.update(module.module_class.threads)
+        assert module.module_class.events == [0, 1, 2]
+        # py3.update() has refreshed the module
+        assert module.get_latest()[0]['full_text'] == '3'
+    assert threads == {loop.thread}
+
+    for module in modules:
+        task = list(module.async_tasks)[0]
+        module.kill()
+        with pytest.raises(asyncio.CancelledError):
+            task.result(1)
+        assert task.cancelled
+        assert not module.async_tasks
+
+
+def test_command_output():
+    # module test mode
+    py3 = Py3()
+    loop = py3._get_async_loop()
+    threads = threading.active_count()
+    call = loop.submit(lambda: py3.async_command_output(['echo', 'hello']))
+    assert call.result(5) == 'hello\n'
+    call = loop.submit(lambda: py3.async_command_output('echo $0', shell=True))
+    assert call.result(5) == '/bin/sh\n'
+    for command in ['false', 'does-not-exist']:
+        call = loop.submit(lambda: py3.async_command_output(command))
+        with pytest.raises(Py3.CommandError):
+            call.result(5)
+    # the commands are not waited on by executor threads
+    assert threading.active_count() == threads
+
+
+def test_command_killed_when_cancelled():
+    py3 = Py3()
+    loop = py3._get_async_loop()
+    processes = ProcessTable(max_age=0)
+    call = loop.submit(lambda: py3.async_command_output('sleep 31'))
+    time.sleep(0.2)
+    assert processes.is_running('sleep 31', full=True, exact=True)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        call.result(1)
+    time.sleep(0.2)
+    assert not processes.is_running('sleep 31', full=True, exact=True)
+
+
+def test_task_registered_before_it_runs():
+    module, wrapper = make_async_module('Listener')
+    module.call(module.module_class.post_config_hook)
+    task = list(module.async_tasks)[0]
+    # killed before the task has had a chance to start
+    module.kill()
+    with pytest.raises(asyncio.CancelledError):
+        task.result(1)
+    assert module.module_class.event is None
+    assert not module.async_tasks
+
+
+def test_asyncio_not_imported_at_startup():
+    # asyncio is slow to import, only modules that use it should pay for it
+    check = (
+        'import sys\n'
+        'import py3status.core, py3status.module, py3status.py3\n'
+        'print(sorted(set(sys.modules) & {"asyncio", "py3status.async_loop"}))'
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    output = subprocess.check_output([sys.executable, '-c', check], env=env)
+    assert output.strip() == b'[]'
+
+    module, wrapper = make_async_module('Counter')
+    wrapper.async_loop = None
+    module.run()
+    assert module.get_latest()[0]['full_text'] == '1'
+    assert wrapper.async_loop
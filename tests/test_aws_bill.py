@@ -0,0 +1,165 @@
+import datetime
+import threading
+
+import pytest
+
+boto = pytest.importorskip('boto')
+
+from boto.s3.connection import OrdinaryCallingFormat  # noqa
+
+from py3status.composite import Composite  # noqa
+from py3status.modules.aws_bill import Py3status  # noqa
+from py3status.py3 import Py3  # noqa
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+ACCOUNT = '123456789012'
+BUCKET = 'billing'
+LAST_MODIFIED = 'Mon, 02 Oct 2017 10:00:00 GMT'
+
+
+def billing_csv(total, rows=100000):
+    lines = ['"InvoiceID","RecordType","ProductName","TotalCost"']
+    for i in range(rows):
+        lines.append('"1","LinkedLineItem","Amazon EC2","{}"'.format(i % 7))
+    lines.append('"1","InvoiceTotal","","{}"'.format(total))
+    lines.append('"","StatementTotal","","{}"'.format(total))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class S3Handler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for S3 serving one bucket of billing files.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', self.path, None))
+        code = 200 if self.path.strip('/') == BUCKET else 404
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        etag = '"{}"'.format(self.server.version)
+        body = self.server.files.get(self.path.lstrip('/'))
+        if body is None:
+            self.server.requests.append(('GET', self.path, 404))
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == etag:
+            self.server.requests.append(('GET', self.path, 304))
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.server.requests.append(('GET', self.path, 200))
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except Exception:
+            # the client stopped reading once it had the total
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class S3Server(ThreadingMixIn, HTTPServer):
+    # connections are kept alive so each needs its own thread
+    daemon_threads = True
+
+
+@pytest.fixture
+def s3():
+    server = S3Server(('127.0.0.1', 0), S3Handler)
+    server.files = {}
+    server.requests = []
+    server.version = 1
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def file_key():
+    return '{}/{}-aws-billing-csv-{}.csv'.format(
+        BUCKET, ACCOUNT, datetime.datetime.now().strftime('%Y-%m'))
+
+
+def make_aws_bill(s3):
+    aws_bill = Py3status()
+    aws_bill.py3 = Py3(py3status=aws_bill)
+    aws_bill.aws_account_id = ACCOUNT
+    aws_bill.s3_bucket_name = BUCKET
+    aws_bill.post_config_hook()
+
+    def connect():
+        return boto.connect_s3(
+            'key', 'secret', host='127.0.0.1', port=s3.server_port,
+            is_secure=False, calling_format=OrdinaryCallingFormat(),
+        )
+
+    aws_bill._connect = connect
+    return aws_bill
+
+
+def test_conditional_download(s3):
+    s3.files[file_key()] = billing_csv('108.78')
+    aws_bill = make_aws_bill(s3)
+    for i in range(3):
+        assert text(aws_bill.aws_bill()) == '108.78$'
+    gets = [r[2] for r in s3.requests if r[0] == 'GET']
+    assert gets == [200, 304, 304]
+    # the bucket is only looked up once
+    assert len([r for r in s3.requests if r[0] == 'HEAD']) == 1
+
+    # the bill has changed
+    s3.files[file_key()] = billing_csv('120.50')
+    s3.version = 2
+    assert text(aws_bill.aws_bill()) == '120.50$'
+    assert text(aws_bill.aws_bill()) == '120.50$'
+    gets = [r[2] for r in s3.requests if r[0] == 'GET']
+    assert gets == [200, 304, 304, 200, 304]
+
+
+def test_errors(s3):
+    aws_bill = make_aws_bill(s3)
+    assert text(aws_bill.aws_bill()) == 'Key not found in the bucket'
+    aws_bill.s3_bucket_name = 'other'
+    aws_bill._bucket = None
+    response = aws_bill.aws_bill()
+    assert text(response) == 'Check the bucket name or your AWS keys'
+
+
+def test_no_total(s3):
+    s3.files[file_key()] = b'"InvoiceID","RecordType"\n"1","LineItem"\n'
+    aws_bill = make_aws_bill(s3)
+    response = aws_bill.aws_bill()
+    assert text(response) == 'Global error - WTF exception'
+    # nothing was cached so the file is fetched again
+    aws_bill.aws_bill()
+    gets = [r[2] for r in s3.requests if r[0] == 'GET']
+    assert gets == [200, 200]
@@ -0,0 +1,117 @@
+import time
+from datetime import datetime
+
+import pytest
+
+pytz = pytest.importorskip('pytz')
+pytest.importorskip('tzlocal')
+
+from py3status.composite import Composite  # noqa
+from py3status.py3 import Py3  # noqa
+from py3status.modules import clock as clock_module  # noqa
+from py3status.modules.clock import Py3status  # noqa
+
+ZONES = sorted(pytz.common_timezones)[::8][:50]
+
+
+def text(output):
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def count_transitions(clock):
+    """
+    Record the zones whose next transition is looked for.
+    """
+    searched = []
+    next_transition = clock._next_transition
+
+    def counting(zone, now, current):
+        searched.append(zone.zone)
+        return next_transition(zone, now, current)
+
+    clock._next_transition = counting
+    return searched
+
+
+def make_clock(**config):
+    clock = Py3status()
+    clock.py3 = Py3(py3status=clock)
+    for key, value in config.items():
+        setattr(clock, key, value)
+    clock.post_config_hook()
+    return clock
+
+
+def test_offset_cached_until_transition():
+    clock = make_clock(format='{Europe/London}')
+    zone = pytz.timezone('Europe/London')
+    # 2017-03-26 01:00 UTC clocks go forward
+    transition = 1490490000
+    tzinfo, offset = clock._get_offset('Europe/London', zone, transition - 60)
+    assert offset.total_seconds() == 0
+    assert clock._offsets['Europe/London'][0] == transition
+    tzinfo, offset = clock._get_offset('Europe/London', zone, transition)
+    assert offset.total_seconds() == 3600
+    assert datetime(2017, 3, 26, tzinfo=tzinfo).strftime('%Z') == 'BST'
+
+
+@pytest.mark.parametrize('format_time', [
+    '%Y-%m-%d %H:%M:%S %Z %z',
+    '{name} %H:%M',
+])
+def test_render_matches_datetime(format_time):
+    clock = make_clock(format=' '.join('{%s}' % x for x in ZONES),
+                       format_time=format_time)
+    now = time.time()
+    for name in ZONES:
+        zone = pytz.timezone(name)
+        expected = datetime.fromtimestamp(now, zone).strftime(
+            format_time.replace('{name}', name.split('/')[-1].replace('_', ' '))
+        )
+        assert text(clock._render(name, zone, now)) == expected
+
+
+def test_50_zones(monkeypatch):
+    now = [1500000000.5]
+    monkeypatch.setattr(clock_module, 'time', lambda: now[0])
+    clock = make_clock(format=' '.join('{%s}' % x for x in ZONES),
+                       format_time='%H:%M:%S')
+    searched = count_transitions(clock)
+    get_template = clock._get_template
+    built = []
+
+    def counting_template(*args):
+        if args not in clock._templates:
+            built.append(args)
+        return get_template(*args)
+
+    clock._get_template = counting_template
+    # a minute of updates every second
+    outputs = set()
+    for tick in range(60):
+        outputs.add(text(clock.clock([], {})['full_text']))
+        now[0] += 1
+    assert len(outputs) == 60
+    # no offset is worked out again between ticks
+    assert sorted(searched) == sorted(set(searched))
+    assert len(set(searched)) > len(ZONES) / 2
+    assert len(built) == len(ZONES)
+
+
+def test_offset_changes_at_transition(monkeypatch):
+    # 2017-03-26 01:00 UTC clocks go forward
+    now = [1490490000 - 30.5]
+    monkeypatch.setattr(clock_module, 'time', lambda: now[0])
+    clock = make_clock(format='{Europe/London}', format_time='%H:%M:%S %Z')
+    searched = count_transitions(clock)
+    outputs = []
+    for tick in range(60):
+        outputs.append(text(clock.clock([], {})['full_text']))
+        now[0] += 1
+    assert outputs[0] == '00:59:29 GMT'
+    assert outputs[30:32] == ['00:59:59 GMT', '02:00:00 BST']
+    assert outputs[-1] == '02:00:28 BST'
+    # worked out at the start and once the clocks went forward
+    assert searched == ['Europe/London'] * 2
@@ -0,0 +1,170 @@
+import base64
+import json
+import os
+import threading
+
+import pytest
+
+pytest.importorskip('requests')
+
+from py3status.composite import Composite  # noqa
+from py3status.modules import coin_balance  # noqa
+from py3status.py3 import Py3  # noqa
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+class CoinHandler(BaseHTTPRequestHandler):
+    """
+    Fake coin daemon, answering getbalance JSON-RPC requests.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        call = json.loads(self.rfile.read(length).decode('utf-8'))
+        self.server.requests.append(call)
+        self.server.connections.add(self.client_address)
+        auth = 'Basic ' + base64.b64encode(
+            self.server.credentials.encode('utf-8')).decode('ascii')
+        if self.headers.get('Authorization') != auth:
+            self.reply(401, b'')
+            return
+        if self.server.garbage:
+            self.reply(200, b'<html>')
+            return
+        if call['method'] == 'getbalance':
+            reply = {'result': self.server.balance, 'error': None}
+        else:
+            reply = {'result': None,
+                     'error': {'code': -32601, 'message': 'not found'}}
+        reply['id'] = call.get('id')
+        self.reply(200, json.dumps(reply).encode('utf-8'))
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class CoinServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = CoinServer(('127.0.0.1', 0), CoinHandler)
+    server.balance = 90.6428
+    server.connections = set()
+    server.credentials = 'geordi:WarpByBrahms'
+    server.garbage = False
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    monkeypatch.setattr(coin_balance, 'CLIENTS', {})
+    monkeypatch.setitem(coin_balance.COIN_PORTS, 'litecoin',
+                        server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def home(tmpdir, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmpdir))
+    tmpdir.mkdir('.litecoin')
+    return tmpdir
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def make_module(**config):
+    module = coin_balance.Py3status()
+    module.py3 = Py3(py3status=module)
+    for key, value in config.items():
+        setattr(module, key, value)
+    module.post_config_hook()
+    return module
+
+
+def write_config(home, user, password, mtime):
+    path = str(home.join('.litecoin', 'litecoin.conf'))
+    with open(path, 'w') as f:
+        f.write('# litecoin\nrpcuser={}\nrpcpassword={}\n'.format(
+            user, password))
+    os.utime(path, (mtime, mtime))
+
+
+def test_keep_alive(server, home):
+    first = make_module(format='{litecoin} {litecoin}',
+                        username='geordi', password='WarpByBrahms')
+    second = make_module(format='LTC {litecoin}',
+                         username='geordi', password='WarpByBrahms')
+    for i in range(3):
+        assert text(first.coin_balance([], {})) == '90.6428 90.6428'
+        assert text(second.coin_balance([], {})) == 'LTC 90.6428'
+    # one plain call per refresh, all over the same connection
+    assert server.requests[0] == {'method': 'getbalance'}
+    assert len(server.requests) == 6
+    assert len(server.connections) == 1
+
+
+def test_errors(server, home, monkeypatch):
+    module = make_module(format='{litecoin} {dogecoin}',
+                         username='geordi', password='wrong')
+    monkeypatch.setitem(coin_balance.COIN_PORTS, 'dogecoin', 1)
+    assert text(module.coin_balance([], {})) == \
+        "Authentication failed Connection to 'http://localhost:1' failed"
+
+    client = coin_balance.get_client(module._get_url('litecoin'))
+    auth = ('geordi', 'WarpByBrahms')
+    assert client.call({'method': 'getbalance'}, auth=auth) == 90.6428
+    assert client.call({'method': 'getinfo'}, auth=auth) is None
+
+    # a reply that is not JSON
+    server.garbage = True
+    module.password = 'WarpByBrahms'
+    assert text(module.coin_balance([], {})).startswith(
+        "Connection to 'http://localhost:{}' failed".format(
+            server.server_address[1]))
+
+
+def test_daemon_credentials(server, home, monkeypatch):
+    write_config(home, 'geordi', 'WarpByBrahms', 1000)
+    module = make_module()
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args):
+        opened.append(path)
+        return real_open(path, *args)
+
+    monkeypatch.setattr(coin_balance, 'open', counting_open, raising=False)
+    assert text(module.coin_balance([], {})) == 'LTC: 90.6428'
+    assert text(module.coin_balance([], {})) == 'LTC: 90.6428'
+    # the file is only parsed once while it is unchanged
+    assert len(opened) == 1
+
+    write_config(home, 'geordi', 'changed', 2000)
+    assert text(module.coin_balance([], {})) == \
+        'LTC: Authentication failed'
+    server.credentials = 'geordi:changed'
+    assert text(module.coin_balance([], {})) == 'LTC: 90.6428'
+    assert len(opened) == 2
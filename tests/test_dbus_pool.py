@@ -0,0 +1,239 @@
+import subprocess
+import time
+
+import pytest
+
+from py3status.dbus_pool import DBusPool, PROPERTIES_INTERFACE
+
+
+class FakeLoop:
+    def __init__(self):
+        self.started = 0
+
+    def start(self):
+        self.started += 1
+
+
+class Variant:
+    def __init__(self, value):
+        self.value = value
+
+    def unpack(self):
+        return self.value
+
+
+class FakeConnection:
+    """
+    Records the match rules added to the bus and lets the test emit
+    signals.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.next_id = 1
+
+    def signal_subscribe(self, sender, iface, signal, path, arg0, flags,
+                         callback):
+        self.subscriptions[self.next_id] = (
+            (sender, iface, signal, path, arg0), callback
+        )
+        self.next_id += 1
+        return self.next_id - 1
+
+    def signal_unsubscribe(self, id):
+        del self.subscriptions[id]
+
+    def emit(self, sender, iface, signal, path, params):
+        arg0 = params[0] if params else None
+        for rule, callback in list(self.subscriptions.values()):
+            # as on the bus a rule matches anything it leaves out
+            values = (sender, iface, signal, path, arg0)
+            if all(r in (None, v) for r, v in zip(rule, values)):
+                callback(self, sender, path, iface, signal, Variant(params))
+
+
+class FakeProxy:
+    def __init__(self, bus, name, path):
+        self.bus = bus
+        self.name = name
+        self.path = path
+
+    def __getitem__(self, interface):
+        assert interface == PROPERTIES_INTERFACE
+        return self
+
+    def GetAll(self, interface):
+        self.bus.get_alls += 1
+        return dict(self.bus.properties)
+
+
+class FakeBus:
+    def __init__(self):
+        self.con = FakeConnection()
+        self.get_alls = 0
+        self.gets = 0
+        self.properties = {'Status': 'Playing', 'Volume': 0.5}
+
+    def get(self, name, path=None):
+        self.gets += 1
+        return FakeProxy(self, name, path)
+
+
+@pytest.fixture
+def pool():
+    pool = DBusPool(FakeLoop())
+    pool._buses[False] = FakeBus()
+    return pool
+
+
+def test_proxies_cached(pool):
+    bus = pool.bus()
+    proxy = pool.get('org.example', '/org/example')
+    assert pool.get('org.example', '/org/example') is proxy
+    assert pool.get('org.example', '/org/other') is not proxy
+    assert bus.gets == 2
+
+
+def test_subscriptions_shared(pool):
+    con = pool.bus().con
+    received = []
+
+    def listener(name):
+        def callback(sender, path, iface, signal, params):
+            received.append((name, params))
+        return callback
+
+    first = pool.subscribe(listener('first'), iface='org.example',
+                           signal='Changed')
+    second = pool.subscribe(listener('second'), iface='org.example',
+                            signal='Changed')
+    # a single match rule serves both
+    assert len(con.subscriptions) == 1
+    assert pool.glib_loop.started == 2
+
+    con.emit(None, 'org.example', 'Changed', None, ('a',))
+    assert received == [('first', ('a',)), ('second', ('a',))]
+
+    first.disconnect()
+    first.disconnect()
+    con.emit(None, 'org.example', 'Changed', None, ('b',))
+    assert received[2:] == [('second', ('b',))]
+    second.disconnect()
+    assert con.subscriptions == {}
+
+
+def test_properties_snapshot(pool):
+    bus = pool.bus()
+    args = ('org.example', '/org/example', 'org.example.Player')
+    assert pool.properties(*args) == {'Status': 'Playing', 'Volume': 0.5}
+    assert pool.properties(*args)['Status'] == 'Playing'
+    assert bus.get_alls == 1
+
+    # changes are taken from the signal
+    bus.con.emit('org.example', PROPERTIES_INTERFACE, 'PropertiesChanged',
+                 '/org/example', ('org.example.Player', {'Status': 'Paused'},
+                                  []))
+    assert pool.properties(*args)['Status'] == 'Paused'
+    assert bus.get_alls == 1
+
+    # invalidated properties are fetched again
+    bus.properties['Volume'] = 1.0
+    bus.con.emit('org.example', PROPERTIES_INTERFACE, 'PropertiesChanged',
+                 '/org/example', ('org.example.Player', {}, ['Volume']))
+    assert pool.properties(*args)['Volume'] == 1.0
+    assert bus.get_alls == 2
+
+    # and so is everything when the service is restarted
+    bus.con.emit('org.freedesktop.DBus', 'org.freedesktop.DBus',
+                 'NameOwnerChanged', None, ('org.example', ':1.1', ':1.2'))
+    pool.properties(*args)
+    assert bus.get_alls == 3
+
+    pool.forget_properties(*args)
+    assert bus.con.subscriptions == {}
+
+
+def test_snapshot_updated_before_modules(pool):
+    bus = pool.bus()
+    args = ('org.example', '/org/example', 'org.example.Player')
+    seen = []
+
+    def callback(sender, path, iface, signal, params):
+        seen.append(pool.properties(*args)['Status'])
+
+    pool.subscribe(callback, sender='org.example',
+                   iface=PROPERTIES_INTERFACE, signal='PropertiesChanged',
+                   object_path='/org/example', arg0='org.example.Player')
+    pool.properties(*args)
+    bus.con.emit('org.example', PROPERTIES_INTERFACE, 'PropertiesChanged',
+                 '/org/example', ('org.example.Player', {'Status': 'Paused'},
+                                  []))
+    assert seen == ['Paused']
+
+
+EXAMPLE_XML = """
+<node>
+  <interface name='net.py3status.Example'>
+    <property name='Title' type='s' access='read'>
+      <annotation name='org.freedesktop.DBus.Property.EmitsChangedSignal'
+        value='true'/>
+    </property>
+  </interface>
+</node>
+"""
+
+
+@pytest.fixture
+def dbus_daemon():
+    pytest.importorskip('pydbus')
+    try:
+        daemon = subprocess.Popen(
+            ['dbus-daemon', '--session', '--nofork', '--print-address'],
+            stdout=subprocess.PIPE,
+        )
+    except OSError:
+        pytest.skip('dbus-daemon is not installed')
+    address = daemon.stdout.readline().decode('utf-8').strip()
+    yield address
+    daemon.terminate()
+    daemon.wait()
+
+
+def test_private_bus(dbus_daemon):
+    import pydbus
+    from pydbus.generic import signal
+    from py3status.glib_loop import GLibLoop
+
+    class Example(object):
+        dbus = EXAMPLE_XML
+        PropertiesChanged = signal()
+
+        def __init__(self):
+            self.Title = 'first'
+
+    example = Example()
+    service = pydbus.connect(dbus_daemon)
+    publication = service.publish('net.py3status.Example', example)
+
+    pool = DBusPool(GLibLoop())
+    pool._buses[False] = pydbus.connect(dbus_daemon)
+    path = '/net/py3status/Example'
+    args = ('net.py3status.Example', path, 'net.py3status.Example')
+    proxy = pool.get('net.py3status.Example', path)
+    assert pool.get('net.py3status.Example', path) is proxy
+    assert pool.properties(*args) == {'Title': 'first'}
+
+    example.Title = 'second'
+    example.PropertiesChanged(
+        'net.py3status.Example', {'Title': 'second'}, []
+    )
+    for i in range(200):
+        values = pool._properties[(False,) + args]['values']
+        if values and values['Title'] == 'second':
+            break
+        time.sleep(0.01)
+    assert values == {'Title': 'second'}
+
+    pool.forget_properties(*args)
+    assert pool._signals == {}
+    publication.unpublish()
@@ -0,0 +1,91 @@
+import time
+
+from threading import Event
+
+import pytest
+
+from py3status.executor import CallTimeout, ThreadPool
+
+from test_module import make_runnable_module
+
+
+def test_result():
+    pool = ThreadPool(2)
+    assert pool.submit(lambda x: x * 2, 21).result(1) == 42
+    with pytest.raises(ZeroDivisionError):
+        pool.submit(lambda: 1 / 0).result(1)
+
+
+def test_bounded():
+    pool = ThreadPool(3)
+    release = Event()
+    calls = [pool.submit(release.wait) for i in range(6)]
+    time.sleep(0.1)
+    assert pool.busy == 3
+    release.set()
+    assert all(call.result(1) for call in calls)
+
+
+def test_stuck_call_replaced():
+    pool = ThreadPool(1)
+    release = Event()
+    stuck = pool.submit(release.wait)
+    with pytest.raises(CallTimeout):
+        stuck.result(0.1)
+    assert pool.stuck == 1
+    # the pool still runs other calls
+    assert pool.submit(lambda: 'ok').result(1) == 'ok'
+    # the stuck call can still complete and its thread leaves the pool
+    release.set()
+    assert stuck.result(1)
+    time.sleep(0.1)
+    assert pool.stuck == 0
+
+
+class Stuck:
+    cache_timeout = 10
+
+    def __init__(self):
+        self.release = Event()
+
+    def uptime(self):
+        self.release.wait()
+        return {'full_text': 'finally'}
+
+
+def test_stuck_module():
+    module = make_runnable_module()
+    module.module_class = Stuck()
+    module._py3_wrapper.executor = ThreadPool(2)
+    module.method_timeout = 0.2
+    module.module_class.py3 = make_runnable_module().module_class.py3
+
+    start = time.time()
+    module.run()
+    assert time.time() - start < 1
+    assert module.error_messages[1] == 'uptime: timed out after 0.2s'
+
+    # when the call completes its result is used on the next run
+    module.module_class.release.set()
+    time.sleep(0.1)
+    module.methods['uptime']['cached_until'] = 0
+    module.run()
+    assert module.get_latest()[0]['full_text'] == 'finally'
+    assert module.pending_calls == {}
+
+
+def test_stuck_module_default_timeout():
+    module = make_runnable_module()
+    module.module_class = Stuck()
+    module.module_class.cache_timeout = 0.2
+    module.module_class.py3 = make_runnable_module().module_class.py3
+    pool = module._py3_wrapper.executor = ThreadPool(1)
+    assert module.method_timeout is None
+
+    # without a method_timeout the module's interval is used
+    module.run()
+    assert module.error_messages[1] == 'uptime: timed out after 0.2s'
+    assert pool.stuck == 1
+    # so the hung method does not hold the only pool thread
+    assert pool.submit(lambda: 'ok').result(1) == 'ok'
+    module.module_class.release.set()
@@ -0,0 +1,130 @@
+import json
+import threading
+
+import pytest
+
+from py3status.composite import Composite
+from py3status.modules import github
+from py3status.py3 import Py3
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import unquote_plus
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote_plus
+
+COUNTS = {'issue': 34, 'pr': 24}
+
+
+class GithubHandler(BaseHTTPRequestHandler):
+    """
+    Fake Github API answering issue searches and notifications, with ETags.
+    """
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path.startswith('/search/issues'):
+            kind = 'pr' if 'type:pr' in unquote_plus(self.path) else 'issue'
+            body = {'total_count': COUNTS[kind]}
+        else:
+            body = [{'id': i} for i in range(self.server.notifications)]
+        etag = '"{}"'.format(hash(json.dumps(body)))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('X-Poll-Interval', '0')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class GithubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = GithubServer(('127.0.0.1', 0), GithubHandler)
+    server.notifications = 3
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    monkeypatch.setattr(github, 'GITHUB_API_URL',
+                        'http://127.0.0.1:{}'.format(server.server_port))
+    monkeypatch.setattr(github, 'NOTIFICATIONS', {})
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def make_github(**config):
+    module = github.Py3status()
+    module.py3 = Py3(py3status=module)
+    for key, value in config.items():
+        setattr(module, key, value)
+    module.post_config_hook()
+    return module
+
+
+def test_github(server):
+    module = make_github(username='tobes', auth_token='secret')
+    # notifications are fetched straight away, the counts on the next run
+    response = module.github()
+    assert text(response) == 'py3status ?/? N3'
+    assert server.requests == ['/notifications?per_page=100']
+
+    threads = threading.active_count()
+    for i in range(3):
+        response = module.github()
+        assert text(response) == 'py3status 34/24 N3'
+        assert response['urgent']
+    assert len(server.requests) == 10
+    # the requests are made in the shared pool
+    assert threading.active_count() <= threads + Py3._thread_pool.size
+
+    server.notifications = 0
+    response = module.github()
+    assert text(response) == 'py3status 34/24'
+    assert not response['urgent']
+
+
+def test_notifications_shared(server):
+    first = make_github(username='tobes', auth_token='secret',
+                        format='{notifications_count}')
+    second = make_github(username='tobes', auth_token='secret',
+                         format='{notifications_count}')
+    first.github()
+    second.github()
+    # both ask but the second gets a 304 as nothing has changed
+    assert server.requests == ['/notifications?per_page=100'] * 2
+    assert text(first.github()) == '3'
+    assert text(second.github()) == '3'
+
+
+def test_without_credentials(server):
+    module = make_github()
+    notified = []
+    module.py3.notify_user = notified.append
+    assert text(module.github()) == 'py3status ?/?'
+    assert text(module.github()) == 'py3status 34/24'
+    assert notified == []
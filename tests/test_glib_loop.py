@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+pytest.importorskip('gi')
+
+from py3status.glib_loop import GLibLoop  # noqa
+
+
+def run_in_loop(function):
+    """
+    Run function from the GLib main loop and return the thread it ran in.
+    """
+    from gi.repository import GLib
+    threads = []
+    ran = threading.Event()
+
+    def callback():
+        threads.append(threading.current_thread())
+        function()
+        ran.set()
+        return False
+
+    GLib.idle_add(callback)
+    assert ran.wait(1)
+    return threads[0]
+
+
+def test_start_stop():
+    loop = GLibLoop()
+    before = threading.active_count()
+    loop.start()
+    thread = loop.thread
+    assert run_in_loop(lambda: None) is thread
+    loop.stop()
+    assert not thread.is_alive()
+    assert threading.active_count() == before
+
+    # and again
+    loop.start()
+    assert loop.thread is not thread
+    assert run_in_loop(lambda: None) is loop.thread
+    loop.stop()
+
+
+def test_idempotent():
+    loop = GLibLoop()
+    loop.stop()
+    before = threading.active_count()
+    for i in range(3):
+        loop.start()
+    # one thread however often it is started
+    assert threading.active_count() == before + 1
+    thread = loop.thread
+    for i in range(3):
+        loop.stop()
+    assert not thread.is_alive()
+    assert loop.thread is None
+
+
+def test_stop_before_running():
+    loop = GLibLoop()
+    # stopped before the thread has got as far as running the loop
+    loop.start()
+    thread = loop.thread
+    loop.stop()
+    assert not thread.is_alive()
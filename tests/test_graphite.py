@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+from py3status.modules.graphite import Py3status, parse_timespan  # noqa
+from py3status.py3 import Py3  # noqa
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from urlparse import parse_qs, urlparse
+
+POINTS = 100000
+
+
+def value(timestamp):
+    # every tenth point is null as graphite has no data for it
+    if timestamp % 10 == 0:
+        return None
+    return float(timestamp % 997)
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """
+    Fake graphite /render endpoint with one data point a second.
+    """
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        self.server.requests.append(params)
+        now = int(time.time())
+        start = params['from'][0]
+        if start.startswith('-'):
+            start = now - parse_timespan(start)
+        start = int(start)
+        metrics = [{
+            'target': target,
+            'datapoints': [[value(t), t] for t in range(start, now + 1)],
+        } for target in params['target']]
+        body = json.dumps(metrics).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(('127.0.0.1', 0), RenderHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_graphite(server, **config):
+    graphite = Py3status()
+    graphite.py3 = Py3(py3status=graphite)
+    graphite.graphite_url = 'http://127.0.0.1:{}'.format(server.server_port)
+    graphite.targets = 'a;b'
+    graphite.format = '{a} {b}'
+    graphite.timespan = '-{}s'.format(POINTS)
+    graphite.value_format = False
+    for key, setting in config.items():
+        setattr(graphite, key, setting)
+    graphite.post_config_hook()
+    return graphite
+
+
+def expected(selection, now):
+    values = [value(t) for t in range(now - POINTS, now + 1)]
+    values = [v for v in values if v is not None]
+    if selection == 'avg':
+        return sum(values) / len(values)
+    if selection == 'first':
+        return values[0]
+    return {'max': max, 'min': min}[selection](values)
+
+
+def check(value, selection):
+    # the window may have been fetched a second or so earlier
+    now = int(time.time())
+    assert any(
+        value == pytest.approx(expected(selection, t), rel=1e-3)
+        for t in (now + 1, now, now - 1, now - 2)
+    )
+
+
+def test_parse_timespan():
+    assert parse_timespan('-2minutes') == 120
+    assert parse_timespan('-2min') == 120
+    assert parse_timespan('-1mon') == 2592000
+    assert parse_timespan('-30s') == 30
+    assert parse_timespan('-1 day') == 86400
+    assert parse_timespan('20170101') is None
+
+
+@pytest.mark.parametrize('selection', ['max', 'min', 'avg', 'first'])
+def test_incremental_fetch(server, selection):
+    graphite = make_graphite(server, datapoint_selection=selection)
+    start = time.time()
+    color, values = graphite._render_graphite_json()
+    full = time.time() - start
+    check(values['a'], selection)
+    assert len(graphite._windows['a'].values) == pytest.approx(
+        POINTS * 0.9, rel=1e-3
+    )
+
+    time.sleep(1)
+    start = time.time()
+    color, values = graphite._render_graphite_json()
+    incremental = time.time() - start
+    check(values['a'], selection)
+    assert values['a'] == values['b']
+    # the window has rolled forward
+    assert len(graphite._windows['a'].values) == pytest.approx(
+        POINTS * 0.9, rel=1e-3
+    )
+
+    # only the new data points were fetched
+    assert server.requests[0]['from'] == ['-{}s'.format(POINTS)]
+    assert int(server.requests[1]['from'][0]) >= time.time() - 5
+    assert server.requests[1]['until'] == ['now']
+    assert incremental < full
+
+
+def test_removed_target(server):
+    graphite = make_graphite(server, timespan='-100s')
+    graphite._render_graphite_json()
+    graphite.targets = 'a'
+    graphite._render_graphite_json()
+    assert list(graphite._windows) == ['a']
+    graphite._render_graphite_json()
+    # still only the new data points are fetched
+    assert int(server.requests[2]['from'][0]) >= time.time() - 5
+
+
+def test_absolute_timespan_fetches_everything(server):
+    graphite = make_graphite(server, timespan=str(int(time.time()) - 100))
+    graphite._render_graphite_json()
+    graphite._render_graphite_json()
+    assert server.requests[0]['from'] == server.requests[1]['from']
+    assert len(graphite._windows['a'].values) == pytest.approx(90, abs=2)
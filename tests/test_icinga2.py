@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import json
+import re
+import threading
+
+import pytest
+
+pytest.importorskip('requests')
+
+from py3status.composite import Composite  # noqa
+from py3status.modules import icinga2  # noqa
+from py3status.py3 import Py3  # noqa
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import unquote
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+
+# services in each state
+SERVICES = {0: 3000, 1: 20, 2: 7, 3: 1}
+
+
+def services(states):
+    result = []
+    for state in states:
+        for i in range(SERVICES[state]):
+            result.append({
+                'host_name': u'host-{}'.format(i),
+                'service_description': u'check "{}" {{ok}}, [π]'.format(i),
+                'service_state': str(state),
+                'service_output': u'all good, 0.{} ms'.format(i),
+            })
+    return json.dumps(result).encode('utf-8')
+
+
+class IcingaHandler(BaseHTTPRequestHandler):
+    """
+    Fake icinga-web2 services list, understanding only service_state
+    filters.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        query = unquote(self.path.split('?', 1)[1])
+        self.server.queries.append(query)
+        self.server.connections.add(self.client_address)
+        states = sorted(
+            int(x) for x in re.findall(r'service_state=(\d+)', query)
+        )
+        body = services(states)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class IcingaServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    server = IcingaServer(('127.0.0.1', 0), IcingaHandler)
+    server.connections = set()
+    server.queries = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    icinga2.QUERIES.clear()
+
+
+def make_icinga2(server, **config):
+    module = icinga2.Py3status()
+    module.py3 = Py3(py3status=module)
+    module.base_url = 'http://127.0.0.1:{}/monitoring/list/services'.format(
+        server.server_port)
+    module.color = None
+    for key, value in config.items():
+        setattr(module, key, value)
+    module.post_config_hook()
+    return module
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def test_counter_chunks():
+    data = services([0, 1, 2, 3]).decode('utf-8')
+    for size in (1, 7, 1000):
+        counter = icinga2.ServiceCounter()
+        for i in range(0, len(data), size):
+            counter.feed(data[i:i + size])
+        assert counter.counts == SERVICES
+        assert counter.total == sum(SERVICES.values())
+
+
+def test_single_query(server):
+    modules = [make_icinga2(server, status=status) for status in (1, 2, 3)]
+    for i in range(3):
+        output = [text(module.get_status()) for module in modules]
+        assert output == ['WARNING: 20', 'CRITICAL: 7', 'UNKNOWN: 1']
+    assert server.queries == [
+        '(service_state=1|service_state=2|service_state=3)&format=json'
+    ]
+    modules[0]._query['next_poll'] = 0
+    modules[0].get_status()
+    assert len(server.queries) == 2
+    # the connection was kept alive
+    assert len(server.connections) == 1
+
+
+def test_query_per_state(server):
+    url_parameters = '?service_state={service_state}&format=json'
+    modules = [
+        make_icinga2(server, status=status, url_parameters=url_parameters)
+        for status in (0, 2)
+    ]
+    output = [text(module.get_status()) for module in modules]
+    assert output == ['OK: 3000', 'CRITICAL: 7']
+    assert server.queries == [
+        'service_state=0&format=json', 'service_state=2&format=json'
+    ]
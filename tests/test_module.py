@@ -0,0 +1,168 @@
+from threading import Event
+from time import time
+
+import pytest
+
+from py3status.adaptive import AdaptiveInterval
+from py3status.module import Module
+from py3status.py3 import Py3
+
+
+class NoneSetting:
+    none_setting = True
+
+
+class FakeWrapper:
+    """
+    Just enough of Py3statusWrapper to create a Module.
+    """
+
+    def __init__(self):
+        self.config = {
+            'cache_timeout': 60,
+            'debug': False,
+            'minimum_interval': 0.1,
+            'py3_config': {'general': {}},
+        }
+        self.executor = None
+        self.i3status_thread = None
+        self.lock = Event()
+        self.lock.set()
+        self.output_modules = {}
+        self.power = None
+        self.scheduler = None
+        self.updates = []
+
+    def get_config_attribute(self, name, attribute):
+        return NoneSetting()
+
+    def log(self, msg, level='info'):
+        pass
+
+    def notify_update(self, module_name, urgent=False):
+        self.updates.append(module_name)
+
+    def report_exception(self, msg, notify_user=True, level='error',
+                         error_frame=None):
+        pass
+
+
+def make_module(*methods):
+    wrapper = FakeWrapper()
+    module = Module('uptime', {}, wrapper, lazy=True)
+    wrapper.updates = []
+    for name in methods:
+        method = {'method': name}
+        module.set_method_output(method, {'full_text': ''})
+        module.methods[name] = method
+    return module, wrapper
+
+
+def test_unchanged_output_skipped():
+    module, wrapper = make_module('uptime')
+    method = module.methods['uptime']
+    for i in range(10):
+        module.set_method_output(method, {'full_text': 'up 1 day', 'name': 'uptime'})
+        module.set_updated()
+    assert wrapper.updates == ['uptime']
+    assert module.update_count == 1
+    assert module.skipped_update_count == 9
+
+    module.set_method_output(method, {'full_text': 'up 2 days', 'name': 'uptime'})
+    module.set_updated()
+    assert module.get_latest() == [{'full_text': 'up 2 days', 'name': 'uptime'}]
+    assert wrapper.updates == ['uptime', 'uptime']
+    assert module.update_count == 2
+
+
+def test_multiple_methods():
+    module, wrapper = make_module('one', 'two')
+    one = module.methods['one']
+    two = module.methods['two']
+    module.set_method_output(one, [{'full_text': 'a'}, {'full_text': 'b'}])
+    module.set_method_output(two, {'full_text': 'c'})
+    module.set_updated()
+    module.set_updated()
+    assert module.skipped_update_count == 1
+    module.set_method_output(two, {'full_text': 'c', 'urgent': True})
+    module.set_updated()
+    assert module.urgent
+    assert [x['full_text'] for x in module.get_latest()] == ['a', 'b', 'c']
+    assert module.update_count == 2
+
+
+class Uptime:
+    cache_timeout = 10
+
+    def __init__(self):
+        self.text = 'up 1 day'
+        self.cached_until = None
+
+    def uptime(self):
+        response = {'full_text': self.text}
+        if self.cached_until:
+            response['cached_until'] = self.cached_until
+        return response
+
+
+def make_runnable_module(adaptive=False):
+    module, wrapper = make_module('uptime')
+    module.methods['uptime'].update({
+        'cached_until': 0, 'call_type': Module.PARAMS_NEW, 'name': None,
+    })
+    module.module_class = Uptime()
+    module.module_class.py3 = Py3(module)
+    # no timers, we run the module ourselves
+    module.sleeping = True
+    if adaptive:
+        module.adaptive_refresh = AdaptiveInterval(10, minimum=2, maximum=40)
+    return module
+
+
+def run(module):
+    module.methods['uptime']['cached_until'] = 0
+    module.run()
+    return module.cache_time - time()
+
+
+def test_adaptive_refresh():
+    module = make_runnable_module(adaptive=True)
+    delays = [run(module) for i in range(8)]
+    # the first output is a change, after that stable output backs off to
+    # the maximum
+    expected = [5, 7.5, 11.25, 16.88, 25.31, 37.97, 40, 40]
+    assert delays == pytest.approx(expected, abs=0.5)
+    module.module_class.text = 'up 2 days'
+    assert run(module) == pytest.approx(20, abs=0.5)
+    assert module.adaptive_refresh.changes == 2
+    assert module.adaptive_refresh.runs == 9
+
+
+def test_adaptive_interval_defaults():
+    adaptive = AdaptiveInterval(3600)
+    # a slow module is neither sped up nor cut down to the maximum
+    assert adaptive.interval == 3600
+    assert adaptive.update(True) == 3600
+    assert adaptive.update(False) == 3600
+    adaptive = AdaptiveInterval(60)
+    assert adaptive.update(True) == 60
+    assert adaptive.update(False) == 90
+    assert adaptive.update(True) == 60
+    # unless a minimum is asked for
+    assert AdaptiveInterval(60, minimum=10).update(True) == 30
+
+
+def test_adaptive_refresh_respects_cached_until():
+    module = make_runnable_module(adaptive=True)
+    module.module_class.cached_until = module.module_class.py3.time_in(
+        sync_to=60
+    )
+    run(module)
+    assert module.cache_time == module.module_class.cached_until
+    assert module.adaptive_refresh.runs == 0
+
+
+def test_no_adaptive_refresh():
+    module = make_runnable_module()
+    for i in range(3):
+        assert 9 <= run(module) <= 11
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip('gi')
+
+from py3status.composite import Composite  # noqa
+from py3status.dbus_pool import DBusPool  # noqa
+from py3status.modules.mpris import (  # noqa
+    PLAYER_INTERFACE, PROPERTIES_INTERFACE, SERVICE_BUS, SERVICE_BUS_URL,
+    Py3status,
+)
+from py3status.py3 import Py3  # noqa
+
+from test_dbus_pool import FakeConnection, FakeLoop  # noqa
+
+VLC = SERVICE_BUS + '.vlc'
+MPD = SERVICE_BUS + '.mpd'
+
+
+class FakePlayer:
+    def __init__(self, identity, status, title):
+        self.identity = identity
+        self.get_alls = 0
+        self.properties = {
+            'Metadata': {
+                'xesam:artist': ['Happy Mondays'], 'xesam:title': title,
+            },
+            'PlaybackStatus': status,
+            'Position': 0,
+        }
+
+    def GetAll(self, interface):
+        self.get_alls += 1
+        if interface == SERVICE_BUS:
+            return {'Identity': self.identity}
+        return dict(self.properties)
+
+    @property
+    def Position(self):
+        return self.properties['Position']
+
+
+class FakeNames:
+    def __init__(self, owners):
+        self.owners = owners
+
+    def ListNames(self):
+        return list(self.owners)
+
+    def GetNameOwner(self, name):
+        return self.owners[name]
+
+
+class FakeBus:
+    def __init__(self, con):
+        self.con = con
+        self.names = FakeNames({VLC: ':1.5'})
+        self.players = {VLC: FakePlayer('VLC', 'Playing', 'Loose Fit')}
+
+    def get(self, name, path=None):
+        if name == 'org.freedesktop.DBus':
+            return self.names
+        return self.players[name]
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = FakeBus(FakeConnection())
+    pool = DBusPool(FakeLoop())
+    pool._buses[False] = bus
+    monkeypatch.setattr(Py3, '_dbus_pool', pool)
+    return bus
+
+
+@pytest.fixture
+def module(bus):
+    module = Py3status()
+    module.py3 = Py3(py3status=module)
+    module.format = '{state} [{artist} - ][{title}]'
+    module.post_config_hook()
+    module.updates = 0
+
+    def update():
+        module.updates += 1
+
+    module.py3.update = update
+    return module
+
+
+def properties_changed(bus, owner, changed, invalidated=()):
+    bus.con.emit(owner, PROPERTIES_INTERFACE, 'PropertiesChanged',
+                 SERVICE_BUS_URL, (PLAYER_INTERFACE, changed, list(invalidated)))
+
+
+def text(module):
+    output = module.mpris()['composite']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def test_signals(bus, module):
+    assert text(module) == u'▶ Happy Mondays - Loose Fit'
+    # the player and its seeks, the bus names
+    assert len(bus.con.subscriptions) == 3
+
+    properties_changed(bus, ':1.5', {'PlaybackStatus': 'Paused'})
+    assert module.updates == 1
+    assert text(module) == u'▮ Happy Mondays - Loose Fit'
+
+    # the same signal from another player on the object path is ignored
+    properties_changed(bus, ':1.9', {'PlaybackStatus': 'Playing'})
+    assert module.updates == 1
+
+    # invalidated properties are fetched again
+    get_alls = bus.players[VLC].get_alls
+    bus.players[VLC].properties['PlaybackStatus'] = 'Playing'
+    properties_changed(bus, ':1.5', {}, ['PlaybackStatus'])
+    assert bus.players[VLC].get_alls == get_alls + 1
+    assert text(module) == u'▶ Happy Mondays - Loose Fit'
+
+    bus.con.emit(':1.5', PLAYER_INTERFACE, 'Seeked', SERVICE_BUS_URL,
+                 (90000000,))
+    assert module._player_details['position'][0] == 90000000
+    assert module.updates == 3
+
+
+def test_players_come_and_go(bus, module):
+    bus.names.owners[MPD] = ':1.7'
+    bus.players[MPD] = FakePlayer('Music Player Daemon', 'Playing', 'Kinky')
+    bus.con.emit(None, 'org.freedesktop.DBus', 'NameOwnerChanged', None,
+                 (MPD, '', ':1.7'))
+    assert len(bus.con.subscriptions) == 5
+
+    bus.con.emit(None, 'org.freedesktop.DBus', 'NameOwnerChanged', None,
+                 (VLC, ':1.5', ''))
+    # the player's signals are disconnected when it goes
+    assert len(bus.con.subscriptions) == 3
+    assert text(module) == u'▶ Happy Mondays - Kinky'
+
+    module.kill()
+    assert bus.con.subscriptions == {}
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+import socket
+import struct
+
+from errno import EBADF, ENOBUFS
+
+import pytest
+
+from py3status import netlink
+from py3status.composite import Composite
+from py3status.modules import net_iplist, online_status, wifi
+from py3status.netlink import (
+    GENLMSGHDR, IFADDRMSG, IFINFOMSG, RTMSG, NetworkState, pack_attribute,
+    pack_message, parse_attributes, parse_messages,
+)
+from py3status.py3 import Py3
+
+NL80211 = 28
+
+
+def link(index, name, up=True, carrier=True, msg_type=netlink.RTM_NEWLINK):
+    flags = 0
+    if up:
+        flags |= netlink.IFF_UP
+    if carrier:
+        flags |= netlink.IFF_LOWER_UP
+    operstate = 6 if carrier else 2
+    payload = IFINFOMSG.pack(0, 1, index, flags, 0) + \
+        pack_attribute(netlink.IFLA_IFNAME, name.encode('utf-8') + b'\0') + \
+        pack_attribute(netlink.IFLA_OPERSTATE, struct.pack('=B', operstate))
+    return pack_message(msg_type, netlink.NLM_F_MULTI, 0, payload)
+
+
+def address(index, ip, prefixlen=24, msg_type=netlink.RTM_NEWADDR):
+    family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+    packed = socket.inet_pton(family, ip)
+    payload = IFADDRMSG.pack(family, prefixlen, 0, 0, index) + \
+        pack_attribute(netlink.IFA_ADDRESS, packed)
+    if family == socket.AF_INET:
+        payload += pack_attribute(netlink.IFA_LOCAL, packed)
+    return pack_message(msg_type, 0, 0, payload)
+
+
+def route(index, dst_len=0, msg_type=netlink.RTM_NEWROUTE):
+    payload = RTMSG.pack(socket.AF_INET, dst_len, 0, 0, netlink.RT_TABLE_MAIN,
+                         4, 0, netlink.RTN_UNICAST, 0) + \
+        pack_attribute(netlink.RTA_TABLE, struct.pack('=I', 254)) + \
+        pack_attribute(netlink.RTA_OIF, struct.pack('=I', index)) + \
+        pack_attribute(netlink.RTA_PRIORITY, struct.pack('=I', 600))
+    return pack_message(msg_type, 0, 0, payload)
+
+
+# what the kernel sends for a laptop with its wifi connected
+DUMP = b''.join([
+    link(1, 'lo'),
+    link(2, 'eth0', carrier=False),
+    link(3, 'wlan0'),
+    address(1, '127.0.0.1', 8),
+    address(3, '192.168.1.3'),
+    address(1, '::1', 128),
+    address(3, 'fe80::f861:44bd:694a:b99c', 64),
+    route(3),
+    route(3, dst_len=24),
+])
+
+
+class RecordedState(NetworkState):
+    """
+    The network state read from recorded netlink messages rather than the
+    kernel.
+    """
+
+    def __init__(self, data):
+        NetworkState.__init__(self)
+        self.handle(data)
+
+    def start(self):
+        pass
+
+
+class FakeNl80211:
+    def __init__(self, ssid=u'Café', signal=-60, bitrate=540):
+        self.ssid = ssid
+        self.signal = signal
+        self.bitrate = bitrate
+
+    def request(self, msg_type, flags, payload, handle):
+        assert msg_type == NL80211
+        cmd = GENLMSGHDR.unpack_from(payload)[0]
+        if cmd == netlink.NL80211_CMD_GET_INTERFACE:
+            attributes = pack_attribute(
+                netlink.NL80211_ATTR_IFINDEX, struct.pack('=I', 3)
+            ) + pack_attribute(netlink.NL80211_ATTR_IFNAME, b'wlan0\0')
+            if self.ssid:
+                attributes += pack_attribute(
+                    netlink.NL80211_ATTR_SSID, self.ssid.encode('utf-8'))
+        else:
+            request = parse_attributes(payload, GENLMSGHDR.size)
+            assert request[netlink.NL80211_ATTR_IFINDEX] == \
+                struct.pack('=I', 3)
+            rate = pack_attribute(
+                netlink.NL80211_RATE_INFO_BITRATE32,
+                struct.pack('=I', self.bitrate))
+            station = pack_attribute(
+                netlink.NL80211_STA_INFO_SIGNAL, struct.pack('=b', self.signal)
+            ) + pack_attribute(netlink.NL80211_STA_INFO_TX_BITRATE, rate)
+            attributes = pack_attribute(netlink.NL80211_ATTR_STA_INFO, station)
+        header = GENLMSGHDR.pack(cmd, 1, 0)
+        handle((NL80211, netlink.NLM_F_MULTI, 1, header + attributes))
+
+
+class FakeSocket:
+    """
+    Answers dumps with DUMP after failing the given number of them, and
+    raises the given errors from recv().
+    """
+
+    def __init__(self, network, errors, failures=0):
+        self.network = network
+        self.errors = list(errors)
+        self.failures = failures
+        self.seen = []
+
+    def recv(self):
+        raise self.errors.pop(0)
+
+    def request(self, msg_type, flags, payload, handle):
+        if self.failures:
+            self.failures -= 1
+            raise OSError(ENOBUFS, 'No buffer space available')
+        if msg_type == netlink.RTM_GETLINK:
+            for message in parse_messages(DUMP):
+                handle(message)
+                # the old state is kept until everything has been read
+                self.seen.append(list(self.network.interfaces()))
+
+
+@pytest.fixture
+def network(monkeypatch):
+    network = RecordedState(DUMP)
+    monkeypatch.setattr(Py3, '_network', network)
+    return network
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def make_module(module, **config):
+    instance = module.Py3status()
+    instance.py3 = Py3(py3status=instance)
+    for key, value in config.items():
+        setattr(instance, key, value)
+    instance.post_config_hook()
+    return instance
+
+
+def test_interfaces(network):
+    interfaces = network.interfaces()
+    assert list(interfaces) == ['lo', 'eth0', 'wlan0']
+    assert interfaces['wlan0'] == {
+        'carrier': True,
+        'default_route': True,
+        'index': 3,
+        'ip4': ['192.168.1.3'],
+        'ip6': ['fe80::f861:44bd:694a:b99c'],
+        'operstate': 'up',
+        'up': True,
+    }
+    assert interfaces['eth0']['operstate'] == 'down'
+    assert not interfaces['eth0']['carrier']
+    assert not interfaces['lo']['default_route']
+
+
+def test_changes(network):
+    changes = []
+    subscription = network.subscribe(lambda: changes.append(True))
+    # nothing has changed
+    assert not network.handle(link(3, 'wlan0') + address(3, '192.168.1.3'))
+
+    # wifi disconnects
+    events = b''.join([
+        route(3, msg_type=netlink.RTM_DELROUTE),
+        address(3, '192.168.1.3', msg_type=netlink.RTM_DELADDR),
+        link(3, 'wlan0', carrier=False),
+    ])
+    assert network.handle(events)
+    network._notify()
+    wlan0 = network.interfaces()['wlan0']
+    assert not wlan0['default_route']
+    assert not wlan0['carrier']
+    assert wlan0['ip4'] == []
+    assert changes == [True]
+
+    subscription.disconnect()
+    subscription.disconnect()
+    network.handle(link(3, 'wlan0', msg_type=netlink.RTM_DELLINK))
+    network._notify()
+    assert list(network.interfaces()) == ['lo', 'eth0']
+    assert changes == [True]
+
+
+def test_wireless(network):
+    network._nl80211 = FakeNl80211()
+    network._nl80211_family = NL80211
+    assert network.wireless() == {
+        'wlan0': {'bitrate': 54.0, 'signal_dbm': -60, 'ssid': u'Café'}
+    }
+    network._nl80211 = FakeNl80211(ssid=None)
+    assert network.wireless() == {
+        'wlan0': {'bitrate': None, 'signal_dbm': None, 'ssid': None}
+    }
+
+
+def test_kernel():
+    network = NetworkState()
+    try:
+        network.start()
+    except (OSError, socket.error) as err:
+        pytest.skip('no netlink: {}'.format(err))
+    interfaces = network.interfaces()
+    assert interfaces['lo']['up']
+    assert network.thread.is_alive()
+
+
+def test_failed_start(monkeypatch):
+    sockets = []
+
+    class FailingSocket(FakeSocket):
+        def __init__(self, protocol, groups=0):
+            FakeSocket.__init__(self, None, [], failures=1)
+            self.closed = False
+            sockets.append(self)
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(netlink, 'NetlinkSocket', FailingSocket)
+    network = NetworkState()
+    with pytest.raises(OSError):
+        network.start()
+    # the socket is not leaked and starting can be tried again
+    assert sockets[0].closed
+    assert network.thread is None and network._socket is None
+
+
+def test_dropped_events(network, monkeypatch):
+    monkeypatch.setattr(netlink, 'RESYNC_DELAY', 0)
+    network.handle(link(3, 'wlan0', msg_type=netlink.RTM_DELLINK))
+    logged = []
+    network.log = lambda msg, level: logged.append(msg)
+    changes = []
+    network.subscribe(lambda: changes.append(True))
+    network._socket = FakeSocket(network, [
+        OSError(ENOBUFS, 'No buffer space available'),
+        OSError(EBADF, 'Bad file descriptor'),
+    ], failures=2)
+    network._run()
+    seen = network._socket.seen
+    assert seen and all(names == ['lo', 'eth0'] for names in seen)
+    assert list(network.interfaces()) == ['lo', 'eth0', 'wlan0']
+    assert changes == [True]
+    # failed dumps are retried and the thread only ends with the socket
+    assert [msg.split(':')[0] for msg in logged] == [
+        'Reading the network state failed',
+        'Reading the network state failed',
+        'Network events stopped',
+    ]
+
+
+def test_net_iplist(network):
+    module = make_module(net_iplist, remove_empty=False)
+    response = module.ip_list()
+    assert text(response) == \
+        u'Network: eth0: wlan0: 192.168.1.3 fe80::f861:44bd:694a:b99c'
+    module.remove_empty = True
+    assert text(module.ip_list()) == \
+        u'Network: wlan0: 192.168.1.3 fe80::f861:44bd:694a:b99c'
+
+
+IP_ADDRESS = '''1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN
+    inet 127.0.0.1/8 scope host lo
+    inet6 ::1/128 scope host
+2: eth0: <NO-CARRIER,BROADCAST,MULTICAST,UP> mtu 1500 qdisc fq_codel state DOWN
+3: wlan0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc noqueue state UP
+    inet 192.168.1.3/24 brd 192.168.1.255 scope global dynamic wlan0
+    inet6 fe80::f861:44bd:694a:b99c/64 scope link
+'''
+
+
+def test_net_iplist_without_netlink(monkeypatch):
+    def no_netlink(self, callback):
+        raise socket.error(97, 'Address family not supported by protocol')
+
+    monkeypatch.setattr(Py3, 'network_subscribe', no_netlink)
+    module = make_module(net_iplist)
+    module.py3.command_output = lambda command: IP_ADDRESS
+    assert text(module.ip_list()) == \
+        u'Network: wlan0: 192.168.1.3 fe80::f861:44bd:694a:b99c'
+
+
+def test_wifi(network):
+    network._nl80211 = FakeNl80211()
+    network._nl80211_family = NL80211
+    module = make_module(wifi, format=u'{bitrate} {signal_percent} {ssid} {ip}')
+    assert module.device == 'wlan0'
+    assert text(module.wifi()) == u'54 MBit/s 80% Café 192.168.1.3'
+
+
+IW_LINK = '''Connected to 00:11:22:33:44:55 (on wlan0)
+    SSID: Chicken Remixed
+    signal: -60 dBm
+    tx bitrate: 54.0 MBit/s
+'''
+
+
+IP_ADDRESS_WLAN0 = '''3: wlan0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 state UP
+    inet 192.168.1.3/24 brd 192.168.1.255 scope global dynamic wlan0
+'''
+
+
+def test_wifi_without_netlink(monkeypatch):
+    def no_netlink(*args):
+        raise socket.error(97, 'Address family not supported by protocol')
+
+    for name in ['network_interfaces', 'network_subscribe', 'network_wireless']:
+        monkeypatch.setattr(Py3, name, no_netlink)
+    commands = []
+
+    def command_output(self, command):
+        commands.append(command)
+        return {'iw': IW_LINK, 'ip': IP_ADDRESS_WLAN0}[command[0]]
+
+    monkeypatch.setattr(Py3, 'check_commands', lambda self, commands: 'iw')
+    monkeypatch.setattr(Py3, 'command_output', command_output)
+    module = make_module(wifi, format=u'{bitrate} {ssid} {ip}')
+    assert text(module.wifi()) == u'54 MBit/s Chicken Remixed 192.168.1.3'
+    assert ['ip', 'addr', 'list', 'wlan0'] in commands
+
+
+def test_wifi_ip_without_rtnetlink(network, monkeypatch):
+    network._nl80211 = FakeNl80211()
+    network._nl80211_family = NL80211
+
+    def no_netlink(self):
+        raise socket.error(97, 'Address family not supported by protocol')
+
+    monkeypatch.setattr(Py3, 'network_interfaces', no_netlink)
+    monkeypatch.setattr(Py3, 'command_output',
+                        lambda self, command: IP_ADDRESS_WLAN0)
+    module = make_module(wifi, format=u'{ssid} {ip}')
+    assert text(module.wifi()) == u'Café 192.168.1.3'
+
+
+def test_online_status(network, monkeypatch):
+    opened = []
+    monkeypatch.setattr(online_status, 'urlopen',
+                        lambda url, timeout: opened.append(url))
+    module = make_module(online_status)
+    assert text(module.online_status()) == module.icon_on
+    network.handle(route(3, msg_type=netlink.RTM_DELROUTE))
+    # with no route there is nothing to fetch
+    assert text(module.online_status()) == module.icon_off
+    assert opened == [module.url]
@@ -0,0 +1,105 @@
+import time
+
+from py3status.power import AC, BATTERY, PowerProfiles
+
+from test_module import make_runnable_module
+
+
+def make_sys(tmpdir, online, status):
+    ac = tmpdir.mkdir('AC')
+    ac.join('type').write('Mains\n')
+    ac.join('online').write('{}\n'.format(int(online)))
+    battery = tmpdir.mkdir('BAT0')
+    battery.join('type').write('Battery\n')
+    battery.join('status').write(status + '\n')
+    return str(tmpdir)
+
+
+def test_state(tmpdir):
+    power = PowerProfiles(sys_path=make_sys(tmpdir.mkdir('ac'), True, 'Charging'))
+    assert power.state == AC
+    power = PowerProfiles(
+        sys_path=make_sys(tmpdir.mkdir('bat'), False, 'Discharging')
+    )
+    assert power.state == BATTERY
+    # no power supply information, eg a desktop
+    power = PowerProfiles(sys_path=str(tmpdir.join('missing')))
+    assert power.state == AC
+
+
+def test_profiles(tmpdir):
+    profiles = {
+        BATTERY: {
+            'interval_multiplier': 3,
+            'minimum_interval': 10,
+            'suspend': ['github'],
+        },
+    }
+    sys_path = make_sys(tmpdir, False, 'Discharging')
+    power = PowerProfiles(profiles, sys_path=sys_path, max_age=0)
+    assert power.adjust_interval(1) == 10
+    assert power.adjust_interval(60) == 180
+    assert power.loop_interval() == 0.1
+    assert power.is_suspended('github')
+    assert not power.is_suspended('clock')
+
+    # plug in the AC
+    tmpdir.join('AC', 'online').write('1\n')
+    assert power.adjust_interval(1) == 1
+    assert power.adjust_interval(60) == 60
+    assert not power.is_suspended('github')
+
+
+def test_only_module_interval_lengthened(tmpdir):
+    module = make_runnable_module()
+    module._py3_wrapper.power = PowerProfiles(
+        {BATTERY: {'interval_multiplier': 4, 'minimum_interval': 5}},
+        sys_path=make_sys(tmpdir, False, 'Discharging'),
+    )
+    module.run()
+    assert 40 <= module.cache_time - time.time() <= 44
+    module.module_class.cache_timeout = 0.5
+    module.methods['uptime']['cached_until'] = 0
+    module.run()
+    assert 4 <= module.cache_time - time.time() <= 5
+    # a time the module asked for is kept, even if sooner than the minimum
+    module.module_class.cached_until = module.module_class.py3.time_in(1)
+    module.methods['uptime']['cached_until'] = 0
+    module.run()
+    assert module.cache_time == module.module_class.cached_until
+    module.sleeping = False
+    module.schedule = lambda delay: setattr(module, 'delay', delay)
+    module.methods['uptime']['cached_until'] = 0
+    module.run()
+    assert module.delay < 2
+
+
+def wakeups_per_minute(tmpdir, online, profiles=None, duration=1.0):
+    """
+    Run a module with a 50ms cache_timeout for duration seconds and return
+    the wakeups per minute.
+    """
+    module = make_runnable_module()
+    module.module_class.cache_timeout = 0.05
+    module.config['minimum_interval'] = 0.01
+    status = 'Charging' if online else 'Discharging'
+    module._py3_wrapper.power = power = PowerProfiles(
+        profiles, sys_path=make_sys(tmpdir, online, status)
+    )
+    module.sleeping = False
+    module.run()
+    time.sleep(duration)
+    module.kill()
+    return power.wakeups * 60 / duration
+
+
+def test_wakeups_per_minute(tmpdir):
+    profiles = {BATTERY: {'interval_multiplier': 4}}
+    ac = wakeups_per_minute(tmpdir.mkdir('ac'), True, profiles)
+    battery = wakeups_per_minute(tmpdir.mkdir('bat'), False, profiles)
+    suspended = wakeups_per_minute(
+        tmpdir.mkdir('suspend'), False, {BATTERY: {'suspend': ['uptime']}}
+    )
+    assert battery < ac / 2
+    # just the initial check
+    assert suspended == 60
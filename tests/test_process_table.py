@@ -0,0 +1,94 @@
+import os
+
+from py3status.process_table import ProcessTable
+
+
+def make_proc(tmpdir, processes):
+    for pid, (comm, cmdline) in processes.items():
+        path = tmpdir.mkdir(str(pid))
+        path.join('comm').write_binary(comm.encode('utf-8') + b'\n')
+        path.join('cmdline').write_binary(
+            b'\0'.join(x.encode('utf-8') for x in cmdline) + b'\0' if cmdline else b''
+        )
+    # non pid entries must be ignored
+    tmpdir.mkdir('sys')
+    tmpdir.join('uptime').write('1.0 1.0')
+    return str(tmpdir)
+
+
+PROCESSES = {
+    10: ('kthreadd', []),
+    101: ('xscreensaver', ['xscreensaver', '-no-splash']),
+    102: ('python3', ['/usr/bin/python3', '/usr/bin/py3status', '-c', 'x']),
+    103: ('deadbeef', ['/usr/bin/deadbeef']),
+    104: ('deadbeef-gtk', ['/usr/bin/deadbeef-gtk']),
+}
+
+
+def test_name_match(tmpdir):
+    table = ProcessTable(make_proc(tmpdir, PROCESSES))
+    assert table.get_pids('deadbeef') == [103, 104]
+    assert table.get_pids('^dead.*gtk$') == [104]
+    assert table.get_pids('py3status') == []
+    assert table.is_running('xscreen')
+    assert not table.is_running('firefox')
+
+
+def test_exact_match(tmpdir):
+    table = ProcessTable(make_proc(tmpdir, PROCESSES))
+    assert table.get_pids('deadbeef', exact=True) == [103]
+    assert table.get_pids('dead.eef', exact=True) == [103]
+    assert table.get_pids('dead', exact=True) == []
+
+
+def test_full_match(tmpdir):
+    table = ProcessTable(make_proc(tmpdir, PROCESSES))
+    assert table.get_pids('py3status', full=True) == [102]
+    assert table.get_pids('-no-splash', full=True) == [101]
+    assert table.get_pids('py3status -c x', full=True) == [102]
+    # kernel threads have no cmdline so their name is used
+    assert table.get_pids('kthreadd', full=True) == [10]
+
+
+def test_own_process_ignored(tmpdir):
+    processes = dict(PROCESSES)
+    processes[os.getpid()] = ('myself', ['myself'])
+    table = ProcessTable(make_proc(tmpdir, processes))
+    assert not table.is_running('myself')
+
+
+def test_snapshot_shared(tmpdir):
+    table = ProcessTable(make_proc(tmpdir, PROCESSES), max_age=60)
+    for name in ['deadbeef', 'xscreensaver', 'firefox', 'python3']:
+        table.is_running(name)
+        table.is_running(name, full=True)
+    assert table.scan_count == 1
+    table.max_age = 0
+    table.is_running('deadbeef')
+    assert table.scan_count == 2
+
+
+def test_invalid_pattern(tmpdir):
+    table = ProcessTable(str(tmpdir))
+    assert not table.is_running('(unclosed')
+    assert not table.is_running('[', full=True)
+
+
+def test_missing_proc(tmpdir):
+    table = ProcessTable(str(tmpdir.join('missing')))
+    assert not table.is_running('anything')
+
+
+def test_5000_processes_scanned_once(tmpdir):
+    processes = {}
+    for pid in range(1000, 6000):
+        name = 'proc{}'.format(pid % 250)
+        processes[pid] = (name, ['/usr/bin/' + name, '--id', str(pid)])
+    table = ProcessTable(make_proc(tmpdir, processes), max_age=60)
+
+    table.scan()
+    # ten watchers querying the same snapshot
+    for i in range(10):
+        assert table.is_running('proc{}'.format(i), exact=True)
+        assert table.is_running('--id {}$'.format(1000 + i), full=True)
+    assert table.scan_count == 1
@@ -0,0 +1,206 @@
+import time
+
+import pytest
+
+from py3status.composite import Composite
+from py3status import sandbox
+from py3status.module import Module
+from py3status.py3 import ModuleErrorException
+from py3status.sandbox import SandboxError, SandboxProxy
+
+USER_MODULE = '''
+import os
+import time
+
+
+class Py3status:
+    cache_timeout = 10
+    format = 'pid {pid}'
+
+    def __init__(self):
+        self.leak = []
+
+    def post_config_hook(self):
+        self.configured = True
+
+    def status(self):
+        return {
+            'full_text': self.py3.safe_format(self.format, {'pid': os.getpid()}),
+            'cached_until': self.py3.time_in(),
+        }
+
+    def notify(self):
+        self.py3.notify_user('hello')
+        return {'full_text': ''}
+
+    def legacy(self, i3s_output_list, i3s_config):
+        return {'full_text': i3s_config['color_good']}
+
+    def fail(self):
+        self.py3.error('bad thing')
+
+    def crash(self):
+        return 1 / 0
+
+    def hang(self):
+        while True:
+            pass
+
+    def spin(self):
+        end = time.time() + 0.3
+        while time.time() < end:
+            pass
+        return {'full_text': 'spun'}
+
+    def grow(self):
+        self.leak.append(b'x' * 50 * 1024 * 1024)
+        return {'full_text': str(len(self.leak))}
+'''
+
+
+class FakePy3:
+    def __init__(self):
+        self._default_time_in = None
+        self.notifications = []
+
+    def notify_user(self, msg, level='info', rate_limit=5):
+        self.notifications.append(msg)
+
+
+def text(full_text):
+    return u''.join(x['full_text'] for x in Composite(full_text).get_content())
+
+
+@pytest.fixture
+def module_file(tmpdir):
+    path = tmpdir.join('user_module.py')
+    path.write(USER_MODULE)
+    return str(path)
+
+
+def make_proxy(module_file, **kw):
+    proxy = SandboxProxy(module_file, {'color_good': '#00FF00'}, **kw)
+    proxy.py3 = FakePy3()
+    return proxy
+
+
+def test_calls(module_file):
+    proxy = make_proxy(module_file)
+    try:
+        assert proxy.cache_timeout == 10
+        proxy.format = 'sandboxed {pid}'
+        result = text(proxy.status()['full_text'])
+        assert result == 'sandboxed {}'.format(proxy._process.pid)
+        assert proxy.legacy([], {'color_good': '#00FF00'}) == {
+            'full_text': '#00FF00'
+        }
+        # forwarded to the core
+        proxy.notify()
+        assert proxy.py3.notifications == ['hello']
+        with pytest.raises(ModuleErrorException):
+            proxy.fail()
+        with pytest.raises(SandboxError):
+            proxy.crash()
+        with pytest.raises(AttributeError):
+            proxy.missing
+    finally:
+        proxy.close()
+
+
+def test_default_time_in(module_file):
+    proxy = make_proxy(module_file)
+    try:
+        # the module's own cache_timeout can be adapted by the core
+        cached_until = proxy.status()['cached_until']
+        assert proxy.py3._default_time_in == cached_until
+        proxy.py3._default_time_in = None
+        proxy.notify()
+        assert proxy.py3._default_time_in is None
+    finally:
+        proxy.close()
+
+
+def test_method_types(module_file):
+    proxy = make_proxy(module_file)
+    try:
+        module = Module.__new__(Module)
+        for name in ['status', 'notify']:
+            assert module._params_type(name, proxy) == Module.PARAMS_NEW
+        assert module._params_type('legacy', proxy) == Module.PARAMS_LEGACY
+    except AttributeError:
+        pytest.skip('inspect.getargspec not available')
+    finally:
+        proxy.close()
+
+
+def test_timeout_restart(module_file):
+    proxy = make_proxy(module_file, timeout=0.5)
+    try:
+        proxy.format = 'after restart {pid}'
+        pid = proxy._process.pid
+        with pytest.raises(SandboxError):
+            proxy.hang()
+        assert proxy.restarts == 1
+        assert proxy._process.pid != pid
+        # settings are replayed to the new process
+        assert text(proxy.status()['full_text']).startswith('after restart')
+        assert proxy.configured
+    finally:
+        proxy.close()
+
+
+def test_rss_limit(module_file):
+    proxy = make_proxy(module_file, max_rss=120 * 1024 * 1024)
+    try:
+        assert proxy.grow()['full_text'] == '1'
+        assert proxy.restarts == 0
+        for i in range(5):
+            proxy.grow()
+            if proxy.restarts:
+                break
+        assert proxy.restarts == 1
+        # the leak is gone
+        assert proxy.grow()['full_text'] == '1'
+    finally:
+        proxy.close()
+
+
+def test_cpu_limit(module_file, monkeypatch):
+    monkeypatch.setattr(sandbox, 'CPU_SAMPLE_PERIOD', 0.2)
+    proxy = make_proxy(module_file, max_cpu=50)
+    try:
+        # the first call takes a sample
+        proxy.spin()
+        assert proxy.restarts == 0
+        proxy.spin()
+        assert proxy.restarts == 1
+    finally:
+        proxy.close()
+
+
+def test_import_error(tmpdir):
+    path = tmpdir.join('broken.py')
+    path.write('import does_not_exist\n')
+    with pytest.raises(ImportError):
+        SandboxProxy(str(path))
+
+
+def test_benchmark_call_latency(module_file, tmpdir):
+    local = Module.load_from_file(module_file)
+    local.py3 = FakePy3()
+    proxy = make_proxy(module_file)
+    try:
+        count = 200
+        start = time.time()
+        for i in range(count):
+            local.notify()
+        local_time = (time.time() - start) / count
+        start = time.time()
+        for i in range(count):
+            proxy.notify()
+        sandbox_time = (time.time() - start) / count
+    finally:
+        proxy.close()
+    print('per call in process {:.1f}us sandbox {:.1f}us'.format(
+        local_time * 1e6, sandbox_time * 1e6))
+    assert sandbox_time < 0.01
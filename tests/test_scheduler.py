@@ -0,0 +1,68 @@
+import time
+
+from py3status.scheduler import Scheduler
+
+
+class FakeModule:
+    """
+    Records when it was run and whether it ran as part of a batch.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.runs = []
+
+    def run(self):
+        self.runs.append((time.time(), self.scheduler.batch_running))
+
+
+def run_modules(slack, count=20, spread=0.004):
+    scheduler = Scheduler(slack)
+    scheduler.start()
+    modules = [FakeModule(scheduler) for i in range(count)]
+    for index, module in enumerate(modules):
+        scheduler.schedule(module, 0.2 + index * spread)
+    time.sleep(0.5)
+    return scheduler, modules
+
+
+def test_coalesced():
+    scheduler, modules = run_modules(0.1)
+    assert scheduler.batches == 1
+    assert all(len(module.runs) == 1 for module in modules)
+    # modules run in a batch but never before they are due
+    assert all(module.runs[0][1] for module in modules)
+    start = min(module.runs[0][0] for module in modules)
+    assert max(module.runs[0][0] for module in modules) - start < 0.05
+
+
+def test_no_slack():
+    scheduler, modules = run_modules(0, count=5, spread=0.05)
+    assert scheduler.batches == 5
+    assert not scheduler.batch_running
+
+
+def test_window():
+    scheduler = Scheduler(0.05)
+    scheduler.start()
+    early = FakeModule(scheduler)
+    late = FakeModule(scheduler)
+    scheduler.schedule(early, 0.1)
+    scheduler.schedule(late, 0.3)
+    time.sleep(0.5)
+    assert scheduler.batches == 2
+
+
+def test_cancel():
+    scheduler = Scheduler(0.1)
+    scheduler.start()
+    module = FakeModule(scheduler)
+    scheduler.schedule(module, 0.1)
+    scheduler.cancel(module)
+    time.sleep(0.2)
+    assert module.runs == []
+    # rescheduling replaces the previous time
+    scheduler.schedule(module, 0.5)
+    scheduler.schedule(module, 0.05)
+    time.sleep(0.2)
+    assert len(module.runs) == 1
@@ -0,0 +1,262 @@
+import json
+import os
+import sys
+
+import pytest
+
+from py3status.composite import Composite
+from py3status import segment as segment_module
+from py3status.modules import frame, group, rainbow
+from py3status.py3 import Py3
+from py3status.segment import Segment, freeze, remove_key, update_item, view
+
+
+def test_read_access():
+    s = Segment({'full_text': 'moo', 'color': '#FF0000'})
+    assert s['full_text'] == 'moo'
+    assert s.get('color') == '#FF0000'
+    assert s.get('urgent') is None
+    assert 'color' in s
+    assert 'urgent' not in s
+    assert sorted(s) == ['color', 'full_text']
+    assert s == {'full_text': 'moo', 'color': '#FF0000'}
+    assert dict(s) == {'full_text': 'moo', 'color': '#FF0000'}
+
+
+def test_immutable():
+    s = Segment({'full_text': 'moo'})
+    with pytest.raises(TypeError):
+        s['full_text'] = 'cow'
+    with pytest.raises(TypeError):
+        del s['full_text']
+    # copy gives a mutable dict
+    c = s.copy()
+    c['full_text'] = 'cow'
+    assert s['full_text'] == 'moo'
+
+
+def test_overlay():
+    base = Segment({'full_text': 'moo', 'color': '#FF0000'})
+    s = base.overlay({'color': '#00FF00'})
+    assert s == {'full_text': 'moo', 'color': '#00FF00'}
+    assert base == {'full_text': 'moo', 'color': '#FF0000'}
+    s = s.overlay({'urgent': True}, remove=['color'])
+    assert s == {'full_text': 'moo', 'urgent': True}
+    assert 'color' not in s
+
+
+def test_extra_keys():
+    s = Segment({'full_text': 'moo', 'custom': 1}, color='#FF0000')
+    assert s['custom'] == 1
+    assert s.to_dict() == {'full_text': 'moo', 'custom': 1, 'color': '#FF0000'}
+    with pytest.raises(KeyError):
+        s['other']
+
+
+def test_hash_and_json():
+    a = Segment({'full_text': 'moo', 'name': 'cow', 'separator': False})
+    b = Segment({'separator': False, 'name': 'cow', 'full_text': 'moo'})
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a != a.overlay({'full_text': 'cow'})
+    assert a.to_json() is a.to_json()
+    assert json.loads(a.to_json()) == a.to_dict()
+    assert len(set([a, b])) == 1
+
+
+def test_update_helpers():
+    item = {'full_text': 'moo'}
+    assert update_item(item, {'color': '#FF0000'}) is item
+    assert item == {'full_text': 'moo', 'color': '#FF0000'}
+    assert remove_key(item, 'color') is item
+    assert item == {'full_text': 'moo'}
+
+    s = freeze({'full_text': 'moo', 'color': '#FF0000'})
+    assert freeze(s) is s
+    assert update_item(s, {'color': '#00FF00'}, soft=True) is s
+    updated = update_item(s, {'color': '#00FF00'})
+    assert updated['color'] == '#00FF00'
+    assert s['color'] == '#FF0000'
+    assert 'color' not in remove_key(s, 'color')
+    assert remove_key(s, 'urgent') is s
+
+
+def test_composite_shares_segments():
+    s = freeze({'full_text': 'moo'})
+    c = Composite([s, {'full_text': 'cow', 'color': '#FF0000'}])
+    assert c.copy().get_content()[0] is s
+    # simplify does not change the shared segment
+    assert c.simplify().get_content()[0] is s
+
+    updated = Composite.composite_update(c, {'color': '#00FF00'}, soft=True)
+    assert updated.get_content() == [
+        {'full_text': 'moo', 'color': '#00FF00'},
+        {'full_text': 'cow', 'color': '#FF0000'},
+    ]
+    assert s == {'full_text': 'moo'}
+
+
+def test_composite_simplify_merge_segments():
+    s = freeze({'full_text': 'moo'})
+    c = Composite([s, freeze({'full_text': 'cow'})])
+    result = c.simplify().get_content()
+    assert result == [{'full_text': 'moocow'}]
+    assert s == {'full_text': 'moo'}
+
+
+def shipped_module_output():
+    """
+    Typical output for each shipped module, a composite of three parts as
+    would be produced after Module.run has processed it.
+    """
+    modules_dir = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'py3status', 'modules'
+    )
+    outputs = []
+    for filename in sorted(os.listdir(modules_dir)):
+        if not filename.endswith('.py') or filename.startswith('_'):
+            continue
+        name = filename[:-3]
+        output = []
+        for index in range(3):
+            output.append({
+                'full_text': u'{} part {}'.format(name, index),
+                'color': '#00FF00',
+                'instance': 'first {}'.format(index),
+                'name': name,
+                'separator': False,
+                'separator_block_width': 0,
+            })
+        output[-1]['separator'] = True
+        outputs.append(output)
+    return outputs
+
+
+def test_shipped_modules_memory():
+    outputs = shipped_module_output()
+    dicts = [[dict(x) for x in output] for output in outputs]
+    segments = [[Segment(x) for x in output] for output in outputs]
+    assert segments == dicts
+
+    # segments keep their keys in slots and have no instance dict
+    assert all(not hasattr(x, '__dict__') for output in segments for x in output)
+    for output, frozen in zip(dicts, segments):
+        for item, segment in zip(output, frozen):
+            assert sys.getsizeof(segment) < sys.getsizeof(item)
+
+
+def test_shipped_modules_unchanged_output(monkeypatch):
+    outputs = shipped_module_output()
+    segments = [[Segment(x) for x in output] for output in outputs]
+    dumped = []
+    monkeypatch.setattr(
+        segment_module, 'dumps', lambda data, **kw: dumped.append(data) or ''
+    )
+
+    # unchanged output is compared and written 100 times as set_updated
+    # and process_module_output would do
+    for i in range(100):
+        for output in segments:
+            new = [freeze(x) for x in output]
+            assert all(x is y for x, y in zip(new, output))
+            assert new == output
+            ','.join([x.to_json() for x in new])
+    # each segment was serialized only once
+    assert len(dumped) == sum(len(output) for output in segments)
+
+    # and is immutable so sharing it is safe
+    with pytest.raises(TypeError):
+        segments[0][0]['color'] = '#FF0000'
+    assert segments[0][0]['color'] == '#00FF00'
+
+
+OUTPUTS = {
+    'short': [Segment({'full_text': 'ab', 'color': '#FF0000',
+                       'separator': True})],
+    'long': [Segment({'full_text': 'abcdef'}),
+             Segment({'full_text': 'gh', 'separator': False})],
+    'plain': [Segment({'full_text': 'ij'})],
+}
+
+
+def container(module, monkeypatch, **config):
+    """
+    Return the container module showing the OUTPUTS.
+    """
+    monkeypatch.setattr(Py3, 'register_function', lambda *args: None)
+    monkeypatch.setattr(Py3, '_get_module_info', lambda self, name: {
+        'module': type('Module', (), {'get_latest': lambda self: OUTPUTS[name]})()
+    })
+    instance = module.Py3status()
+    instance.py3 = Py3(py3status=instance)
+    instance.items = ['short', 'long']
+    for key, value in config.items():
+        setattr(instance, key, value)
+    instance.post_config_hook()
+    return instance
+
+
+def test_rainbow_overlays(monkeypatch):
+    module = container(rainbow, monkeypatch)
+    output = module.rainbow()['full_text'].get_content()
+    # colored items are shared, the others are overlaid
+    assert output[0] is OUTPUTS['short'][0]
+    assert output[1] == {'full_text': 'abcdef', 'color': output[1]['color']}
+    assert output[2] == {'full_text': 'gh', 'separator': False,
+                         'color': output[2]['color']}
+    assert output[1]['color'] in module.colors
+    assert OUTPUTS['long'][0] == {'full_text': 'abcdef'}
+    assert all(isinstance(x, Segment) for x in output)
+
+
+def test_group_padding_overlays(monkeypatch):
+    module = container(group, monkeypatch, fixed_width=True)
+    output = module._get_output()
+    assert [x['full_text'] for x in output] == ['   ab   ']
+    assert output[0]['color'] == '#FF0000'
+    assert isinstance(output[0], Segment)
+    assert OUTPUTS['short'][0]['full_text'] == 'ab'
+    module.active = 1
+    # the widest output is not padded so it is shared as it is
+    output = [freeze(x) for x in module._get_output()]
+    assert all(x is y for x, y in zip(output, OUTPUTS['long']))
+
+
+def test_frame_overlays(monkeypatch):
+    module = container(frame, monkeypatch, items=['short', 'plain'])
+    output = module.frame()['full_text'].get_content()
+    # items with a separator are shared, the others are overlaid
+    assert output[0] is OUTPUTS['short'][0]
+    assert output[1] == {'full_text': 'ij', 'separator': True}
+    assert isinstance(output[1], Segment)
+    assert OUTPUTS['plain'][0] == {'full_text': 'ij'}
+
+
+def test_views():
+    s = freeze({'full_text': 'moo', 'color': '#FF0000'})
+    v = view(s)
+    assert view({'full_text': 'cow'}) == {'full_text': 'cow'}
+    assert v == s and v.copy() == s.to_dict()
+    # an unchanged view shares the segment
+    assert freeze(v) is s
+    # containers can change items as they used to
+    v['full_text'] = 'cow'
+    del v['color']
+    v.update({'urgent': True})
+    assert dict(v) == {'full_text': 'cow', 'urgent': True}
+    assert len(v) == 2 and 'color' not in v
+    with pytest.raises(KeyError):
+        del v['color']
+    # but the shared segment is not changed
+    assert s == {'full_text': 'moo', 'color': '#FF0000'}
+    assert freeze(v) == {'full_text': 'cow', 'urgent': True}
+    assert isinstance(freeze(v), Segment)
+    # views can be used in Composites
+    c = Composite(view(s))
+    c.append(v)
+    assert c.copy().get_content()[0] is s
+    assert c.simplify().get_content() == [
+        {'full_text': 'moo', 'color': '#FF0000'},
+        {'full_text': 'cow', 'urgent': True},
+    ]
@@ -0,0 +1,116 @@
+import os
+import struct
+import sys
+import time
+import wave
+
+import pytest
+
+from py3status import sound
+from py3status.sound import SoundPlayer
+
+# records its arguments and what it reads from stdin
+FAKE_PLAYER = """#!{}
+import sys
+with open(sys.argv[0] + '.args', 'w') as f:
+    f.write(' '.join(sys.argv[1:]))
+if sys.argv[1] == '--raw':
+    stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+    with open(sys.argv[0] + '.stdin', 'wb') as f:
+        f.write(stdin.read())
+""".format(sys.executable)
+
+
+@pytest.fixture
+def players(tmpdir, monkeypatch):
+    for name in ['paplay', 'play']:
+        path = tmpdir.join(name)
+        path.write(FAKE_PLAYER)
+        path.chmod(0o755)
+    monkeypatch.setenv('PATH', str(tmpdir))
+    return tmpdir
+
+
+def write_wav(path, seconds, rate=8000):
+    wav = wave.open(str(path), 'wb')
+    wav.setnchannels(1)
+    wav.setsampwidth(2)
+    wav.setframerate(rate)
+    wav.writeframes(struct.pack('<h', 1000) * int(seconds * rate))
+    wav.close()
+
+
+def wait_for(path):
+    for i in range(100):
+        if path.check() and path.size():
+            return
+        time.sleep(0.02)
+
+
+def test_player_found_once(players, monkeypatch):
+    found = []
+    which = sound.which
+
+    def counting_which(command):
+        found.append(command)
+        return which(command)
+
+    monkeypatch.setattr(sound, 'which', counting_which)
+    player = SoundPlayer()
+    for i in range(3):
+        assert player.player() == ('paplay', str(players.join('paplay')))
+    assert found == ['paplay']
+
+    players.join('paplay').remove()
+    assert SoundPlayer().player()[0] == 'play'
+    monkeypatch.setenv('PATH', '')
+    assert SoundPlayer().play('alert.wav') is None
+
+
+def test_short_wav_preloaded(players, monkeypatch):
+    alert = players.join('alert.wav')
+    write_wav(alert, 0.5)
+    player = SoundPlayer()
+    assert player.load(str(alert))
+
+    # the file is not decoded again
+    monkeypatch.setattr(sound.wave, 'open', None)
+    assert player.load(str(alert))
+    player.play(str(alert)).wait()
+    wait_for(players.join('paplay.stdin'))
+    assert players.join('paplay.args').read().split() == [
+        '--raw', '--format=s16le', '--rate=8000', '--channels=1'
+    ]
+    assert players.join('paplay.stdin').read_binary() == \
+        struct.pack('<h', 1000) * 4000
+
+
+def test_other_files_played_from_disk(players):
+    song = players.join('song.wav')
+    write_wav(song, 6)
+    ogg = players.join('alert.ogg')
+    ogg.write('not a wav')
+    player = SoundPlayer()
+    for path in [song, ogg]:
+        assert not player.load(str(path))
+        player.play(str(path)).wait()
+        assert players.join('paplay.args').read().strip() == str(path)
+
+    # play cannot read raw samples from stdin
+    players.join('paplay').remove()
+    short = players.join('short.wav')
+    write_wav(short, 0.1)
+    player = SoundPlayer()
+    assert not player.load(str(short))
+    player.play(str(short)).wait()
+    assert players.join('play.args').read().strip() == str(short)
+
+
+def test_modified_file_decoded_again(players):
+    alert = players.join('alert.wav')
+    write_wav(alert, 0.1)
+    player = SoundPlayer()
+    assert player.load(str(alert))
+    write_wav(alert, 10)
+    os.utime(str(alert), (1000, 1000))
+    assert not player.load(str(alert))
@@ -0,0 +1,107 @@
+"""
+Startup with a 40 module config, what has happened by the first i3bar line.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+MODULE_COUNT = 40
+
+# the import waits until the release file exists and then records itself
+SLOW_MODULE = '''
+import os
+import time
+
+while not os.path.exists({release!r}):
+    time.sleep(0.01)
+with open({imported!r}, 'a') as f:
+    f.write('{index}\\n')
+
+
+class Py3status:
+    def slow(self):
+        return {{'full_text': 'slow {index}'}}
+'''
+
+RUN_PY3STATUS = 'from py3status import main; main()'
+
+
+def make_config(tmpdir):
+    modules = tmpdir.mkdir('modules')
+    order = []
+    for index in range(MODULE_COUNT):
+        name = 'slow_{}'.format(index)
+        modules.join(name + '.py').write(SLOW_MODULE.format(
+            imported=str(tmpdir.join('imported')),
+            index=index,
+            release=str(tmpdir.join('release')),
+        ))
+        order.append('order += "{}"'.format(name))
+    config = tmpdir.join('config')
+    config.write('\n'.join(order) + '\n')
+    return str(config), str(modules)
+
+
+def first_line(tmpdir, *options, **kw):
+    """
+    Run py3status and return its first i3bar line and the indexes of the
+    modules imported by then.  Module imports are held up until the release
+    file is created, which is done straight away unless release is False.
+    """
+    wait_for = kw.get('wait_for')
+    config, modules = make_config(tmpdir)
+    if kw.get('release', True):
+        tmpdir.join('release').write('')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    command = [sys.executable, '-c', RUN_PY3STATUS, '-s', '-c', config,
+               '-i', modules, '-l', str(tmpdir.join('log'))] + list(options)
+    process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, env=env)
+    try:
+        while True:
+            line = process.stdout.readline()
+            assert line, 'py3status exited without output'
+            if line.startswith(b',['):
+                imported = tmpdir.join('imported')
+                if imported.check():
+                    return line, imported.read().split()
+                return line, []
+    finally:
+        # wait for any file py3status is expected to write
+        for i in range(50):
+            if not wait_for or wait_for.check():
+                break
+            time.sleep(0.1)
+        process.kill()
+        process.wait()
+
+
+def test_startup_lazy_import(tmpdir):
+    line, imported = first_line(tmpdir.mkdir('eager'))
+    assert len(imported) == MODULE_COUNT
+    # with lazy imports the first line does not wait for any module
+    line, imported = first_line(tmpdir.mkdir('lazy'), '--lazy-import',
+                                release=False)
+    assert imported == []
+    # every configured module has a placeholder in the first line
+    for index in range(MODULE_COUNT):
+        assert b'"slow_%d"' % index in line
+
+
+def test_startup_report(tmpdir):
+    report_file = tmpdir.join('report.json')
+    # the report is written just after the first line is output
+    first_line(tmpdir.mkdir('report'), '--parallel-hooks',
+               '--startup-report', str(report_file),
+               wait_for=report_file)
+    report = json.loads(report_file.read())
+    assert report['first_output'] > 0
+    phases = [phase['phase'] for phase in report['phases']]
+    assert phases[:2] == ['config', 'i3status']
+    assert phases.count('import') == MODULE_COUNT
+    starts = [phase['start'] for phase in report['phases']]
+    assert starts == sorted(starts)
+    assert max(phase['end'] for phase in report['phases']) <= report['first_output']
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from py3status.netlink import NetworkState
+from py3status.py3 import Py3
+from py3status.subscription import Subscription, Subscriptions
+from py3status.timer_queue import TimerQueue
+
+from test_module import make_module
+
+
+class FakeSubscription(Subscription):
+    def __init__(self):
+        Subscription.__init__(self, None)
+        self.disconnected = 0
+
+    def _disconnect(self):
+        self.disconnected += 1
+
+
+def test_disconnect_all():
+    subscriptions = Subscriptions()
+    handles = [FakeSubscription() for i in range(3)]
+    for handle in handles:
+        subscriptions.add(handle)
+    handles[0].disconnect()
+    assert len(subscriptions) == 2
+    subscriptions.disconnect_all()
+    assert len(subscriptions) == 0
+    assert [x.disconnected for x in handles] == [1, 1, 1]
+    assert not any(x.active for x in handles)
+    # already disconnected so not kept
+    subscriptions.add(handles[0])
+    assert len(subscriptions) == 0
+
+
+def test_network_subscriptions():
+    module, wrapper = make_module()
+    wrapper.network = network = NetworkState()
+    # the state is not read from the kernel
+    network.start = lambda: None
+    errors = []
+    wrapper.report_exception = lambda msg, **kw: errors.append(msg)
+    subscription = Py3(module).network_subscribe(lambda: 1 / 0)
+    assert len(module.subscriptions) == 1
+    network._notify()
+    assert errors == ['Network change handler in `uptime` failed']
+
+    module.subscriptions.disconnect_all()
+    assert network._subscriptions == []
+    assert not subscription.active
+
+
+def test_timers_of_killed_module(monkeypatch):
+    monkeypatch.setattr(Py3, '_timer_queue', None)
+    module, wrapper = make_module()
+    wrapper.timer_queue = TimerQueue()
+    py3 = Py3(module)
+    fired = []
+    # run from the timer thread while more are added and the module killed
+    for i in range(200):
+        py3.call_later(i / 10000.0, lambda: fired.append(True))
+    for i in range(100):
+        py3.call_later(10, lambda: fired.append(False))
+    time.sleep(0.1)
+    assert len(module.subscriptions) == 100
+    errors = []
+
+    def kill():
+        try:
+            module.subscriptions.disconnect_all()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=kill)
+    thread.start()
+    for i in range(50):
+        py3.call_later(0, lambda: fired.append(True))
+    thread.join()
+    time.sleep(0.05)
+    assert errors == []
+    assert len(module.subscriptions) == 0
+    assert wrapper.timer_queue.pending() == 0
+    # those added during the kill may have been cancelled
+    assert fired[:200] == [True] * 200
+    assert False not in fired
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from py3status.composite import Composite
+from py3status.modules import taskwarrior
+from py3status.py3 import Py3
+
+TASKS = [
+    {'id': 1, 'description': 'write tests'},
+    {'id': 4, 'description': 'review'},
+]
+
+
+@pytest.fixture
+def task(tmpdir, monkeypatch):
+    """
+    Records the task commands run and answers them.
+    """
+    task = {'commands': [], 'tasks': TASKS}
+
+    def command_output(self, command):
+        task['commands'].append(command)
+        if 'rc.data.location' in command:
+            return str(tmpdir) + '\n'
+        return json.dumps(task['tasks'])
+
+    monkeypatch.setattr(Py3, 'check_commands', lambda self, cmds: 'task')
+    monkeypatch.setattr(Py3, 'command_output', command_output)
+    return task
+
+
+def make_taskwarrior():
+    module = taskwarrior.Py3status()
+    module.py3 = Py3(py3status=module)
+    module.post_config_hook()
+    return module
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def test_tasks(tmpdir, task):
+    pending = tmpdir.join('pending.data')
+    pending.write('')
+    module = make_taskwarrior()
+    assert module.data_files[0] == str(pending)
+    assert text(module.taskWarrior()) == '1 write tests, 4 review'
+    assert task['commands'][-1] == 'task rc.verbose:nothing +ACTIVE export'
+
+    # task is only run again when the database changes
+    module.taskWarrior()
+    assert len(task['commands']) == 2
+    task['tasks'] = TASKS[1:]
+    os.utime(str(pending), (1000, 1000))
+    assert text(module.taskWarrior()) == '4 review'
+    assert len(task['commands']) == 3
+
+
+def test_no_data_files(task):
+    module = make_taskwarrior()
+    module.taskWarrior()
+    module.taskWarrior()
+    # without the files to check task is run every time
+    assert len(task['commands']) == 3
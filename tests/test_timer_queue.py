@@ -0,0 +1,109 @@
+import threading
+import time
+
+from py3status.composite import Composite
+from py3status.modules import pomodoro, timer
+from py3status.py3 import Py3
+from py3status.timer_queue import TimerQueue
+
+
+def fired_at(queue, delays):
+    fired = {}
+    start = time.time()
+    for delay in delays:
+        queue.add(delay, lambda delay=delay: fired.setdefault(
+            delay, time.time() - start))
+    return fired
+
+
+def test_accuracy():
+    queue = TimerQueue()
+    before = threading.active_count()
+    delays = [0.3 - i * 0.01 for i in range(30)]
+    fired = fired_at(queue, delays)
+    # one thread serves every deadline
+    assert threading.active_count() == before + 1
+    time.sleep(0.45)
+    assert sorted(fired) == sorted(delays)
+    for delay, when in fired.items():
+        assert delay <= when < delay + 0.05
+    # and it is reused once they are done
+    fired_at(queue, [0.01])
+    time.sleep(0.1)
+    assert threading.active_count() == before + 1
+    assert queue.pending() == 0
+
+
+def test_cancel():
+    queue = TimerQueue()
+    fired = []
+    deadlines = [
+        queue.add(0.1, lambda i=i: fired.append(i)) for i in range(100)
+    ]
+    for deadline in deadlines[1:]:
+        deadline.cancel()
+        deadline.cancel()
+    # cancelled deadlines are dropped rather than left in the heap
+    assert queue.pending() == 1
+    assert len(queue._heap) < 10
+    time.sleep(0.2)
+    assert fired == [0]
+    deadlines[0].cancel()
+    assert queue.pending() == 0
+
+
+def test_errors_do_not_stop_the_queue():
+    queue = TimerQueue()
+    fired = []
+    queue.add(0.01, lambda: 1 / 0)
+    queue.add(0.02, lambda: fired.append(True))
+    time.sleep(0.1)
+    assert fired == [True]
+
+
+def make_module(module, **config):
+    instance = module.Py3status()
+    instance.py3 = Py3(py3status=instance)
+    for key, value in config.items():
+        setattr(instance, key, value)
+    if hasattr(instance, 'post_config_hook'):
+        instance.post_config_hook()
+    return instance
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def test_timer_module(monkeypatch):
+    monkeypatch.setattr(Py3, '_timer_queue', TimerQueue())
+    module = make_module(timer, time=1)
+    updates = []
+    module.py3.update = lambda: updates.append(True)
+    before = threading.active_count()
+    # start, pause and restart
+    for i in range(3):
+        module.on_click({'button': 1, 'index': None})
+    queue = module.py3._get_timer_queue()
+    assert queue.pending() == 1
+    assert threading.active_count() <= before + 1
+    time.sleep(1.2)
+    assert updates == [True]
+    assert module.done
+    assert text(module.timer()) == 'Timer 0:00:00'
+
+
+def test_pomodoro_module(monkeypatch):
+    monkeypatch.setattr(Py3, '_timer_queue', TimerQueue())
+    module = make_module(pomodoro, timer_pomodoro=0.1)
+    module.pomodoro()
+    notified = []
+    module.py3.notify_user = notified.append
+    module.on_click({'button': 1})
+    time.sleep(0.3)
+    assert notified == ['Pomodoro time is up !']
+    assert module._prefix == 'Break #1'
+    assert module.pomodoro()['urgent']
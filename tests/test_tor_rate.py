@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('stem')
+
+from py3status.composite import Composite  # noqa
+from py3status.modules.tor_rate import (  # noqa
+    ERROR_AUTHENTICATION, ERROR_CONNECTION, Py3status, RateWindow
+)
+from py3status.py3 import Py3  # noqa
+
+
+class FakeTor:
+    """
+    Just enough of a Tor control port for stem to authenticate and
+    subscribe to BW events.
+    """
+
+    def __init__(self, password=None):
+        self.password = password
+        self.clients = []
+        self.commands = []
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(5)
+        self.port = self.server.getsockname()[1]
+        self.subscribed = threading.Event()
+        thread = threading.Thread(target=self._accept)
+        thread.daemon = True
+        thread.start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, address = self.server.accept()
+            except (OSError, socket.error):
+                return
+            self.clients.append(client)
+            thread = threading.Thread(target=self._serve, args=(client,))
+            thread.daemon = True
+            thread.start()
+
+    def _reply(self, command):
+        if command.startswith('PROTOCOLINFO'):
+            method = 'HASHEDPASSWORD' if self.password else 'NULL'
+            return [
+                '250-PROTOCOLINFO 1',
+                '250-AUTH METHODS={}'.format(method),
+                '250-VERSION Tor="0.4.8.9"',
+                '250 OK',
+            ]
+        if command.startswith('AUTHENTICATE'):
+            if self.password and self.password not in command:
+                return ['515 Authentication failed: Password did not match']
+        if command.startswith('GETINFO'):
+            key = command.split()[1]
+            return ['250-{}=0.4.8.9'.format(key), '250 OK']
+        if command.startswith('GETCONF'):
+            return ['250 {}'.format(command.split()[1])]
+        if command.startswith('SETEVENTS') and 'BW' in command:
+            self.subscribed.set()
+        return ['250 OK']
+
+    def _serve(self, client):
+        data = b''
+        while True:
+            try:
+                chunk = client.recv(4096)
+            except (OSError, socket.error):
+                return
+            if not chunk:
+                return
+            data += chunk
+            while b'\r\n' in data:
+                line, data = data.split(b'\r\n', 1)
+                command = line.decode('utf-8')
+                self.commands.append(command)
+                reply = '\r\n'.join(self._reply(command)) + '\r\n'
+                client.sendall(reply.encode('utf-8'))
+
+    def bandwidth(self, read, written):
+        event = '650 BW {} {}\r\n'.format(read, written).encode('utf-8')
+        for client in self.clients:
+            client.sendall(event)
+
+    def close(self):
+        # shutdown wakes the accept() so that the port is really closed
+        for sock in [self.server] + self.clients:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except (OSError, socket.error):
+                pass
+        self.server.close()
+        for client in self.clients:
+            client.close()
+        self.clients = []
+
+
+@pytest.fixture
+def tor():
+    tor = FakeTor()
+    yield tor
+    tor.close()
+
+
+def make_tor_rate(port, **config):
+    tor_rate = Py3status()
+    tor_rate.py3 = Py3(py3status=tor_rate)
+    tor_rate.control_port = port
+    tor_rate.format = u'{down} {down_peak} {up}'
+    tor_rate.format_value = '{rate:.0f}'
+    for key, value in config.items():
+        setattr(tor_rate, key, value)
+    tor_rate.post_config_hook()
+    tor_rate.updates = 0
+
+    def update():
+        tor_rate.updates += 1
+
+    tor_rate.py3.update = update
+    return tor_rate
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def wait_for(condition):
+    for i in range(200):
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError('timed out')
+
+
+def test_rate_window():
+    window = RateWindow(3)
+    averages = []
+    peaks = []
+    for rate in [5, 1, 2, 1, 0, 7, 3, 3, 3]:
+        window.add(rate)
+        averages.append(window.average)
+        peaks.append(window.peak)
+    assert averages == [5, 3, 8 / 3, 4 / 3, 1, 8 / 3, 10 / 3, 13 / 3, 3]
+    assert peaks == [5, 5, 5, 2, 2, 7, 7, 7, 3]
+
+
+def test_push_updates(tor):
+    tor_rate = make_tor_rate(tor.port, rate_window=4)
+    response = tor_rate.tor_rate([], {})
+    assert response['cached_until'] == tor_rate.py3.CACHE_FOREVER
+    assert text(response) == u'0 0 0'
+    wait_for(tor.subscribed.is_set)
+
+    updates = tor_rate.updates
+    for read in [100, 100, 100, 500, 100, 100]:
+        tor.bandwidth(read, 10)
+        time.sleep(0.02)
+    wait_for(lambda: len(tor_rate._down.rates) == 4)
+    assert text(tor_rate.tor_rate([], {})) == u'200 500 10'
+    # only the first and fourth events changed the output
+    assert tor_rate.updates - updates == 2
+
+
+def test_reconnect_backoff(tor):
+    tor_rate = make_tor_rate(tor.port, reconnect_timeout=2)
+    tor_rate.tor_rate([], {})
+    wait_for(tor.subscribed.is_set)
+    tor.close()
+    # the module is updated so that it reconnects
+    wait_for(lambda: not tor_rate._handler_active)
+    assert tor_rate.updates >= 1
+
+    delays = []
+    for i in range(4):
+        response = tor_rate.tor_rate([], {})
+        assert text(response) == ERROR_CONNECTION
+        delays.append(response['cached_until'] - time.time())
+    # time_in() rounds up to the next whole second
+    assert delays == pytest.approx([2.5, 4.5, 8.5, 16.5], abs=0.6)
+
+    # back online
+    tor = FakeTor()
+    tor_rate.control_port = tor.port
+    response = tor_rate.tor_rate([], {})
+    assert response['cached_until'] == tor_rate.py3.CACHE_FOREVER
+    assert tor_rate._backoff == 2
+    tor.close()
+
+
+def test_authentication_failure():
+    tor = FakeTor(password='secret')
+    tor_rate = make_tor_rate(tor.port, control_password='wrong')
+    response = tor_rate.tor_rate([], {})
+    assert text(response) == ERROR_AUTHENTICATION
+    tor_rate.control_password = 'secret'
+    # authentication failures are not retried
+    assert text(tor_rate.tor_rate([], {})) == ERROR_AUTHENTICATION
+    tor.close()
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+
+import pytest
+
+from py3status.composite import Composite
+from py3status.modules import vnstat
+from py3status.py3 import Py3
+
+DUMPDB = """active;1
+interface;wlan0
+h;0;1500000000;10;20
+d;0;1500000000;1;2;512;256;1
+d;1;1499913600;5;6;0;0;1
+m;0;1500000000;100;200;0;0;1
+"""
+
+# prints the dump found next to it, counting its runs, and then the history
+# after the delay found next to it
+FAKE_VNSTAT = """#!{}
+import sys
+import time
+with open(sys.argv[0] + '.runs', 'a') as f:
+    f.write(' '.join(sys.argv[1:]) + '\\n')
+with open(sys.argv[0] + '.dump') as f:
+    sys.stdout.write(f.read())
+sys.stdout.flush()
+with open(sys.argv[0] + '.delay') as f:
+    time.sleep(float(f.read()))
+for i in range(1000):
+    print('d;{{}};0;0;0;0;0;1'.format(i + 2))
+""".format(sys.executable)
+
+
+@pytest.fixture
+def dumpdb(tmpdir, monkeypatch):
+    """
+    A fake vnstat, its database directory and the dump it prints.
+    """
+    bin_dir = tmpdir.mkdir('bin')
+    fake = bin_dir.join('vnstat')
+    fake.write(FAKE_VNSTAT)
+    fake.chmod(0o755)
+    bin_dir.join('vnstat.dump').write(DUMPDB)
+    bin_dir.join('vnstat.delay').write('0')
+    monkeypatch.setenv('PATH', str(bin_dir) + os.pathsep + os.environ['PATH'])
+    database = tmpdir.mkdir('database')
+    database.join('wlan0').write('')
+    return bin_dir
+
+
+def runs(dumpdb):
+    if not dumpdb.join('vnstat.runs').check():
+        return []
+    return dumpdb.join('vnstat.runs').read().splitlines()
+
+
+def make_vnstat(tmpdir, **config):
+    module = vnstat.Py3status()
+    module.py3 = Py3(py3status=module)
+    module.database_dir = str(tmpdir.join('database'))
+    for key, value in config.items():
+        setattr(module, key, value)
+    module.post_config_hook()
+    return module
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def test_counters(tmpdir, dumpdb):
+    dumpdb.join('vnstat.delay').write('10')
+    module = make_vnstat(tmpdir, format='{down} {up} {total}')
+    start = time.time()
+    assert text(module.vntstat()) == '1.5 mb 2.2 mb 3.8 mb'
+    # the rest of the history is not waited for
+    assert time.time() - start < 5
+    assert runs(dumpdb) == ['--dumpdb']
+
+    # nothing is run while the database is unchanged
+    module.vntstat()
+    assert len(runs(dumpdb)) == 1
+
+    os.utime(str(tmpdir.join('database', 'wlan0')), (1000, 1000))
+    module.statistics_type = 'm'
+    assert text(module.vntstat()) == '100.0 mb 200.0 mb 300.0 mb'
+    assert len(runs(dumpdb)) == 2
+
+
+def test_errors(tmpdir, dumpdb):
+    dumpdb.join('vnstat.dump').write('interface;wlan0\n')
+    module = make_vnstat(tmpdir)
+    assert text(module.vntstat()) == vnstat.STRING_ERROR
+    # failures are retried on the next run
+    dumpdb.join('vnstat.dump').write('d;0;1500000000;x;y;0;0;1\n')
+    assert text(module.vntstat()) == vnstat.STRING_ERROR
+    dumpdb.join('vnstat.dump').write(DUMPDB)
+    assert text(module.vntstat()) == '3.8 mb'
+    assert len(runs(dumpdb)) == 3
+
+
+def test_unavailable(tmpdir, dumpdb, monkeypatch):
+    monkeypatch.setattr(Py3, 'check_commands', lambda self, cmds: None)
+    module = make_vnstat(tmpdir)
+    assert text(module.vntstat()) == vnstat.STRING_UNAVAILABLE
+    assert runs(dumpdb) == []
+
+
+def test_database_dir(tmpdir, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmpdir))
+    monkeypatch.setattr(vnstat, 'CONFIG_FILES', [
+        '~/.vnstatrc', str(tmpdir.join('missing.conf')),
+    ])
+    module = make_vnstat(tmpdir, database_dir=None)
+    assert module.database_dir == vnstat.DATABASE_DIR
+
+    tmpdir.join('.vnstatrc').write(
+        '# vnstat 1.x configuration\nDatabaseDir "/home/vnstat/db"\n')
+    module = make_vnstat(tmpdir, database_dir=None)
+    assert module.database_dir == '/home/vnstat/db'
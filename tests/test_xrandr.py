@@ -0,0 +1,229 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from py3status.composite import Composite
+from py3status.modules import xrandr as xrandr_module
+from py3status.modules.xrandr import Py3status
+from py3status.py3 import Py3
+
+XRANDR = """Screen 0: minimum 8 x 8, current 1920 x 1080, maximum 32767 x 32767
+eDP1 connected primary 1920x1080+0+0 (normal left inverted) 309mm x 174mm
+   1920x1080     60.05*+
+DP1 connected (normal left inverted right x axis y axis)
+   2560x1440     59.95 +
+DP2 disconnected (normal left inverted right x axis y axis)
+VIRTUAL1 unknown connection (normal left inverted right x axis y axis)
+"""
+
+
+def make_xrandr(outputs=XRANDR, **config):
+    xrandr = Py3status()
+    xrandr.py3 = Py3(py3status=xrandr)
+    for key, value in config.items():
+        setattr(xrandr, key, value)
+    xrandr.commands = []
+    xrandr.xrandr_output = outputs
+
+    def command_output(command, shell=False):
+        xrandr.commands.append(command)
+        return xrandr.xrandr_output
+
+    xrandr.py3.command_output = command_output
+    return xrandr
+
+
+def text(response):
+    output = response['full_text']
+    if isinstance(output, Composite):
+        return ''.join(x['full_text'] for x in output)
+    return output
+
+
+def test_parse_xrandr(monkeypatch):
+    monkeypatch.setattr('py3status.modules.xrandr.xlib_available', False)
+    xrandr = make_xrandr()
+    response = xrandr.xrandr()
+    assert xrandr.layout['connected'] == {
+        'eDP1': {'active': True, 'state': 'connected'},
+        'DP1': {'active': False, 'state': 'connected'},
+    }
+    assert list(xrandr.layout['disconnected']) == ['DP2']
+    assert xrandr.active_layout == 'eDP1'
+    assert sorted(xrandr.available_combinations) == [
+        'DP1', 'eDP1', 'eDP1+DP1', 'eDP1=DP1'
+    ]
+    assert text(response).strip() == 'eDP1'
+    assert response['cached_until'] != xrandr.py3.CACHE_FOREVER
+
+
+def test_combinations_cached(monkeypatch):
+    monkeypatch.setattr('py3status.modules.xrandr.xlib_available', False)
+    xrandr = make_xrandr()
+    generated = []
+    get_combinations = xrandr._get_combinations
+
+    def count():
+        generated.append(tuple(xrandr.layout['connected']))
+        return get_combinations()
+
+    xrandr._get_combinations = count
+    xrandr.xrandr()
+    xrandr.on_click({'button': 5})
+    displayed = xrandr.displayed
+    xrandr.xrandr()
+    # the selection is kept while the outputs do not change
+    assert xrandr.displayed == displayed
+    assert len(generated) == 1
+
+    # DP1 is unplugged and then plugged back in
+    xrandr.xrandr_output = XRANDR.replace('\nDP1 connected',
+                                          '\nDP1 disconnected')
+    xrandr.xrandr()
+    assert list(xrandr.available_combinations) == ['eDP1']
+    assert xrandr.max_width == len('eDP1')
+    xrandr.xrandr_output = XRANDR
+    xrandr.xrandr()
+    assert generated == [('eDP1', 'DP1'), ('eDP1',)]
+    assert len(xrandr.available_combinations) == 4
+    assert xrandr.max_width == len('eDP1+DP1')
+
+    # the width is that of the combinations of the current outputs
+    xrandr.xrandr_output = XRANDR.replace('\nDP1 connected',
+                                          '\nDP1 disconnected')
+    xrandr.xrandr()
+    assert xrandr.max_width == len('eDP1')
+
+
+class FakeDisplay:
+    """
+    X connection with the RandR extension, events are written to a pipe.
+    """
+    displays = []
+
+    def __init__(self):
+        self.closed = False
+        self.read, self.write = os.pipe()
+        self.root = self
+        self.displays.append(self)
+
+    def has_extension(self, name):
+        return True
+
+    def screen(self):
+        return self
+
+    def xrandr_select_input(self, mask):
+        pass
+
+    def flush(self):
+        pass
+
+    def fileno(self):
+        return self.read
+
+    def pending_events(self):
+        return 0
+
+    def next_event(self):
+        os.read(self.read, 1)
+
+    def close(self):
+        self.closed = True
+        os.close(self.read)
+        os.close(self.write)
+
+
+class FakeXdisplay:
+    Display = FakeDisplay
+
+
+class FakeRandr:
+    RRScreenChangeNotifyMask = 1
+    RROutputChangeNotifyMask = 2
+
+
+def test_kill_stops_listener(monkeypatch):
+    monkeypatch.setattr(FakeDisplay, 'displays', [])
+    monkeypatch.setattr(xrandr_module, 'xlib_available', True)
+    monkeypatch.setattr(xrandr_module, 'xdisplay', FakeXdisplay,
+                        raising=False)
+    monkeypatch.setattr(xrandr_module, 'randr', FakeRandr, raising=False)
+    xrandr = make_xrandr()
+    updates = []
+    xrandr.py3.update = lambda: updates.append(True)
+    xrandr._start_listener()
+    events, display = FakeDisplay.displays
+    os.write(events.write, b'x')
+    for i in range(100):
+        if updates:
+            break
+        time.sleep(0.01)
+    assert updates == [True]
+
+    xrandr.kill()
+    assert not xrandr._listener.is_alive()
+    assert events.closed
+    assert display.closed
+
+
+@pytest.fixture
+def xvfb():
+    pytest.importorskip('Xlib')
+    display = ':97'
+    try:
+        server = subprocess.Popen(
+            ['Xvfb', display, '-screen', '0', '1024x768x24'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+    except OSError:
+        pytest.skip('Xvfb is not installed')
+    old_display = os.environ.get('DISPLAY')
+    os.environ['DISPLAY'] = display
+    for i in range(100):
+        if os.path.exists('/tmp/.X11-unix/X97'):
+            break
+        time.sleep(0.05)
+    yield display
+    server.terminate()
+    server.wait()
+    if old_display is None:
+        del os.environ['DISPLAY']
+    else:
+        os.environ['DISPLAY'] = old_display
+
+
+def test_randr_events(xvfb):
+    from Xlib import display as xdisplay
+
+    xrandr = make_xrandr()
+    updates = []
+    xrandr.py3.update = lambda: updates.append(True)
+    response = xrandr.xrandr()
+    assert xrandr._listening
+    assert response['cached_until'] == xrandr.py3.CACHE_FOREVER
+    # the outputs were read from the server
+    assert xrandr.commands == []
+    assert list(xrandr.layout['connected'])
+
+    # nothing is read again until the server says the screen changed
+    read = []
+    xrandr._get_layout = lambda: read.append(True) or xrandr.layout
+    xrandr.xrandr()
+    assert read == []
+
+    client = xdisplay.Display(xvfb)
+    root = client.screen().root
+    root.xrandr_set_screen_size(800, 600, 211, 158)
+    client.sync()
+    for i in range(100):
+        if updates:
+            break
+        time.sleep(0.05)
+    assert updates
+    xrandr.xrandr()
+    assert read == [True]
+    client.close()
+    xrandr.kill()